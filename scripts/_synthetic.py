@@ -0,0 +1,18 @@
+import random
+
+from vscripts.utils import to_srt_timestamp
+
+_WORDS = (
+    "the house is on the hill and we never went back there after the storm I told you that she would call "
+    "tomorrow morning but nobody knows where they are going tonight why did you leave the door open"
+).split()
+
+
+def synthetic_srt(cues: int, seed: int = 0) -> str:
+    """Build an SRT with `cues` cues of one or two random lines, 2 seconds each."""
+    rng = random.Random(seed)
+    blocks = []
+    for i in range(cues):
+        lines = [" ".join(rng.choices(_WORDS, k=rng.randint(3, 12))).capitalize() for _ in range(rng.randint(1, 2))]
+        blocks.append(f"{i + 1}\n{to_srt_timestamp(i * 2)} --> {to_srt_timestamp(i * 2 + 1.5)}\n" + "\n".join(lines))
+    return "\n\n".join(blocks) + "\n"
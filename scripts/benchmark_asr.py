@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+
+import argparse
+import logging
+import os
+import re
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+sys.path[0] = os.path.join(os.path.dirname(__file__), "..")
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+logger.addHandler(logging.StreamHandler(sys.stdout))
+
+
+# the default sample is synthesized from this text with ffmpeg's flite voice, the same audio on every machine
+_SAMPLE_TEXT = (
+    "The old lighthouse keeper climbed the narrow stairs every evening before sunset. "
+    "He cleaned the lamp, wound the clockwork and wrote the weather in a small leather book. "
+    "Ships passing the rocks at night never knew his name, but they trusted the light he kept. "
+    "When the storms came in winter, he stayed awake until morning and counted the waves."
+)
+_SAMPLE_VOICE = "slt"
+
+
+def main(
+    audio_path: Path | None, reference_path: Path | None, language: str, model: str, backends: list[str], runs: int
+):
+    if runs < 1:
+        raise ValueError(f"invalid {runs=}, must be at least 1")
+    if (audio_path is None) != (reference_path is None):
+        raise ValueError("a custom sample needs both the audio and its reference transcription")
+    if audio_path is None or reference_path is None:
+        audio_path, reference = default_sample(), _SAMPLE_TEXT
+    else:
+        reference = reference_path.read_text(encoding="utf-8")
+
+    audio = load_audio_track(audio_path)
+    duration = len(audio) / SAMPLE_RATE
+    logger.info(f"benchmarking {backends} with '{model}' on {audio_path.name} ({duration:.1f}s)")
+    logger.info(f"thread budget: {get_thread_budget()}")
+
+    for name in backends:
+        backend = get_asr_backend(name)  # type: ignore
+
+        start = time.perf_counter()
+        backend.load(model)  # type: ignore
+        load_time = time.perf_counter() - start
+
+        elapsed = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            segments = backend.transcribe(model, audio, language, [0.0])  # type: ignore
+            elapsed.append(time.perf_counter() - start)
+
+        hypothesis = " ".join(seg["text"] for seg in segments)
+        rtf = min(elapsed) / duration
+        wer = word_error_rate(reference, hypothesis)
+        logger.info(f"{name:<14} load={load_time:6.1f}s  rtf={rtf:.3f}  wer={wer:.3f}")
+
+
+def default_sample() -> Path:
+    """Synthesize the fixed benchmark sample once, it is kept in the cache directory for later runs."""
+    path = get_cache_dir() / "benchmarks" / f"asr_sample_{_SAMPLE_VOICE}.wav"
+    if path.is_file():
+        return path
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        run_ffmpeg_command(
+            ["-f", "lavfi", "-i", f"flite=text='{_SAMPLE_TEXT}':voice={_SAMPLE_VOICE}", "-ar", "16000", str(path)]
+        )
+    except subprocess.CalledProcessError as e:
+        path.unlink(missing_ok=True)
+        raise ValueError("could not synthesize the sample, ffmpeg needs flite, or pass --audio and --reference") from e
+    return path
+
+
+def word_error_rate(reference: str, hypothesis: str) -> float:
+    """
+    Compute the word error rate of a transcription: (substitutions + deletions + insertions) / reference words.
+
+    Words are compared lowercased and without punctuation.
+    """
+    ref, hyp = _words(reference), _words(hypothesis)
+    if not ref:
+        return float(len(hyp) > 0)
+
+    # single row Levenshtein distance over words
+    row = list(range(len(hyp) + 1))
+    for i, ref_word in enumerate(ref, start=1):
+        diagonal, row[0] = row[0], i
+        for j, hyp_word in enumerate(hyp, start=1):
+            diagonal, row[j] = row[j], min(row[j] + 1, row[j - 1] + 1, diagonal + (ref_word != hyp_word))
+    return row[-1] / len(ref)
+
+
+def _words(text: str) -> list[str]:
+    return re.sub(r"[^\w\s']", " ", text.lower()).split()
+
+
+def _parse_arguments():
+    parser = argparse.ArgumentParser(description="Compare real-time factor and WER of the ASR backends.")
+    parser.add_argument("-a", "--audio", type=Path, help="custom audio sample, a fixed synthesized one by default")
+    parser.add_argument("--reference", type=Path, help="text file with the reference transcription of --audio")
+    parser.add_argument("-l", "--language", type=str, default="en", help="sample language (ISO 639-1)")
+    parser.add_argument("-m", "--model", type=str, default="small", help="whisper model size")
+    parser.add_argument("-b", "--backends", nargs="+", default=["whisper", "whisper-int8"], help="backends to compare")
+    parser.add_argument("-r", "--runs", type=int, default=1, help="timed runs per backend, the fastest one is kept")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    from vscripts.utils import (
+        SAMPLE_RATE,
+        get_asr_backend,
+        get_cache_dir,
+        get_thread_budget,
+        load_audio_track,
+        run_ffmpeg_command,
+    )
+
+    args = _parse_arguments()
+    logger.info(f"{os.path.basename(__file__)}:: args -> {args.__dict__}")
+
+    main(args.audio, args.reference, args.language, args.model, args.backends, args.runs)
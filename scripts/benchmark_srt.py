@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+
+import argparse
+import logging
+import os
+import sys
+import time
+from collections.abc import Callable
+from typing import Any
+
+sys.path[0] = os.path.join(os.path.dirname(__file__), "..")
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+logger.addHandler(logging.StreamHandler(sys.stdout))
+
+
+def main(cues: int, repeats: int, seed: int):
+    content = synthetic_srt(cues, seed=seed)
+    logger.info(f"synthetic SRT with {cues} cues ({len(content) / 2**20:.1f}MB), best of {repeats} runs")
+
+    parsed = parse_srt(content)
+    assert format_srt(parsed) == content, "serialization must be lossless"
+    lines = [line for cue in parsed for line in cue.lines]
+    starts = np.array([cue.start for cue in parsed], dtype=np.int64)
+    ends = np.array([cue.end for cue in parsed], dtype=np.int64)
+
+    timings: list[tuple[str, Callable[[], Any]]] = [
+        ("parse_srt (dicts, previous)", lambda: _dict_parse_srt(content)),
+        ("parse_srt", lambda: parse_srt(content)),
+        ("format_srt", lambda: format_srt(parsed)),
+        ("rebuild_srt", lambda: rebuild_srt(parsed, lines)),
+        ("flatten_srt_text", lambda: flatten_srt_text(content)),
+        ("count_srt_entries", lambda: count_srt_entries(content)),
+        ("retime_timestamps", lambda: retime_timestamps(starts, ends, offset=-1500, scale=25 / 23.976)),
+        ("retime_cues", lambda: retime_cues(parsed, offset=-1500, scale=25 / 23.976)),
+    ]
+    for name, fn in timings:
+        elapsed = _best_of(fn, repeats)
+        logger.info(f"{name:<28} {elapsed * 1e6:10.0f}us  {cues / elapsed:12.0f} cues/s")
+
+
+def _best_of(fn: Callable[[], Any], repeats: int) -> float:
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def _dict_parse_srt(content: str) -> list[dict[str, Any]]:
+    # the dict based parser parse_srt replaced, kept as the baseline
+    from pyutils.strings import whitespaces_clean
+
+    blocks = []
+    current: dict[str, Any] = {"index": None, "time": None, "lines": []}
+    for line in content.splitlines():
+        if line.strip().isdigit():
+            if current["index"] is not None:
+                blocks.append(current)
+            current = {"index": line.strip(), "time": None, "lines": []}
+        elif "-->" in line:
+            current["time"] = line
+        elif line.strip():
+            current["lines"].append(whitespaces_clean(line))
+    if current["index"] is not None:
+        blocks.append(current)
+    return blocks
+
+
+def _parse_arguments():
+    parser = argparse.ArgumentParser(description="Measure the SRT parsing and serialization helpers.")
+    parser.add_argument("-n", "--cues", type=int, default=10_000, help="number of cues in the synthetic SRT")
+    parser.add_argument("-r", "--repeats", type=int, default=5, help="runs of each helper, the best one is reported")
+    parser.add_argument("-s", "--seed", type=int, default=0, help="seed of the synthetic SRT")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    import numpy as np
+    from scripts._synthetic import synthetic_srt
+    from vscripts.utils import (
+        count_srt_entries,
+        flatten_srt_text,
+        format_srt,
+        parse_srt,
+        rebuild_srt,
+        retime_cues,
+        retime_timestamps,
+    )
+
+    args = _parse_arguments()
+    logger.info(f"{os.path.basename(__file__)}:: args -> {args.__dict__}")
+
+    main(args.cues, args.repeats, args.seed)
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+
+sys.path[0] = os.path.join(os.path.dirname(__file__), "..")
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+logger.addHandler(logging.StreamHandler(sys.stdout))
+
+
+def main(cues: int, from_language: str, to_language: str, batch_sizes: list[int], seed: int, onnx: bool):
+    parsed = parse_srt(synthetic_srt(cues, seed=seed))
+    logger.info(f"thread budget: {get_thread_budget()}")
+    logger.info(f"translating a synthetic SRT with {cues} cues from '{from_language}' to '{to_language}'")
+
+    # the first load downloads (and exports) the model, keep it out of the timings
+    load_translation_model(from_language, to_language)
+    if onnx:
+        load_onnx_translation_model(from_language, to_language)
+
+    translations: dict[str, str] = {}
+    for mode in ["local", "onnx"] if onnx else ["local"]:
+        for batch_size in batch_sizes:
+            # every run starts with an empty translation memory, otherwise only the first one would hit the model
+            with tempfile.TemporaryDirectory() as cache_dir:
+                os.environ["VSCRIPTS_CACHE_DIR"] = cache_dir
+                start = time.perf_counter()
+                translations[mode] = _translate_cues_helsinki(
+                    parsed, from_language, to_language, batch_size=batch_size, onnx=mode == "onnx"
+                )
+                elapsed = time.perf_counter() - start
+            logger.info(f"{mode:<5} batch_size={batch_size:<4} {elapsed:8.2f}s  {cues / elapsed:8.1f} cues/s")
+
+    if onnx:
+        local, exported = (parse_srt(translations[m]) for m in ["local", "onnx"])
+        equal = sum(a.lines == b.lines for a, b in zip(local, exported))
+        logger.info(f"onnx output equals the torch output in {equal}/{len(local)} cues ({equal / len(local):.1%})")
+
+
+def _parse_arguments():
+    parser = argparse.ArgumentParser(description="Measure the throughput of the local subtitle translation.")
+    parser.add_argument("-n", "--cues", type=int, default=1500, help="number of cues in the synthetic SRT")
+    parser.add_argument("-f", "--from-language", type=str, default="en", help="source language (ISO 639-1)")
+    parser.add_argument("-t", "--to-language", type=str, default="es", help="target language (ISO 639-1)")
+    parser.add_argument("-b", "--batch-sizes", type=int, nargs="+", default=[1, 8, 32, 64], help="batch sizes")
+    parser.add_argument("-s", "--seed", type=int, default=0, help="seed of the synthetic SRT")
+    parser.add_argument("--onnx", action="store_true", help="also run the int8 ONNX export and compare its output")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    from scripts._synthetic import synthetic_srt
+    from vscripts.commands._translate import _translate_cues_helsinki
+    from vscripts.utils import (
+        get_thread_budget,
+        load_onnx_translation_model,
+        load_translation_model,
+        parse_srt,
+    )
+
+    args = _parse_arguments()
+    logger.info(f"{os.path.basename(__file__)}:: args -> {args.__dict__}")
+
+    main(args.cues, args.from_language, args.to_language, args.batch_sizes, args.seed, args.onnx)
@@ -0,0 +1,42 @@
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+import pytest
+import whisper
+from torch import nn
+from vscripts.utils import get_asr_backend, load_whisper
+
+
+def test_get_asr_backend():
+    assert get_asr_backend().name == "whisper"
+    assert get_asr_backend("whisper-int8").name == "whisper-int8"
+    with pytest.raises(ValueError):
+        get_asr_backend("invalid")  # type: ignore
+
+
+def test_asr_backend_transcribe():
+    fake_model = MagicMock()
+    fake_model.transcribe.return_value = {
+        "segments": [{"id": 0, "start": 0.0, "end": 1.2, "text": " Hello world", "tokens": [1, 2]}],
+    }
+
+    with patch("vscripts.utils._asr.load_whisper", return_value=fake_model) as load:
+        segments = get_asr_backend("whisper-int8").transcribe("tiny", np.zeros(16_000), "en", [0.0])
+
+    assert segments == [{"start": 0.0, "end": 1.2, "text": " Hello world"}]
+    assert load.call_args.kwargs["quantized"] is True
+    assert fake_model.transcribe.call_args.kwargs["fp16"] is False
+
+
+def test_load_quantized_whisper():
+    # quantization works in place, so it gets its own model instead of the one shared by every test
+    with (
+        patch("vscripts.utils._whisper.load_model", return_value=whisper.load_model("tiny")),
+        patch.dict("vscripts.utils._whisper._loaded_whisper_models", clear=True),
+    ):
+        model = load_whisper("tiny", quantized=True)
+
+    linears = [m for m in model.modules() if type(m) is nn.Linear]
+    quantized = [m for m in model.modules() if type(m) is nn.quantized.dynamic.Linear]
+    assert len(linears) == 0, "every linear layer should be quantized"
+    assert len(quantized) > 0
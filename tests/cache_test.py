@@ -0,0 +1,46 @@
+from unittest.mock import patch
+
+from vscripts.data.cache import get_cached_language, set_cached_language, subs_fingerprint
+from vscripts.data.language import find_subs_language
+
+from tests._utils import generate_test_subs
+
+
+def test_cached_language_roundtrip():
+    assert get_cached_language("aac:10:abc", "tiny+small@0.8", "whisper") is None
+
+    set_cached_language("aac:10:abc", "tiny+small@0.8", "whisper", "eng", 0.93)
+    cached = get_cached_language("aac:10:abc", "tiny+small@0.8", "whisper")
+
+    assert cached is not None
+    assert cached.language == "eng"
+    assert cached.confidence == 0.93
+    assert get_cached_language("aac:10:abc", "medium@0.8", "whisper") is None, "model is part of the key"
+    assert get_cached_language("aac:10:abc", "tiny+small@0.8", "fast_langdetect") is None, "method is part of the key"
+
+
+def test_subs_fingerprint(tmp_path):
+    subs = generate_test_subs(tmp_path / "subs.srt")
+    copy = generate_test_subs(tmp_path / "copy.srt")
+
+    assert subs_fingerprint(subs) == subs_fingerprint(copy)
+
+    subs.write_text(subs.read_text() + "\n3\n00:00:02,000 --> 00:00:03,000\nMore text.\n")
+    assert subs_fingerprint(subs) != subs_fingerprint(copy)
+
+
+def test_find_subs_language_uses_cache(tmp_path):
+    subs = generate_test_subs(tmp_path / "subs.srt")
+
+    with patch("vscripts.data.language.detect", return_value=[{"lang": "en", "score": 0.99}]) as detect:
+        assert find_subs_language(subs) == "eng"
+        assert find_subs_language(subs) == "eng"
+        assert detect.call_count == 1, "second call should be served from the cache"
+
+        assert find_subs_language(subs, use_cache=False) == "eng"
+        assert detect.call_count == 2, "use_cache=False should bypass the cache"
+
+        detect.return_value = [{"lang": "es", "score": 0.99}]
+        assert find_subs_language(subs, use_cache=False) == "spa"
+        assert find_subs_language(subs) == "spa", "detecting without the cache should refresh it"
+        assert detect.call_count == 3
@@ -0,0 +1,20 @@
+from vscripts.data.checkpoint import clear_checkpoint, load_checkpoint, save_checkpoint
+
+_KEY = {"fingerprint": "aac:10:abc", "backend": "whisper", "model": "medium", "language": "en", "chunks": [[0.0, 5.0]]}
+
+
+def test_checkpoint_roundtrip():
+    assert load_checkpoint(_KEY) == []
+
+    chunks = [(0.0, [{"start": 0.0, "end": 1.5, "text": "Hello"}])]
+    save_checkpoint(_KEY, chunks)  # type: ignore
+    assert load_checkpoint(_KEY) == chunks
+
+    clear_checkpoint(_KEY)
+    assert load_checkpoint(_KEY) == []
+
+
+def test_checkpoint_ignores_other_inputs():
+    save_checkpoint(_KEY, [(0.0, [{"start": 0.0, "end": 1.5, "text": "Hello"}])])
+    assert load_checkpoint({**_KEY, "model": "small"}) == []
+    assert load_checkpoint({**_KEY, "fingerprint": "aac:10:def"}) == []
@@ -1,13 +1,21 @@
 from unittest.mock import patch
 
 import pytest
-from vscripts.cli import cmd_do
+from vscripts.cli import _parse_actions, cmd_do
 from vscripts.commands._extract import extract
 from vscripts.data.streams import AudioStream, SubtitleStream, VideoStream
 
 from tests._utils import generate_test_audio, generate_test_full, get_file_duration, has_subtitles
 
 
+def _writes_subs(subs: str):
+    # _transcribe writes the SRT to its output path instead of returning it
+    def transcribe(stream, output_path, *_, **__) -> None:
+        output_path.write_text(subs, encoding="utf-8")
+
+    return transcribe
+
+
 @pytest.mark.cmd
 def test_do_audio(tmp_path):
     audio_path = generate_test_audio(tmp_path / "audio.mka", duration=2)
@@ -71,7 +79,7 @@ Hello world!
 This is a test.
 """
 
-    with patch("vscripts.commands._generate._transcribe", return_value=subs):
+    with patch("vscripts.commands._generate._transcribe", side_effect=_writes_subs(subs)):
         cmd_do(video_path, ["extract=0", "generate-subs", "append"], output=output_path)
 
     assert output_path.exists(), "Output file should exist"
@@ -112,8 +120,8 @@ Esto es un test.
 """
 
     with (
-        patch("vscripts.commands._generate._transcribe", return_value=subs),
-        patch("vscripts.commands._translate._translate_subtitles_helsinki", return_value=subs_es),
+        patch("vscripts.commands._generate._transcribe", side_effect=_writes_subs(subs)),
+        patch("vscripts.commands._translate._translate_cues_helsinki", return_value=subs_es),
     ):
         cmd_do(video_path, ["extract=0", "generate-subs", "translate=spa", "append"], output=output_path)
 
@@ -129,3 +137,86 @@ Esto es un test.
     assert "1\n" in content
     assert "Hola mundo!" in content
     assert "Esto es un test." in content
+
+
+@pytest.mark.cmd
+def test_do_translate_multiple_targets(tmp_path):
+    video_path = generate_test_full(tmp_path, duration=1)
+    output_path = tmp_path / "output.mkv"
+
+    subs = """1
+00:00:00,000 --> 00:00:00,800
+Hello world!
+"""
+
+    with (
+        patch("vscripts.commands._generate._transcribe", side_effect=_writes_subs(subs)),
+        patch(
+            "vscripts.commands._translate._translate_cues_helsinki",
+            side_effect=lambda cues, from_language, language, **_: subs.replace("Hello world!", language),
+        ),
+    ):
+        cmd_do(video_path, ["extract=0", "generate-subs", "translate=spa,glg", "append"], output=output_path)
+
+    subtitle_streams = SubtitleStream.from_file(output_path)
+    assert len(subtitle_streams) == 3, f"expected =3 subtitle streams, got {len(subtitle_streams)}"
+
+
+def test_parse_translate_targets():
+    assert _parse_actions(["translate=spa"])["translate"] == [["spa"]]
+    assert _parse_actions(["translate=spa,glg"])["translate"] == [["spa", "glg"]]
+
+
+def test_do_keeps_outputs_of_skipped_commands(tmp_path):
+    input_path = tmp_path / "input.mkv"
+    input_path.write_bytes(b"input")
+
+    def fake_atempo(path, *_, output, **__):
+        result = output / f"{path.stem}_atempo.mkv"
+        result.write_bytes(b"atempo")
+        return [result]
+
+    def fake_delay(path, *_, output, **__):
+        result = output / f"{path.stem}_delayed.mkv"
+        result.write_bytes(path.read_bytes() + b" delayed")
+        return [result]
+
+    (tmp_path / "out").mkdir()
+    commands = {"atempo-with": fake_atempo, "generate-subs": lambda *_, **__: [], "delay": fake_delay}
+    with patch.dict("vscripts.cli.COMMANDS", commands):
+        cmd_do(input_path, ["atempo-with=1.5", "generate-subs", "delay=1"], output=tmp_path / "out")
+
+    assert (tmp_path / "out" / "input_atempo_delayed.mkv").read_bytes() == b"atempo delayed"
+    assert input_path.exists(), "the input must never be moved"
+
+
+def test_do_never_moves_the_input(tmp_path):
+    input_path = tmp_path / "input.mkv"
+    input_path.write_bytes(b"input")
+
+    with patch.dict("vscripts.cli.COMMANDS", {"generate-subs": lambda *_, **__: []}):
+        cmd_do(input_path, ["generate-subs"], output=None)
+
+    assert [p.name for p in tmp_path.iterdir()] == ["input.mkv"]
+
+
+def test_do_passes_the_destination_to_the_last_command(tmp_path):
+    input_path = tmp_path / "input.mkv"
+    input_path.write_bytes(b"input")
+    destinations = {}
+
+    def fake_command(name):
+        def command(path, *_, output, destination, **__):
+            destinations[name] = destination
+            result = output / f"{path.stem}_{name}.mkv"
+            result.write_bytes(b"output")
+            return [result]
+
+        return command
+
+    commands = {"generate-subs": fake_command("subs"), "append": fake_command("append")}
+    with patch.dict("vscripts.cli.COMMANDS", commands):
+        cmd_do(input_path, ["generate-subs", "append=x"], output=tmp_path / "out.mkv")
+
+    assert destinations == {"subs": None, "append": tmp_path / "out.mkv"}, "intermediate outputs never get there"
+    assert (tmp_path / "out.mkv").read_bytes() == b"output"
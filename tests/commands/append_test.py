@@ -72,3 +72,19 @@ def test_simple_subtitle_append(tmp_path):
     )
     subtitle_stream_lines = [line for line in out.decode().strip().splitlines() if line.strip()]
     assert len(subtitle_stream_lines) >= 2, f"expected >=2 subtitle streams, got {len(subtitle_stream_lines)}"
+
+
+@pytest.mark.integration
+def test_append_multiple_attachments(tmp_path):
+    root = generate_test_full(tmp_path, duration=1)
+    attachments = [generate_test_subs(tmp_path / "subs_es.srt"), generate_test_subs(tmp_path / "subs_gl.srt")]
+    output = tmp_path / "combined.mkv"
+
+    result = append(root, attachments, output=output)[0]
+
+    assert result == output
+    out = subprocess.check_output(
+        FFPROBE_BASE_COMMAND + ["-select_streams", "s", "-show_entries", "stream=index", "-of", "csv=p=0", str(output)]
+    )
+    subtitle_stream_lines = [line for line in out.decode().strip().splitlines() if line.strip()]
+    assert len(subtitle_stream_lines) == 3, f"expected 3 subtitle streams, got {len(subtitle_stream_lines)}"
@@ -3,8 +3,9 @@ from unittest.mock import patch
 
 import pytest
 from vscripts.commands._atempo import atempo, atempo_video, atempo_with
+from vscripts.utils import parse_srt
 
-from tests._utils import generate_test_audio, generate_test_video, get_file_duration
+from tests._utils import generate_test_audio, generate_test_subs, generate_test_video, get_file_duration
 
 
 def test_atempo_io():
@@ -18,6 +19,31 @@ def test_atempo_io():
         atempo_video(Path("non_existent_file.wav"), to_rate=30.0)
 
 
+def test_atempo_with_stream_copies_other_streams(tmp_path):
+    video_path = tmp_path / "input.mp4"
+    video_path.write_bytes(b"")
+    probe = {
+        "streams": [
+            {"index": 0, "codec_name": "h264", "codec_type": "video"},
+            {"index": 1, "codec_name": "aac", "codec_type": "audio", "bit_rate": "128000"},
+            {"index": 2, "codec_name": "opus", "codec_type": "audio", "bit_rate": "96000"},
+        ]
+    }
+
+    with (
+        patch("vscripts.data.streams._ffprobe_streams", return_value=probe),
+        patch("vscripts.commands._atempo.run_ffmpeg_command") as run,
+    ):
+        atempo_with(video_path, 1.25, track=1, output=tmp_path)
+
+    command = run.call_args.args[0]
+    assert command[command.index("-map") + 1] == "0"
+    assert command[command.index("-c") + 1] == "copy"
+    assert "-filter:a:0" not in command and command[command.index("-filter:a:1") + 1] == "atempo=1.25"
+    # mp4 can not hold opus, the container's default codec is used
+    assert command[command.index("-c:a:1") + 1] == "aac" and "-b:a:1" not in command
+
+
 @pytest.mark.integration
 def test_atempo_with_explicit_from_rate(tmp_path):
     input_file = generate_test_audio(tmp_path / "input.wav")
@@ -91,6 +117,14 @@ def test_simple_atempo_with(tmp_path):
     assert 0 < duration < 2.0, f"Expected shorter duration, got {duration}s"
 
 
+def test_atempo_with_srt_without_ffmpeg(tmp_path):
+    subs = generate_test_subs(tmp_path / "input.srt")
+
+    output_file = atempo_with(subs, atempo_value=2.0, output=tmp_path)[0]
+
+    assert [(c.start, c.end) for c in parse_srt(output_file.read_text())] == [(0, 400), (450, 750)]
+
+
 @pytest.mark.integration
 def test_simple_atempo_video(tmp_path):
     input_file = generate_test_video(tmp_path / "input.mp4")
@@ -1,8 +1,12 @@
 from pathlib import Path
 from unittest.mock import MagicMock, patch
 
+import numpy as np
 import pytest
 from vscripts.commands import generate_subtitles
+from vscripts.commands._generate import _plan_chunks, _stitch_segments, _transcribe, _transcribe_chunks
+from vscripts.data.streams import AudioStream
+from vscripts.utils import SAMPLE_RATE
 
 from tests._utils import generate_test_audio
 
@@ -24,7 +28,7 @@ def test_generate_subtitles(tmp_path):
         ]
     }
 
-    with patch("vscripts.commands._generate.load_whisper", return_value=fake_model):
+    with patch("vscripts.utils._asr.load_whisper", return_value=fake_model):
         output_files = generate_subtitles(audio_file, language="eng")
 
     assert len(output_files) == 1, "Should generate one subtitle file"
@@ -51,7 +55,7 @@ def test_generate_subtitles_inferring_language(tmp_path):
         ]
     }
 
-    with patch("vscripts.commands._generate.load_whisper", return_value=fake_model):
+    with patch("vscripts.utils._asr.load_whisper", return_value=fake_model):
         output_files = generate_subtitles(audio_file)
 
     assert len(output_files) == 1, "Should generate one subtitle file"
@@ -78,7 +82,7 @@ def test_generate_subtitles_multiple_audio_streams(tmp_path):
         ]
     }
 
-    with patch("vscripts.commands._generate.load_whisper", return_value=fake_model):
+    with patch("vscripts.utils._asr.load_whisper", return_value=fake_model):
         output_files = generate_subtitles(audio_file, track=1)
 
     assert len(output_files) == 1, "Should generate one subtitle file for the specified track"
@@ -91,3 +95,131 @@ def test_generate_subtitles_multiple_audio_streams(tmp_path):
     assert "00:00:00,000 --> 00:00:" in content
     assert "Hello world" in content
     assert "This is a test" in content
+
+
+@pytest.mark.integration
+def test_generate_subtitles_skip_existing(tmp_path):
+    audio_file = generate_test_audio(tmp_path / "input.mka", duration=5)
+
+    fake_model = MagicMock()
+    with (
+        patch("vscripts.commands._generate.subtitle_languages", return_value={"eng"}),
+        patch("vscripts.utils._asr.load_whisper", return_value=fake_model),
+    ):
+        output_files = generate_subtitles(audio_file, language="eng", skip_existing=True)
+
+    assert output_files == [], "the input already has subtitles in the audio language"
+    fake_model.transcribe.assert_not_called()
+
+
+def test_plan_chunks_breaks_at_silences():
+    regions = [(0.0, 100.0), (150.0, 400.0), (500.0, 700.0), (710.0, 900.0)]
+    chunks = _plan_chunks(regions, total=1000.0, chunk_seconds=600.0)
+    assert chunks == [[(0.0, 100.0), (150.0, 400.0)], [(500.0, 700.0), (710.0, 900.0)]]
+
+
+def test_plan_chunks_without_speech():
+    assert _plan_chunks([], total=42.0) == [[(0.0, 42.0)]]
+
+
+def test_plan_chunks_splits_long_regions():
+    assert _plan_chunks([(10.0, 1500.0)], total=1600.0) == [[(10.0, 610.0)], [(610.0, 1210.0)], [(1210.0, 1500.0)]]
+    assert _plan_chunks([], total=1300.0) == [[(0.0, 600.0)], [(600.0, 1200.0)], [(1200.0, 1300.0)]]
+
+
+def test_stitch_segments():
+    results = [
+        (0.0, [{"start": 0.0, "end": 2.0, "text": "Hello"}, {"start": 2.0, "end": 5.0, "text": " world"}]),
+        (4.0, [{"start": 0.5, "end": 1.5, "text": "world"}, {"start": 1.0, "end": 3.0, "text": "again"}]),
+    ]
+    segments = list(_stitch_segments(results))
+    assert [s["text"].strip() for s in segments] == ["Hello", "world", "again"]
+    assert segments[2]["start"] == 5.0 and segments[2]["end"] == 7.0
+
+
+def _fake_init_worker(*_) -> None:
+    # stands in for the model load of the spawned workers
+    pass
+
+
+def _fake_transcribe_chunk(backend_name, model_name, audio, clip_timestamps, language):
+    # module level so the spawned workers can unpickle it, the text tells the chunks apart
+    return [
+        {"start": s, "end": e, "text": f"{len(audio)} {s}"} for s, e in zip(clip_timestamps[::2], clip_timestamps[1::2])
+    ]
+
+
+def test_transcribe_chunks_in_parallel():
+    audio = np.zeros(40 * SAMPLE_RATE, np.float32)
+    chunks = _plan_chunks([(0.0, 2.0), (5.0, 9.0), (12.0, 13.0), (20.0, 26.0), (30.0, 39.0)], total=40, chunk_seconds=6)
+
+    with (
+        patch("vscripts.commands._generate._init_worker", _fake_init_worker),
+        patch("vscripts.commands._generate._transcribe_chunk", _fake_transcribe_chunk),
+    ):
+        serial = list(_stitch_segments(_transcribe_chunks(audio, chunks, "en", "whisper", "tiny", workers=1)))
+        parallel = list(_stitch_segments(_transcribe_chunks(audio, chunks, "en", "whisper", "tiny", workers=2)))
+
+    assert len(chunks) > 2 * 2, "more chunks than can be in flight at once"
+    assert parallel == serial
+    assert [s["start"] for s in parallel] == [0.0, 5.0, 12.0, 20.0, 30.0, 36.0]
+
+
+def test_transcribe_resumes_from_checkpoint(tmp_path):
+    stream = AudioStream(_index=0, codec_name="aac", codec_type="audio", ffmpeg_index=0)
+    stream.file_path = tmp_path / "input.mka"
+    output = tmp_path / "output.srt"
+
+    crashing_model = MagicMock()
+    crashing_model.transcribe.side_effect = [
+        {"segments": [{"start": 0.0, "end": 1.0, "text": "first"}]},
+        RuntimeError("pre-empted"),
+    ]
+    resuming_model = MagicMock()
+    resuming_model.transcribe.return_value = {"segments": [{"start": 0.0, "end": 1.0, "text": "second"}]}
+
+    with (
+        patch("vscripts.commands._generate.load_audio_track", return_value=np.zeros(702 * SAMPLE_RATE, np.float32)),
+        patch("vscripts.commands._generate.speech_segments", return_value=[(0.0, 1.0), (700.0, 701.0)]),
+        patch("vscripts.commands._generate.audio_fingerprints", return_value=["aac:702:abc"]),
+    ):
+        with patch("vscripts.utils._asr.load_whisper", return_value=crashing_model), pytest.raises(RuntimeError):
+            _transcribe(stream, output, language="en")
+        with patch("vscripts.utils._asr.load_whisper", return_value=resuming_model):
+            _transcribe(stream, output, language="en")
+
+    assert resuming_model.transcribe.call_count == 1, "only the missing chunk should be transcribed"
+    content = output.read_text(encoding="utf-8")
+    assert "00:00:00,000 --> 00:00:01,000\nfirst" in content
+    assert "00:11:40,000 --> 00:11:41,000\nsecond" in content
+
+
+def test_transcribe_resumes_inside_a_single_region(tmp_path):
+    stream = AudioStream(_index=0, codec_name="aac", codec_type="audio", ffmpeg_index=0)
+    stream.file_path = tmp_path / "input.mka"
+    output = tmp_path / "output.srt"
+
+    crashing_model = MagicMock()
+    crashing_model.transcribe.side_effect = [
+        {"segments": [{"start": 0.0, "end": 1.0, "text": "first"}]},
+        RuntimeError("pre-empted"),
+    ]
+    resuming_model = MagicMock()
+    resuming_model.transcribe.return_value = {"segments": [{"start": 0.0, "end": 1.0, "text": "later"}]}
+
+    with (
+        patch("vscripts.commands._generate.load_audio_track", return_value=np.zeros(1201 * SAMPLE_RATE, np.float32)),
+        # no speech found, the whole audio is a single region
+        patch("vscripts.commands._generate.speech_segments", return_value=[]),
+        patch("vscripts.commands._generate.audio_fingerprints", return_value=["aac:1201:abc"]),
+    ):
+        with patch("vscripts.utils._asr.load_whisper", return_value=crashing_model), pytest.raises(RuntimeError):
+            _transcribe(stream, output, language="en")
+        with patch("vscripts.utils._asr.load_whisper", return_value=resuming_model):
+            _transcribe(stream, output, language="en")
+
+    assert resuming_model.transcribe.call_count == 2, "the first 600 seconds must not be transcribed again"
+    content = output.read_text(encoding="utf-8")
+    assert "00:00:00,000 --> 00:00:01,000\nfirst" in content
+    assert "00:10:00,000 --> 00:10:01,000\nlater" in content
+    assert "00:20:00,000 --> 00:20:01,000\nlater" in content
@@ -2,9 +2,15 @@ import subprocess
 from pathlib import Path
 from unittest.mock import patch
 
+import numpy as np
 import pytest
 from vscripts.commands import merge
-from vscripts.commands._merge import _retrieve_data_streams, _retrieve_target_streams
+from vscripts.commands._merge import (
+    _forced_subs_candidate,
+    _retrieve_data_streams,
+    _retrieve_forced_subs,
+    _retrieve_target_streams,
+)
 from vscripts.data.streams import AudioStream, SubtitleStream, VideoStream
 from vscripts.utils import FFPROBE_BASE_COMMAND
 
@@ -22,6 +28,54 @@ def test_merge_io():
         merge(Path("non_existent_file.wav"), Path("data_file.wav"), output=None)
 
 
+@pytest.mark.parametrize(
+    "coverages, expected",
+    [
+        ([0.02], 0),
+        ([0.4], None),
+        ([0.45, 0.03, 0.5], 1),
+        # short tracks with every one of them sparse, none stands out
+        ([0.05, 0.06], None),
+        ([0.3, 0.35], None),
+    ],
+)
+def test_forced_subs_candidate(coverages, expected):
+    index, confidence = _forced_subs_candidate(np.array(coverages))
+
+    assert index == expected
+    assert 0 <= confidence <= 1
+
+
+def _write_srt(path: Path, cues: int, length: float) -> Path:
+    path.write_text(
+        "".join(f"{i + 1}\n00:00:{i:02d},000 --> 00:00:{i:02d},{int(length * 1000):03d}\nline\n\n" for i in range(cues))
+    )
+    return path
+
+
+def test_retrieve_forced_subs(tmp_path):
+    full = _write_srt(tmp_path / "full.srt", cues=50, length=0.9)
+    forced = _write_srt(tmp_path / "forced.srt", cues=2, length=0.5)
+    ignored = tmp_path / "signs.sup"
+    ignored.write_bytes(b"")
+
+    probe = {"streams": [{"index": 0, "codec_name": "subrip", "codec_type": "subtitle"}]}
+    with patch("vscripts.data.streams._ffprobe_streams", return_value=probe):
+        subs, confidence = _retrieve_forced_subs([full, forced, ignored], duration=60)
+
+    assert subs is not None and subs.file_path == forced
+    assert subs.default and subs.language == "spa"
+    assert confidence > 0.5
+    assert _retrieve_forced_subs([full], duration=60)[0] is None
+    assert _retrieve_forced_subs([ignored], duration=60) == (None, 0.0)
+
+
+def test_retrieve_forced_subs_without_duration(tmp_path):
+    zero_timed = _write_srt(tmp_path / "zero.srt", cues=1, length=0)
+
+    assert _retrieve_forced_subs([zero_timed], duration=0) == (None, 0.0)
+
+
 @pytest.mark.integration
 def test_merge_two_videos(tmp_path):
     target_path = generate_test_full(tmp_path, duration=1)
@@ -118,7 +172,7 @@ def test_merge_two_videos_forced_subs(tmp_path):
         ),
         patch(
             "vscripts.commands._merge._retrieve_forced_subs",
-            return_value=subs3_stream,
+            return_value=(subs3_stream, 1.0),
         ),
     ):
         merged_output = merge(target_path, data_path, output=output_path)[0]
@@ -196,7 +250,7 @@ def test__retrieve_data_streams(tmp_path):
     subs_stream.tags["language"] = "es"
 
     with (
-        patch("vscripts.commands._merge.find_audio_language", return_value="spa"),
+        patch("vscripts.commands._merge.find_audio_languages", side_effect=lambda streams, **_: ["spa"] * len(streams)),
         patch("vscripts.commands._merge.find_subs_language", return_value="spa"),
     ):
         a_streams, s_streams = _retrieve_data_streams(list(tmp_path.iterdir()))
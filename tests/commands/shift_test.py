@@ -1,14 +1,18 @@
 import subprocess
 from pathlib import Path
+from unittest.mock import patch
 
 import pytest
+from vscripts.commands._extract import extract
 from vscripts.commands._shift import delay, hasten, inspect, reencode
 from vscripts.constants import ENCODING_1080P
 from vscripts.data.streams import _ffprobe_streams
+from vscripts.utils import parse_srt
 
 from tests._utils import (
     generate_test_audio,
     generate_test_full,
+    generate_test_subs,
     generate_test_video,
     get_file_duration,
     has_audio,
@@ -57,6 +61,93 @@ def test_simple_hasten(tmp_path):
     assert get_file_duration(output_file) >= get_file_duration(input_file) - 0.3
 
 
+def test_shift_srt_without_ffmpeg(tmp_path):
+    subs = generate_test_subs(tmp_path / "input.srt")
+
+    delayed = delay(subs, 0.5, output=tmp_path)[0]
+    assert delayed.name == "input_delayed_0.5.srt"
+    assert [(c.start, c.end) for c in parse_srt(delayed.read_text())] == [(500, 1300), (1400, 2000)]
+
+    hastened = hasten(subs, 1.0, output=tmp_path)[0]
+    assert [(c.index, c.start, c.end) for c in parse_srt(hastened.read_text())] == [(1, 0, 500)]
+
+
+_PROBE = {
+    "streams": [
+        {"index": 0, "codec_name": "h264", "codec_type": "video"},
+        {"index": 1, "codec_name": "ac3", "codec_type": "audio", "bit_rate": "448000"},
+        {"index": 2, "codec_name": "flac", "codec_type": "audio", "bit_rate": "900000"},
+    ]
+}
+
+
+def test_delay_stream_copies_other_streams(tmp_path):
+    video_path = tmp_path / "input.mkv"
+    video_path.write_bytes(b"")
+
+    with (
+        patch("vscripts.data.streams._ffprobe_streams", return_value=_PROBE),
+        patch("vscripts.commands._shift.run_ffmpeg_command") as run,
+    ):
+        output = delay(video_path, 0.5, output=tmp_path)[0]
+
+    command = run.call_args.args[0]
+    assert output.name == "input_delayed_0.5.mkv"
+    assert command[command.index("-map") + 1] == "0", "every stream must be kept"
+    assert command[command.index("-c") + 1] == "copy"
+    assert command[command.index("-c:a:0") + 1] == "ac3" and command[command.index("-b:a:0") + 1] == "448000"
+    assert command[command.index("-c:a:1") + 1] == "flac" and "-b:a:1" not in command
+    assert command.count("adelay=500:all=true") == 2
+
+
+def test_delay_track_to_audio_file(tmp_path):
+    video_path = tmp_path / "input.mkv"
+    video_path.write_bytes(b"")
+
+    with (
+        patch("vscripts.data.streams._ffprobe_streams", return_value=_PROBE),
+        patch("vscripts.commands._shift.run_ffmpeg_command") as run,
+    ):
+        delay(video_path, 0.5, track=1, output=tmp_path / "output.flac")
+
+    command = run.call_args.args[0]
+    assert command[command.index("-map") : command.index("-map") + 2] == ["-map", "0:a:1"]
+    assert command.count("-map") == 1
+    assert command[command.index("-filter:a:0") + 1] == "adelay=500:all=true"
+    assert command[command.index("-c:a:0") + 1] == "flac"
+
+
+def test_hasten_track_to_audio_file(tmp_path):
+    video_path = tmp_path / "input.mkv"
+    video_path.write_bytes(b"")
+    probe = {"streams": [*_PROBE["streams"], {"index": 3, "codec_name": "subrip", "codec_type": "subtitle"}]}
+
+    with (
+        patch("vscripts.data.streams._ffprobe_streams", return_value=probe),
+        patch("vscripts.commands._shift.retimed_subtitle_args") as retimed,
+        patch("vscripts.commands._shift.run_ffmpeg_command") as run,
+    ):
+        output = hasten(video_path, 1, track=0, output=tmp_path)[0]
+
+    command = run.call_args.args[0]
+    assert output.name == "input_hastened_1.mka"
+    retimed.assert_not_called()
+    assert command.count("-i") == 1, "an audio only output can not hold subtitles"
+    assert [arg for arg in command if arg.startswith("0:") or ":s" in arg] == ["0:a:0"]
+
+
+@pytest.mark.integration
+def test_delay_retimes_subtitle_streams(tmp_path):
+    video_path = generate_test_full(tmp_path, duration=1)
+    output_file = tmp_path / "output.mkv"
+
+    delay(video_path, 2, output=output_file)
+
+    assert has_audio(output_file)
+    subs = extract(output_file, stream_type="subtitle", output=tmp_path)[0]
+    assert parse_srt(subs.read_text(encoding="utf-8"))[0].start == 2000, "subtitles must be delayed with the audio"
+
+
 @pytest.mark.integration
 def test_inspect_adds_language_metadata(tmp_path):
     video_path = generate_test_full(tmp_path, duration=1)
@@ -82,6 +173,31 @@ def test_inspect_adds_language_metadata(tmp_path):
         assert isinstance(lang, str), f"Language tag for subtitle {i} must be a string"
 
 
+def test_inspect_skips_bitmap_subtitles(tmp_path):
+    video_path = tmp_path / "input.mkv"
+    video_path.touch()
+    text_subs = generate_test_subs(tmp_path / "x_1.srt")
+    bitmap_subs = tmp_path / "x_2.hdmv_pgs_subtitle"
+    bitmap_subs.write_bytes(b"PG")
+
+    def probe(path, *_):
+        codec = "subrip" if path.suffix == ".srt" else "hdmv_pgs_subtitle"
+        return {"streams": [{"index": 0, "codec_name": codec, "codec_type": "subtitle"}]}
+
+    with (
+        patch("vscripts.data.streams._ffprobe_streams", side_effect=probe),
+        patch("vscripts.commands._shift.extract", return_value=[text_subs, bitmap_subs]),
+        patch("vscripts.data.language.detect", return_value=[{"lang": "en", "score": 0.99}]),
+        patch("vscripts.commands._shift.run_ffmpeg_command") as run,
+    ):
+        output = inspect(video_path, output=tmp_path / "inspected.mkv")[0]
+
+    assert output == tmp_path / "inspected.mkv"
+    command = run.call_args[0][0]
+    assert command[command.index("-metadata:s:s:0") + 1] == "language=eng"
+    assert "-metadata:s:s:1" not in command, "bitmap subtitles must be left untouched"
+
+
 @pytest.mark.integration
 def test_inspect_no_metadata_no_processing(tmp_path):
     empty_video = generate_test_video(tmp_path / "test_video2.mp4", duration=1)
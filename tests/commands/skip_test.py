@@ -0,0 +1,53 @@
+import os
+from unittest.mock import patch
+
+from vscripts.commands._skip import existing_output, is_up_to_date, subtitle_languages
+
+
+def test_is_up_to_date(tmp_path):
+    input_file = tmp_path / "input.mka"
+    output_file = tmp_path / "output.srt"
+    input_file.touch()
+    assert not is_up_to_date(output_file, input_file)
+
+    output_file.touch()
+    os.utime(input_file, (0, 0))
+    assert is_up_to_date(output_file, input_file)
+
+    os.utime(output_file, (0, 0))
+    assert not is_up_to_date(output_file, input_file)
+
+
+def test_subtitle_languages_ignores_forced_streams(tmp_path):
+    probe = {
+        "streams": [
+            {"index": 0, "codec_name": "subrip", "codec_type": "subtitle", "tags": {"language": "eng"}},
+            {
+                "index": 1,
+                "codec_name": "subrip",
+                "codec_type": "subtitle",
+                "tags": {"language": "spa"},
+                "disposition": {"default": 0, "forced": 1},
+            },
+        ]
+    }
+    with patch("vscripts.data.streams._ffprobe_streams", return_value=probe):
+        assert subtitle_languages(tmp_path / "video.mkv") == {"eng"}
+
+
+def test_existing_output_at_destination(tmp_path):
+    source = tmp_path / "video.mkv"
+    staging, destination = tmp_path / "staging", tmp_path / "destination"
+    staging.mkdir()
+    destination.mkdir()
+    source.touch()
+    os.utime(source, (0, 0))
+    # the staged input is always newer, e.g. the audio `do` extracted
+    staged_input = staging / "video_0.mka"
+    staged_input.touch()
+    output_path = staging / "video_0_en.srt"
+
+    assert existing_output(output_path, staged_input, destination, source) is None
+    (destination / output_path.name).touch()
+    assert existing_output(output_path, staged_input, destination, source) == destination / output_path.name
+    assert existing_output(output_path, staged_input) is None
@@ -1,7 +1,18 @@
+import asyncio
+import os
 from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
 
 import pytest
 from vscripts.commands import translate_subtitles
+from vscripts.commands._translate import (
+    _chunk_lines,
+    _translate_lines,
+    _translate_lines_google,
+)
+from vscripts.constants import INVISIBLE_SEPARATOR
+from vscripts.utils import read_srt
 
 from tests._utils import generate_test_full, generate_test_subs
 
@@ -45,3 +56,184 @@ def test_translate_subtitles_inferring_language(tmp_path):
     assert "00:00:00,000 --> 00" in translated_text
     assert "Hola Mundo" in translated_text, "Translated text must appear in output"
     assert "Hello world" not in translated_text
+
+
+@pytest.mark.integration
+def test_translate_subtitles_skip_existing(tmp_path):
+    subs_file = generate_test_subs(tmp_path / "input.srt")
+
+    with (
+        patch("vscripts.commands._translate.subtitle_languages", return_value={"spa"}),
+        patch("vscripts.commands._translate._translate_cues_helsinki") as translate,
+    ):
+        outputs = translate_subtitles(subs_file, "spa", from_language="eng", skip_existing=True)
+
+    assert outputs == [], "the input already has subtitles in the target language"
+    translate.assert_not_called()
+
+
+@pytest.mark.integration
+def test_translate_subtitles_skip_up_to_date_output(tmp_path):
+    subs_file = generate_test_subs(tmp_path / "input.srt")
+    output = generate_test_subs(tmp_path / "translated.srt")
+    os.utime(subs_file, (0, 0))
+
+    with patch("vscripts.commands._translate._translate_cues_helsinki") as translate:
+        outputs = translate_subtitles(subs_file, "spa", from_language="eng", output=output, skip_existing=True)
+
+    assert outputs == [output]
+    translate.assert_not_called()
+
+
+@pytest.mark.integration
+def test_translate_subtitles_multiple_targets(tmp_path):
+    subs_file = generate_test_subs(tmp_path / "input.srt")
+
+    with (
+        patch("vscripts.commands._translate.read_srt", wraps=read_srt) as parse,
+        patch(
+            "vscripts.commands._translate._translate_cues_helsinki",
+            side_effect=lambda cues, from_language, language, **_: language,
+        ) as translate,
+    ):
+        outputs = translate_subtitles(subs_file, ["spa", "glg"], output=tmp_path)
+
+    assert [o.name for o in outputs] == ["input_track0_spa.srt", "input_track0_glg.srt"]
+    assert [o.read_text() for o in outputs] == ["es", "gl"]
+    assert parse.call_count == 1, "the source subtitles must be parsed once for every target"
+    assert translate.call_args_list[0].args[0] is translate.call_args_list[1].args[0]
+
+    with pytest.raises(ValueError):
+        translate_subtitles(subs_file, ["spa", "glg"], output=tmp_path / "translated.srt")
+
+
+class _FakeTokenizer:
+    def __call__(self, texts, return_tensors=None, padding=False, truncation=False):
+        if return_tensors is None:
+            return {"input_ids": [text.split() for text in texts]}
+        return {"input_ids": list(texts)}
+
+    def batch_decode(self, outputs, skip_special_tokens=False):
+        return [output.upper() for output in outputs]
+
+
+def test_translate_lines_batches_by_length():
+    model = MagicMock()
+    model.generate.side_effect = lambda input_ids: input_ids
+    lines = ["a b c d", "a", "a b c", "a b"]
+
+    translated = _translate_lines(_FakeTokenizer(), model, lines, batch_size=2)
+
+    assert translated == ["A B C D", "A", "A B C", "A B"], "translations must keep the input order"
+    batches = [c.kwargs["input_ids"] for c in model.generate.call_args_list]
+    assert batches == [["a", "a b"], ["a b c", "a b c d"]], "batches must be sorted by token length"
+
+
+_SRT_PROBE = {"streams": [{"index": 0, "codec_name": "subrip", "codec_type": "subtitle"}]}
+
+
+def test_translate_subtitles_helsinki_keeps_structure(tmp_path):
+    path = tmp_path / "input.srt"
+    path.write_text("""1
+00:00:01,000 --> 00:00:02,000
+Hello
+
+2
+00:00:02,000 --> 00:00:03,000
+Hello world
+At 02,000 sharp
+
+3
+00:00:03,000 --> 00:00:04,000
+Hello
+""")
+    translations = {"Hello": "Hola", "Hello world": "Hola mundo", "At 02,000 sharp": "A las 02,000 en punto"}
+    tokenizer = _FakeTokenizer()
+    tokenizer.batch_decode = lambda outputs, **_: [translations[o] for o in outputs]  # type: ignore
+    model = MagicMock()
+    model.generate.side_effect = lambda input_ids: input_ids
+
+    with (
+        patch("vscripts.data.streams._ffprobe_streams", return_value=_SRT_PROBE),
+        patch("vscripts.commands._translate.load_translation_model", return_value=(tokenizer, model)),
+    ):
+        output = translate_subtitles(path, "spa", from_language="eng", output=tmp_path / "out.srt")[0]
+
+    assert output.read_text(encoding="utf-8") == (
+        "1\n00:00:01,000 --> 00:00:02,000\nHola\n\n"
+        "2\n00:00:02,000 --> 00:00:03,000\nHola mundo\nA las 02,000 en punto\n\n"
+        "3\n00:00:03,000 --> 00:00:04,000\nHola\n"
+    )
+
+
+class _StubTranslator:
+    """Local stand-in for the googletrans client, upper-cases the text and fails the first `failures` requests."""
+
+    def __init__(self, failures: int = 0, delay: float = 0.0):
+        self.failures = failures
+        self.delay = delay
+        self.requests: list[str] = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def translate(self, text, src, dest):
+        self.requests.append(text)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+            if self.failures > 0:
+                self.failures -= 1
+                raise ConnectionError("stub failure")
+            return SimpleNamespace(text=text.upper())
+        finally:
+            self.in_flight -= 1
+
+
+def test_chunk_lines():
+    lines = ["aaaa", "bbbb", "cccc", "d" * 20]
+    chunks = _chunk_lines(lines, max_chars=2 * (4 + len(INVISIBLE_SEPARATOR)))
+
+    assert chunks == [["aaaa", "bbbb"], ["cccc"], ["d" * 20]]
+
+
+def test_translate_lines_google_chunks_concurrently():
+    translator = _StubTranslator(delay=0.01)
+    lines = [f"line {i}" for i in range(20)]
+
+    translated = asyncio.run(_translate_lines_google(translator, lines, "en", "es", max_chars=20, concurrency=3))
+
+    assert translated == [f"LINE {i}" for i in range(20)], "chunks must be reassembled in order"
+    assert len(translator.requests) == len(_chunk_lines(lines, max_chars=20)) > 3
+    assert translator.max_in_flight == 3
+
+
+def test_translate_lines_google_retries_failed_chunks():
+    translator = _StubTranslator(failures=2)
+    lines = ["a", "b", "c"]
+
+    translated = asyncio.run(_translate_lines_google(translator, lines, "en", "es", max_chars=2, backoff=0))
+
+    assert translated == ["A", "B", "C"]
+    assert len(translator.requests) == 5, "only the failed chunks must be sent again"
+
+    with pytest.raises(ConnectionError):
+        asyncio.run(_translate_lines_google(_StubTranslator(failures=2), lines, "en", "es", retries=1, backoff=0))
+
+
+def test_translate_subtitles_googletrans_keeps_structure(tmp_path):
+    path = tmp_path / "input.srt"
+    path.write_text("1\n00:00:01,000 --> 00:00:02,000\nHello\n\n2\n00:00:02,000 --> 00:00:03,000\nHello\nworld\n")
+
+    with (
+        patch("vscripts.data.streams._ffprobe_streams", return_value=_SRT_PROBE),
+        patch("vscripts.commands._translate.Translator", return_value=_StubTranslator()),
+    ):
+        output = translate_subtitles(
+            path, "spa", from_language="eng", translation_mode="google", output=tmp_path / "out.srt"
+        )[0]
+
+    assert (
+        output.read_text(encoding="utf-8")
+        == "1\n00:00:01,000 --> 00:00:02,000\nHELLO\n\n2\n00:00:02,000 --> 00:00:03,000\nHELLO\nWORLD\n"
+    )
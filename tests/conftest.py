@@ -15,6 +15,12 @@ def before_each():
 _test_whisper_model = whisper.load_model("tiny")
 
 
+@pytest.fixture(autouse=True)
+def isolated_cache_dir(tmp_path_factory, monkeypatch):
+    """Keep persistent caches out of the user cache directory."""
+    monkeypatch.setenv("VSCRIPTS_CACHE_DIR", str(tmp_path_factory.mktemp("cache")))
+
+
 @pytest.fixture(autouse=True)
 def mock_load_whisper():
     """Automatically mock load_whisper in all tests."""
@@ -0,0 +1,55 @@
+from pathlib import Path
+
+import pytest
+from vscripts.data import AudioStream, SubtitleStream, guess_language, normalize_language_code
+
+
+@pytest.mark.parametrize(
+    ("code", "expected"),
+    [
+        ("en", "eng"),
+        ("ES", "spa"),
+        ("spa", "spa"),
+        ("fre", "fra"),
+        ("ger", "deu"),
+        ("es-419", "spa"),
+        ("und", "unk"),
+        ("", "unk"),
+        (None, "unk"),
+    ],
+)
+def test_normalize_language_code(code, expected):
+    assert normalize_language_code(code) == expected
+
+
+@pytest.mark.parametrize(
+    ("tags", "file_name", "expected"),
+    [
+        ({"language": "es"}, None, "spa"),
+        ({"title": "Castellano"}, None, "spa"),
+        ({"title": "Latino"}, None, "spa"),
+        ({"title": "English 5.1"}, None, "eng"),
+        ({"TITLE": "Galego (Forzados)"}, None, "glg"),
+        ({"handler_name": "Spanish"}, None, "spa"),
+        ({"language": "eng", "title": "Castellano"}, None, "eng"),
+        ({"title": "English / Spanish"}, None, "unk"),
+        ({"title": "Commentary"}, None, "unk"),
+        ({}, "movie.spa.srt", "spa"),
+        ({}, "movie.es.srt", "spa"),
+        ({}, "Movie [ENG].mka", "eng"),
+        ({}, "Movie [ENG].mkv", "unk"),
+        ({}, "Tested.2020.srt", "unk"),
+    ],
+)
+def test_guess_language(tags, file_name, expected):
+    assert guess_language(tags, Path(file_name) if file_name else None) == expected
+
+
+def test_streams_normalize_language_tag():
+    audio = AudioStream.from_dict({"index": 1, "codec_name": "aac", "codec_type": "audio", "tags": {"language": "en"}})
+    subs = SubtitleStream.from_dict(
+        {"index": 2, "codec_name": "ass", "codec_type": "subtitle", "tags": {"language": "und"}}
+    )
+
+    assert audio.language == "eng"
+    assert subs.language == "unk"
@@ -0,0 +1,93 @@
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+import pytest
+from vscripts.data import AudioStream, SubtitleStream, find_audio_languages, find_subs_language
+from vscripts.utils import SAMPLE_RATE, load_audio_track, load_audio_tracks
+
+from tests._utils import generate_test_audio
+
+
+@pytest.mark.integration
+def test_load_audio_tracks(tmp_path):
+    audio_file = generate_test_audio(tmp_path / "input.mka", duration=2, streams=2)
+    other_file = generate_test_audio(tmp_path / "other.mka", duration=1)
+
+    audios = load_audio_tracks([(audio_file, 0), (audio_file, 1), (other_file, 0)])
+
+    assert len(audios) == 3
+    assert abs(len(audios[0]) - 2 * SAMPLE_RATE) < SAMPLE_RATE // 10
+    assert abs(len(audios[1]) - 2 * SAMPLE_RATE) < SAMPLE_RATE // 10
+    assert abs(len(audios[2]) - SAMPLE_RATE) < SAMPLE_RATE // 10
+    assert all(a.max() <= 1.0 and a.min() >= -1.0 for a in audios)
+
+
+@pytest.mark.integration
+def test_load_audio_track(tmp_path):
+    audio_file = generate_test_audio(tmp_path / "input.mka", duration=2, streams=2)
+
+    audio = load_audio_track(audio_file, track=1)
+
+    assert audio.dtype == np.float32
+    assert abs(len(audio) - 2 * SAMPLE_RATE) < SAMPLE_RATE // 10
+    assert audio.max() <= 1.0 and audio.min() >= -1.0
+
+
+@pytest.mark.integration
+def test_find_audio_languages(tmp_path):
+    audio_file = generate_test_audio(tmp_path / "input.mka", duration=2, streams=3)
+    streams = AudioStream.from_file(audio_file)
+    streams[1].language = "spa"
+
+    languages = find_audio_languages(streams)
+
+    assert len(languages) == 3
+    assert languages[1] == "spa", "existing metadata should be kept"
+    assert all(len(lang) == 3 for lang in languages)
+
+
+def _fake_whisper(probs: list[dict[str, float]]) -> MagicMock:
+    model = MagicMock()
+    model.dims.n_mels = 80
+    model.device = "cpu"
+    model.detect_language.return_value = (None, probs)
+    return model
+
+
+def test_find_audio_languages_escalates_low_confidence():
+    streams = [AudioStream(_index=i, codec_name="aac", codec_type="audio", ffmpeg_index=i) for i in range(2)]
+    for stream in streams:
+        stream.file_path = Path("input.mka")
+
+    tiny = _fake_whisper([{"en": 0.95, "es": 0.05}, {"es": 0.55, "gl": 0.45}])
+    small = _fake_whisper([{"gl": 0.9, "es": 0.1}])
+    models = {"tiny": tiny, "small": small}
+
+    with (
+        patch("vscripts.data.language.audio_fingerprints", return_value=["aac:1:a", "aac:1:b"]),
+        patch("vscripts.data.language.load_audio_tracks", return_value=[np.zeros(16_000, dtype=np.float32)] * 2),
+        patch("vscripts.utils._asr.load_whisper", side_effect=lambda name, quantized: models[name]),
+    ):
+        languages = find_audio_languages(streams, models=("tiny", "small"), threshold=0.8)
+
+    assert languages == ["eng", "glg"]
+    assert tiny.detect_language.call_args[0][0].shape[0] == 2, "both streams should run in the first tier"
+    assert small.detect_language.call_args[0][0].shape[0] == 1, "only the low confidence stream should escalate"
+
+
+def test_find_subs_language_unsupported_format(tmp_path):
+    bitmap = tmp_path / "x_2.hdmv_pgs_subtitle"
+    bitmap.write_bytes(b"PG")
+    stream = SubtitleStream(_index=2, codec_name="hdmv_pgs_subtitle", codec_type="subtitle", ffmpeg_index=0)
+    stream.file_path = bitmap
+    vobsub = tmp_path / "x_3.sub"
+    vobsub.write_bytes(b"")
+
+    with patch("vscripts.data.language.detect") as detect:
+        assert find_subs_language(stream) == "unk"
+        assert find_subs_language(vobsub) == "unk"
+        stream.language = "spa"
+        assert find_subs_language(stream) == "spa", "language tags still apply to bitmap subtitles"
+
+    detect.assert_not_called()
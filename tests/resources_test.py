@@ -0,0 +1,56 @@
+import pytest
+import torch
+from vscripts.utils import configure_threads, get_thread_budget
+from vscripts.utils._utils import ffmpeg_command
+
+
+@pytest.fixture(autouse=True)
+def restore_torch_threads():
+    threads = torch.get_num_threads()
+    yield
+    torch.set_num_threads(threads)
+
+
+def test_configure_threads():
+    budget = configure_threads(4)
+
+    assert budget.cores == 4
+    assert budget.torch_threads == torch.get_num_threads() == 4
+    assert budget.ffmpeg_threads == 4
+    assert budget.ffmpeg_filter_threads == 2
+    assert get_thread_budget() == budget
+
+
+def test_configure_threads_from_env(monkeypatch):
+    monkeypatch.setenv("VSCRIPTS_CORES", "2")
+    assert configure_threads().cores == 2
+    assert configure_threads(3).cores == 3, "an explicit budget wins over the environment"
+
+
+def test_configure_threads_invalid(monkeypatch):
+    with pytest.raises(ValueError):
+        configure_threads(0)
+
+    monkeypatch.setenv("VSCRIPTS_CORES", "four")
+    with pytest.raises(ValueError, match="VSCRIPTS_CORES"):
+        configure_threads()
+
+
+def test_ffmpeg_command_threads():
+    configure_threads(4)
+    command = ffmpeg_command(["-i", "a.mkv", "-i", "b.mka", "-map", "0:v", "-map", "1:a", "out.mkv"])
+
+    assert command[-3:] == ["-threads", "4", "out.mkv"]
+    assert command.count("-threads") == 3
+    assert command[command.index("-i") - 2 : command.index("-i")] == ["-threads", "4"]
+    assert command[command.index("-filter_threads") + 1] == "2"
+
+
+def test_ffmpeg_command_threads_multiple_outputs():
+    configure_threads(4)
+    outputs = ["track_0.pcm", "track_1.pcm"]
+    command = ffmpeg_command(["-i", "a.mkv", "-map", "0:a:0", outputs[0], "-map", "0:a:1", outputs[1]], outputs)
+
+    assert command.count("-threads") == 3
+    for output in outputs:
+        assert command[command.index(output) - 2 : command.index(output)] == ["-threads", "4"]
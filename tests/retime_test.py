@@ -0,0 +1,28 @@
+import numpy as np
+import pytest
+from vscripts.utils import Cue, retime_cues, retime_timestamps
+
+
+def test_retime_timestamps():
+    starts, ends = np.array([0, 1000, 2500]), np.array([800, 2000, 3000])
+
+    new_starts, new_ends = retime_timestamps(starts, ends, offset=500)
+    assert new_starts.tolist() == [500, 1500, 3000] and new_ends.tolist() == [1300, 2500, 3500]
+
+    new_starts, new_ends = retime_timestamps(starts, ends, offset=-1200, scale=0.5)
+    assert new_starts.tolist() == [0, 0, 50] and new_ends.tolist() == [0, 0, 300], "scale applies before the offset"
+
+    with pytest.raises(ValueError):
+        retime_timestamps(starts, ends, scale=0)
+
+
+def test_retime_cues_drops_and_renumbers():
+    cues = [Cue(1, 0, 800, ("a",)), Cue(2, 1000, 2000, ("b",)), Cue(3, 2500, 3000, ("c", "d"))]
+
+    assert retime_cues(cues, offset=-900) == [Cue(1, 100, 1100, ("b",)), Cue(2, 1600, 2100, ("c", "d"))]
+    assert retime_cues(cues, scale=1 / 1.25) == [
+        Cue(1, 0, 640, ("a",)),
+        Cue(2, 800, 1600, ("b",)),
+        Cue(3, 2000, 2400, ("c", "d")),
+    ]
+    assert retime_cues([], offset=100) == []
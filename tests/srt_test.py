@@ -0,0 +1,95 @@
+import logging
+
+import pytest
+from vscripts.utils import (
+    Cue,
+    SrtWriter,
+    count_srt_entries,
+    flatten_cues,
+    flatten_srt_text,
+    format_srt,
+    iter_srt,
+    parse_srt,
+    read_srt,
+    rebuild_srt,
+)
+
+
+def test_srt_writer(tmp_path):
+    output = tmp_path / "out.srt"
+    with SrtWriter(output, flush_every=1) as writer:
+        writer.write(0.0, 1.5, " Hello world ")
+        writer.write(1.5, 3.25, "This is a test")
+
+    assert output.read_text(encoding="utf-8") == (
+        "1\n00:00:00,000 --> 00:00:01,500\nHello world\n\n2\n00:00:01,500 --> 00:00:03,250\nThis is a test\n\n"
+    )
+
+
+def test_srt_writer_flushes_partial_results(tmp_path, caplog):
+    output = tmp_path / "out.srt"
+    with caplog.at_level(logging.INFO, logger="vscripts"), pytest.raises(RuntimeError):
+        with SrtWriter(output, flush_every=2, duration=10.0) as writer:
+            writer.write(0.0, 2.0, "one")
+            writer.write(2.0, 5.0, "two")
+            assert output.read_text(encoding="utf-8").count("-->") == 2
+            raise RuntimeError("interrupted")
+
+    assert "(50.0%)" in caplog.text
+    assert output.read_text(encoding="utf-8").count("-->") == 2
+
+
+def test_parse_srt():
+    content = (
+        "\ufeff1\r\n00:00:01,000 --> 00:00:02,500\r\nHello\r\n  world  \r\n\r\n"
+        "2\n0:00:03.5 --> 00:00:04,000\n1984\n"
+        "3\n00:00:05,000 --> 00:00:06,000\nNo blank line before the next cue\n"
+        "4\n00:00:07,000 --> 00:00:08,000\n"
+    )
+
+    assert parse_srt(content) == [
+        Cue(1, 1000, 2500, ("Hello", "  world  ")),
+        Cue(2, 3500, 4000, ("1984",)),
+        Cue(3, 5000, 6000, ("No blank line before the next cue",)),
+        Cue(4, 7000, 8000, ()),
+    ]
+    assert count_srt_entries(content) == 4
+    assert flatten_srt_text(content) == "Hello\nworld\n1984\nNo blank line before the next cue"
+
+
+def test_format_srt_roundtrip():
+    content = "1\n00:00:01,000 --> 00:00:02,000\nHello\n\n2\n01:02:03,004 --> 01:02:04,000\n- Hi!\n- Hello\n"
+
+    assert format_srt(parse_srt(content)) == content
+    assert parse_srt(format_srt(parse_srt(content))) == parse_srt(content)
+
+
+def test_rebuild_srt():
+    cues = parse_srt("1\n00:00:01,000 --> 00:00:02,000\nHello\n\n2\n00:00:02,000 --> 00:00:03,000\nHi\nthere\n")
+
+    assert rebuild_srt(cues, ["Hola", "Hola", "ahí"]) == (
+        "1\n00:00:01,000 --> 00:00:02,000\nHola\n\n2\n00:00:02,000 --> 00:00:03,000\nHola\nahí\n"
+    )
+    with pytest.raises(ValueError):
+        rebuild_srt(cues, ["Hola"])
+
+
+def test_read_srt_streams_cues(tmp_path):
+    content = "".join(f"{i}\r\n00:00:0{i},000 --> 00:00:0{i},500\r\nLine {i}\r\n\r\n" for i in range(1, 10))
+    path = tmp_path / "input.srt"
+    path.write_bytes(("\ufeff" + content).encode("utf-8"))
+
+    assert list(read_srt(path)) == parse_srt(content)
+    assert next(read_srt(path)) == Cue(1, 1000, 1500, ("Line 1",))
+
+
+def test_flatten_cues_stops_reading():
+    read = []
+
+    def lines():
+        for i in range(1, 1000):
+            read.append(i)
+            yield from [str(i), "00:00:01,000 --> 00:00:02,000", f"Line {i}", ""]
+
+    assert flatten_cues(iter_srt(lines()), max_chars=20) == "Line 1\nLine 2\nLine 3"
+    assert len(read) <= 4, "only the cues needed to reach max_chars must be read"
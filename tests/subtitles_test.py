@@ -0,0 +1,134 @@
+import numpy as np
+import pytest
+from vscripts.utils import (
+    Cue,
+    flatten_cues,
+    iter_ass,
+    iter_vtt,
+    read_subtitle_timings,
+    read_subtitles,
+    subtitle_coverage,
+)
+
+_ASS = """\ufeff[Script Info]
+Title: test
+ScriptType: v4.00+
+
+[V4+ Styles]
+Format: Name, Fontname, Fontsize
+Style: Default,Arial,20
+
+[Events]
+Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
+Comment: 0,0:00:00.00,0:00:01.00,Default,,0,0,0,,not shown
+Dialogue: 0,0:00:01.50,0:00:03.00,Default,,0,0,0,,{\\an8\\i1}Hola,{\\i0} mundo\\Nsegunda línea
+Dialogue: 0,0:00:04.00,0:00:05.25,Default,,0,0,0,,{\\p1}m 0 0 l 100 0 100 100{\\p0}
+Dialogue: 0,1:02:03.04,1:02:04.00,Default,Ana,0,0,0,,Texto\\hcon, comas
+"""
+
+_SSA = """[Script Info]
+ScriptType: v4.00
+
+[Events]
+Format: Marked, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
+Dialogue: Marked=0,0:00:01.00,0:00:02.00,Default,,0000,0000,0000,,{\\c&H00FFFF&}Hello
+"""
+
+_VTT = """WEBVTT - some title
+Kind: captions
+
+NOTE this is a comment
+that spans two lines
+
+STYLE
+::cue { color: yellow }
+
+intro
+00:01.000 --> 00:02.500 align:start position:10%
+<v Ana>Hola</v> &amp; <i>adiós</i>
+<c.yellow>segunda</c> línea
+
+01:00:00.000 --> 01:00:01.000
+<00:00:00.500>karaoke
+"""
+
+
+def test_iter_ass():
+    cues = list(iter_ass(_ASS.splitlines()))
+
+    assert cues == [
+        Cue(1, 1500, 3000, ("Hola, mundo", "segunda línea")),
+        Cue(2, 3723040, 3724000, ("Texto con, comas",)),
+    ]
+
+
+def test_iter_ssa():
+    assert list(iter_ass(_SSA.splitlines(keepends=True))) == [Cue(1, 1000, 2000, ("Hello",))]
+
+
+def test_iter_vtt():
+    cues = list(iter_vtt(_VTT.splitlines(keepends=True)))
+
+    assert cues == [
+        Cue(1, 1000, 2500, ("Hola & adiós", "segunda línea")),
+        Cue(2, 3600000, 3601000, ("karaoke",)),
+    ]
+
+
+@pytest.mark.parametrize("suffix, content", [(".ass", _ASS), (".ssa", _SSA), (".vtt", _VTT)])
+def test_read_subtitles(tmp_path, suffix, content):
+    path = tmp_path / f"subs{suffix}"
+    path.write_text(content, encoding="utf-8")
+
+    parse = iter_vtt if suffix == ".vtt" else iter_ass
+    assert list(read_subtitles(path)) == list(parse(content.splitlines()))
+    assert "{" not in flatten_cues(read_subtitles(path)) and "<" not in flatten_cues(read_subtitles(path))
+
+
+def test_read_subtitles_srt(tmp_path):
+    path = tmp_path / "subs.srt"
+    path.write_text("1\n00:00:01,000 --> 00:00:02,000\nHello\n", encoding="utf-8")
+
+    assert list(read_subtitles(path)) == [Cue(1, 1000, 2000, ("Hello",))]
+
+
+def test_read_subtitles_unsupported(tmp_path):
+    path = tmp_path / "subs.sup"
+    path.write_bytes(b"")
+
+    with pytest.raises(ValueError):
+        list(read_subtitles(path))
+
+
+@pytest.mark.parametrize("suffix, content", [(".ass", _ASS), (".vtt", _VTT)])
+def test_read_subtitle_timings(tmp_path, suffix, content):
+    path = tmp_path / f"subs{suffix}"
+    path.write_text(content, encoding="utf-8")
+
+    starts, ends = read_subtitle_timings(path)
+    cues = list(read_subtitles(path))
+    assert starts.tolist() == [c.start for c in cues]
+    assert ends.tolist() == [c.end for c in cues]
+
+
+def test_read_subtitle_timings_srt(tmp_path):
+    path = tmp_path / "subs.srt"
+    path.write_text("1\n00:00:01,000 --> 00:00:02,000\nHello\n\n2\n00:00:03,000 --> 00:00:05,500\nWorld\n")
+
+    starts, ends = read_subtitle_timings(path)
+    assert starts.tolist() == [1000, 3000]
+    assert ends.tolist() == [2000, 5500]
+
+
+def test_subtitle_coverage():
+    timings = [
+        (np.array([0, 5000]), np.array([2000, 6000])),
+        (np.array([], dtype=np.int64), np.array([], dtype=np.int64)),
+        # clipped to the media
+        (np.array([-1000, 9000]), np.array([1000, 12000])),
+    ]
+
+    assert subtitle_coverage(timings, duration=10).tolist() == pytest.approx([0.3, 0.0, 0.2])
+    assert subtitle_coverage([], duration=10).tolist() == []
+    with pytest.raises(ValueError):
+        subtitle_coverage(timings, duration=0)
@@ -0,0 +1,37 @@
+from unittest.mock import MagicMock
+
+from vscripts.data.translation_memory import get_translations, normalize_text, set_translations, translate_with_memory
+
+
+def test_normalize_text():
+    assert normalize_text("  What?\t ") == "What?"
+    assert normalize_text("Yeah,   right") == "Yeah, right"
+
+
+def test_translation_memory_roundtrip():
+    set_translations("en", "es", "helsinki", {"Yeah.": "Sí.", "What?": "¿Qué?"})
+
+    assert get_translations("en", "es", "helsinki", ["Yeah.", "What?", "Hello"]) == {"Yeah.": "Sí.", "What?": "¿Qué?"}
+    assert get_translations("en", "es", "google", ["Yeah."]) == {}, "translations are kept per backend"
+    assert get_translations("en", "gl", "helsinki", ["Yeah."]) == {}, "translations are kept per language pair"
+
+
+def test_translate_with_memory_deduplicates_lines():
+    translate = MagicMock(side_effect=lambda lines: [line.upper() for line in lines])
+
+    lines = ["[MUSIC]", "What?", "[MUSIC]", " What? ", "Yeah."]
+    assert translate_with_memory(lines, "en", "es", "helsinki", translate) == [
+        "[MUSIC]",
+        "WHAT?",
+        "[MUSIC]",
+        "WHAT?",
+        "YEAH.",
+    ]
+    assert translate.call_args.args[0] == ["[MUSIC]", "What?", "Yeah."]
+
+    assert translate_with_memory(["Yeah.", "Hello"], "en", "es", "helsinki", translate) == ["YEAH.", "HELLO"]
+    assert translate.call_args.args[0] == ["Hello"], "lines in the translation memory are not translated again"
+
+    translate.reset_mock()
+    assert translate_with_memory(["What?"], "en", "es", "helsinki", translate) == ["WHAT?"]
+    translate.assert_not_called()
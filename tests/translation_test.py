@@ -0,0 +1,121 @@
+import json
+import sys
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+import pytest
+from vscripts.cli import _parse_language_pair
+from vscripts.utils import (
+    OnnxMarianModel,
+    _translation,
+    load_onnx_translation_model,
+    load_translation_model,
+    preload_translation_models,
+)
+
+
+@pytest.fixture(autouse=True)
+def empty_registry():
+    _translation._loaded_translation_models.clear()
+    yield
+    _translation._loaded_translation_models.clear()
+
+
+def test_translation_models_are_reused_and_evicted():
+    with (
+        patch("vscripts.utils._translation.AutoTokenizer.from_pretrained", side_effect=lambda n: f"tokenizer:{n}"),
+        patch("vscripts.utils._translation.AutoModelForSeq2SeqLM.from_pretrained", return_value=MagicMock()) as load,
+        patch("vscripts.utils._translation.MAX_LOADED_TRANSLATION_MODELS", 2),
+    ):
+        tokenizer, _ = load_translation_model("en", "es")
+        assert tokenizer == "tokenizer:Helsinki-NLP/opus-mt-en-es"
+
+        preload_translation_models([("en", "es"), ("en", "gl")])
+        assert load.call_count == 2, "already loaded pairs must be reused"
+
+        load_translation_model("en", "es")
+        load_translation_model("es", "en")
+        assert list(_translation._loaded_translation_models) == [("en", "es"), ("es", "en")]
+
+        load_translation_model("en", "gl")
+        assert load.call_count == 4, "the least recently used pair should have been evicted"
+
+
+def test_onnx_translation_models_share_the_registry(tmp_path):
+    for name in ["opus-mt-en-es-int8", "opus-mt-en-gl-int8"]:
+        (tmp_path / "onnx" / name).mkdir(parents=True)
+        (tmp_path / "onnx" / name / "metadata.json").write_text(
+            json.dumps({"decoder_start_token_id": 0, "eos_token_id": 1, "pad_token_id": 0, "num_beams": 1})
+        )
+
+    with (
+        patch.dict(sys.modules, {"onnxruntime": MagicMock()}),
+        patch("vscripts.utils._onnx_translation.get_cache_dir", return_value=tmp_path),
+        patch("vscripts.utils._onnx_translation.AutoTokenizer.from_pretrained", side_effect=lambda n: n),
+        patch("vscripts.utils._translation.AutoTokenizer.from_pretrained", side_effect=lambda n: n),
+        patch("vscripts.utils._translation.AutoModelForSeq2SeqLM.from_pretrained", return_value=MagicMock()),
+        patch("vscripts.utils._translation.MAX_LOADED_TRANSLATION_MODELS", 2),
+    ):
+        tokenizer, model = load_onnx_translation_model("en", "es")
+        assert load_onnx_translation_model("en", "es") == (tokenizer, model), "loaded models must be reused"
+
+        load_translation_model("en", "es")
+        load_onnx_translation_model("en", "gl")
+        assert list(_translation._loaded_translation_models) == [("en", "es"), ("en", "gl", "onnx-int8")]
+        assert load_onnx_translation_model("en", "es")[1] is not model, "the least recently used model is evicted"
+
+
+def test_parse_language_pair():
+    assert _parse_language_pair("en-es") == ("en", "es")
+    assert _parse_language_pair("ENG-spa") == ("en", "es")
+    with pytest.raises(ValueError):
+        _parse_language_pair("en")
+
+
+class _FakeSession:
+    def __init__(self, run):
+        self._run = run
+
+    def run(self, _, feeds):
+        return [self._run(**feeds)]
+
+
+def _fake_onnx_model(tmp_path, probabilities):
+    """Model over a 6 tokens vocabulary (0 start/pad, 1 eos) whose next token only depends on the prefix."""
+    (tmp_path / "metadata.json").write_text(
+        json.dumps({"decoder_start_token_id": 0, "eos_token_id": 1, "pad_token_id": 0, "num_beams": 2})
+    )
+
+    def decode(decoder_input_ids, encoder_hidden_states, attention_mask):
+        logits = np.full((len(decoder_input_ids), 6), np.log(1e-9), dtype=np.float32)
+        for i, prefix in enumerate(decoder_input_ids.tolist()):
+            for token, p in probabilities.get(tuple(prefix[1:]), {1: 1.0}).items():
+                logits[i, token] = np.log(p)
+        return logits
+
+    encoder = _FakeSession(lambda input_ids, attention_mask: np.zeros((*input_ids.shape, 1), dtype=np.float32))
+    return OnnxMarianModel(tmp_path, encoder, _FakeSession(decode))
+
+
+def test_onnx_marian_model_greedy_and_beam_search(tmp_path):
+    probabilities = {
+        (): {2: 0.5, 3: 0.4, 1: 0.1},
+        (2,): {1: 0.4, 4: 0.3, 5: 0.3},
+        (3,): {1: 0.95, 4: 0.05},
+    }
+    model = _fake_onnx_model(tmp_path, probabilities)
+    inputs = {"input_ids": np.ones((2, 3), dtype=np.int64), "attention_mask": np.ones((2, 3), dtype=np.int64)}
+
+    greedy = model.generate(**inputs, num_beams=1)
+    assert greedy.tolist() == [[0, 2, 1], [0, 2, 1]]
+
+    beam = model.generate(**inputs)
+    assert beam.tolist() == [[0, 3, 1], [0, 3, 1]], "beam search must find the most likely full translation"
+
+
+def test_onnx_marian_model_pads_outputs(tmp_path):
+    model = _fake_onnx_model(tmp_path, {(): {2: 1.0}, (2,): {3: 1.0}})
+    inputs = {"input_ids": np.ones((1, 3), dtype=np.int64), "attention_mask": np.ones((1, 3), dtype=np.int64)}
+
+    assert model.generate(**inputs, num_beams=1).tolist() == [[0, 2, 3, 1]]
+    assert model.generate(**inputs, num_beams=1, max_new_tokens=1).tolist() == [[0, 2]], "length must be bounded"
@@ -0,0 +1,46 @@
+import numpy as np
+from vscripts.utils import SAMPLE_RATE, densest_speech_window, speech_segments
+
+
+def _silence(seconds: float) -> np.ndarray:
+    return np.random.default_rng(0).normal(0, 1e-4, int(seconds * SAMPLE_RATE)).astype(np.float32)
+
+
+def _voice(seconds: float, f0: float = 140.0) -> np.ndarray:
+    # harmonic signal with a syllable-rate envelope, a rough stand-in for voiced speech
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    signal = sum(np.sin(2 * np.pi * f0 * k * t) / k for k in range(1, 10))
+    return (0.3 * signal * (0.6 + 0.4 * np.sin(2 * np.pi * 3 * t))).astype(np.float32)
+
+
+def test_speech_segments():
+    audio = np.concatenate([_silence(5), _voice(3), _silence(5), _voice(2)])
+
+    segments = speech_segments(audio)
+
+    assert len(segments) == 2
+    assert 4.7 < segments[0][0] < 5.0
+    assert 8.0 < segments[0][1] < 8.3
+    assert 12.7 < segments[1][0] < 13.0
+    assert segments[1][1] <= len(audio) / SAMPLE_RATE
+
+
+def test_speech_segments_bridges_short_gaps():
+    audio = np.concatenate([_voice(2), _silence(0.5), _voice(2)])
+    assert len(speech_segments(audio)) == 1
+
+
+def test_speech_segments_ignores_silence_and_noise():
+    assert speech_segments(_silence(10)) == []
+
+    noise = np.random.default_rng(1).normal(0, 0.3, 5 * SAMPLE_RATE).astype(np.float32)
+    assert speech_segments(np.concatenate([_silence(2), noise])) == []
+
+
+def test_densest_speech_window():
+    audio = np.concatenate([_silence(5), _voice(3), _silence(40), _voice(20)])
+
+    start = densest_speech_window(audio, window_seconds=10)
+
+    assert 47 < start / SAMPLE_RATE < 49
+    assert densest_speech_window(_voice(5), window_seconds=10) == 0
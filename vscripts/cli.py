@@ -14,17 +14,30 @@ from vscripts.constants import (
     COMMAND_DELAY,
     COMMAND_EXTRACT,
     COMMAND_HASTEN,
+    COMMAND_TRANSLATE,
+    ISO639_3_TO_1,
     NTSC_RATE,
 )
 from vscripts.data.matcher import NameMatcher
+from vscripts.utils import preload_translation_models
 
 logger = logging.getLogger("vscripts")
 
 
-def cmd_do(input_path: Path, actions: list[str], output: Path | None, **kwargs) -> int:
+def cmd_do(
+    input_path: Path,
+    actions: list[str],
+    output: Path | None,
+    preload_translations: list[str] | None = None,
+    **kwargs,
+) -> int:
     parsed_actions = _parse_actions(actions)
     logger.info(f"Actions: {parsed_actions}")
 
+    if preload_translations:
+        # models are loaded once up front and then shared by every track and file of the run
+        preload_translation_models([_parse_language_pair(p) for p in preload_translations])
+
     if output is not None and input_path.is_dir() and not output.is_dir():
         raise ValueError(f"When input path is a directory, output path must also be a directory. Got {output=}")
 
@@ -35,23 +48,37 @@ def cmd_do(input_path: Path, actions: list[str], output: Path | None, **kwargs)
             if extract_args:
                 track = extract_args.pop()
 
-        last_path = path
+        last_paths = [path]
         with create_temp_dir() as temp_dir:
             logger.info(f"using temporary directory {temp_dir}")
-            for command, args in parsed_actions.items():
+            for i, (command, args) in enumerate(parsed_actions.items()):
+                last_path = last_paths[0]
                 logger.info(f"running command '{command}' in file {last_path} with args '{args}'")
 
                 fn = COMMANDS[command]
+                # commands write to the temporary directory, only the outputs of the last one reach the destination
+                destination = (output or path.parent) if i == len(parsed_actions) - 1 else None
+                staging = {"output": Path(temp_dir), "destination": destination, "source": path}
                 if command == COMMAND_APPEND and args is None:
-                    last_path = fn(root=path, attachment=last_path, output=Path(temp_dir), **kwargs)[0]
+                    # every output of the previous step is appended, e.g. one subtitle per target of translate=spa,glg
+                    outputs = fn(root=path, attachment=last_paths, **staging, **kwargs)
                 elif args is not None:
-                    last_path = fn(last_path, *args, track=track, output=Path(temp_dir), **kwargs)[0]
+                    outputs = fn(last_path, *args, track=track, **staging, **kwargs)
                 else:
-                    last_path = fn(last_path, track=track, output=Path(temp_dir), **kwargs)[0]
-
-            if output is None:
-                output = path.parent / last_path.name
-            shutil.move(last_path, output)
+                    outputs = fn(last_path, track=track, **staging, **kwargs)
+
+                # commands skip work that is already done (see --skip-existing), the next one chains on the last outputs
+                if not outputs:
+                    logger.info(f"command '{command}' produced no output for {path.name}, keeping {last_paths}")
+                    continue
+                last_paths = outputs
+
+            # only what was produced in the temporary directory is moved, never the input or an up to date output
+            produced = [p for p in last_paths if Path(temp_dir) in p.parents]
+            if len(produced) > 1 and output is not None and not output.is_dir():
+                raise ValueError(f"{len(produced)} files were produced, output path must be a directory. Got {output=}")
+            for produced_path in produced:
+                shutil.move(produced_path, output if output is not None else path.parent / produced_path.name)
         return 0
 
     if input_path.is_dir():  # pragma: no cover
@@ -76,6 +103,8 @@ def _parse_actions(actions: list[str]) -> OrderedDict[str, list[Any] | None]:
                 parsed_actions[a] = [float(v)]
             elif a in [COMMAND_EXTRACT]:
                 parsed_actions[a] = [int(v)]
+            elif a in [COMMAND_TRANSLATE]:
+                parsed_actions[a] = [v.split(",")]
             else:
                 parsed_actions[a] = [v]
         else:
@@ -99,7 +128,7 @@ def cmd_merge(target_path: Path, data_path: Path, output: Path | None, **kwargs)
         if not data_file.is_file():
             raise ValueError(f"No matching data file found for target {target} in {data_path}")
 
-        merge(target, data_file, output=output if output else target.parent / target_matcher.clean())
+        merge(target, data_file, output=output if output else target.parent / target_matcher.clean(), **kwargs)
         return 0
 
     if target_path.is_dir():  # pragma: no cover
@@ -109,3 +138,10 @@ def cmd_merge(target_path: Path, data_path: Path, output: Path | None, **kwargs)
                 res += inner_merge(file, output=output)
         return res
     return inner_merge(target_path, output)
+
+
+def _parse_language_pair(pair: str) -> tuple[str, str]:
+    if pair.count("-") != 1:
+        raise ValueError(f"invalid language pair '{pair}', expected 'FROM-TO'")
+    from_language, to_language = pair.lower().split("-")
+    return ISO639_3_TO_1.get(from_language, from_language), ISO639_3_TO_1.get(to_language, to_language)
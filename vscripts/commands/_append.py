@@ -11,20 +11,21 @@ logger = logging.getLogger("vscripts")
 
 def append(
     root: Path,
-    attachment: Path,
+    attachment: Path | list[Path],
     *,
     output: Path | None = None,
     **_,
 ) -> list[Path]:
-    """Append audio and subtitle streams from one media file into another.
+    """Append audio and subtitle streams from one or more media files into another.
 
-    This function merges the audio and subtitle streams of `attachment` into `root`, producing a new MKV file.
+    This function merges the audio and subtitle streams of `attachment` into `root`, producing a new MKV file. When
+    several attachments are given they are all appended in a single pass, in order.
     Video streams from `root` are preserved without re-encoding. The output file must have an MKV extension, and
     streams are mapped appropriately with codec selection based on the output file format.
 
     Args:
         root: Path to the base media file to which streams will be appended.
-        attachment: Path to the media file containing audio or subtitle streams to append.
+        attachment: Path, or list of paths, to the media files containing audio or subtitle streams to append.
         output: Optional output file path or directory. If not provided, a default file is created in the `root`
             directory with suffix `_appended.mkv`.
         **_: Ignored keyword arguments (accepted for API compatibility).
@@ -33,22 +34,24 @@ def append(
         A list containing a single Path to the output MKV file with the appended streams.
 
     Raises:
-        ValueError: If `root` or `attachment` does not exist or is not a file.
-        ValueError: If `attachment` contains no audio or subtitle streams.
+        ValueError: If `root` or any `attachment` does not exist or is not a file.
+        ValueError: If any `attachment` contains no audio or subtitle streams.
         ValueError: If the output path does not have an MKV file extension.
     """
+    attachments = attachment if isinstance(attachment, list) else [attachment]
     if not root.is_file():
         raise ValueError(f"invalid {root=}")
-    if not attachment.is_file():
-        raise ValueError(f"invalid {attachment=}")
+    for path in attachments:
+        if not path.is_file():
+            raise ValueError(f"invalid attachment={path}")
 
     audio_streams = AudioStream.from_file(root)
     subtitle_streams = SubtitleStream.from_file(root)
 
-    new_audios = AudioStream.from_file(attachment)
-    new_subs = SubtitleStream.from_file(attachment)
-    if len(new_audios) == 0 and len(new_subs) == 0:
-        raise ValueError(f"{attachment} contains no audio or subtitle streams to append")
+    new_streams = [(AudioStream.from_file(path), SubtitleStream.from_file(path)) for path in attachments]
+    for path, (new_audios, new_subs) in zip(attachments, new_streams):
+        if len(new_audios) == 0 and len(new_subs) == 0:
+            raise ValueError(f"{path} contains no audio or subtitle streams to append")
 
     output = get_output_file_path(
         output or root.parent,
@@ -57,7 +60,9 @@ def append(
     if "mkv" not in output.suffix.lower():
         raise ValueError("output file must be an MKV file")
 
-    command = ["-i", str(root), "-i", str(attachment)]
+    command = ["-i", str(root)]
+    for path in attachments:
+        command += ["-i", str(path)]
     command += ["-map", "0:v?", "-c:v", "copy"]
     if len(audio_streams) > 0:
         command += ["-map", "0:a"]
@@ -67,11 +72,12 @@ def append(
         )
 
     audio_idx = len(audio_streams)
-    for a_stream in new_audios:
-        logger.info(f"appending audio stream {a_stream.index} ({a_stream.codec_name}) from {attachment.name}")
-        action = ffmpeg_audio_codec_for_suffix(attachment, output, a_stream.codec_name)
-        command += ["-map", f"1:a:{a_stream.ffmpeg_index}", f"-c:a:{audio_idx}", action]
-        audio_idx += 1
+    for input_idx, (path, (new_audios, _)) in enumerate(zip(attachments, new_streams), start=1):
+        for a_stream in new_audios:
+            logger.info(f"appending audio stream {a_stream.index} ({a_stream.codec_name}) from {path.name}")
+            action = ffmpeg_audio_codec_for_suffix(path, output, a_stream.codec_name)
+            command += ["-map", f"{input_idx}:a:{a_stream.ffmpeg_index}", f"-c:a:{audio_idx}", action]
+            audio_idx += 1
 
     if len(subtitle_streams) > 0:
         command += ["-map", "0:s"]
@@ -81,16 +87,18 @@ def append(
         )
 
     sub_idx = len(subtitle_streams)
-    for s_stream in new_subs:
-        logger.info(f"appending subtitle stream {s_stream.index} ({s_stream.codec_name}) from {attachment.name}")
-        action = ffmpeg_subtitle_codec_for_suffix(attachment, output, s_stream.codec_name)
-        command += ["-map", f"1:s:{s_stream.ffmpeg_index}", f"-c:s:{sub_idx}", action]
-        sub_idx += 1
+    for input_idx, (path, (_, new_subs)) in enumerate(zip(attachments, new_streams), start=1):
+        for s_stream in new_subs:
+            logger.info(f"appending subtitle stream {s_stream.index} ({s_stream.codec_name}) from {path.name}")
+            action = ffmpeg_subtitle_codec_for_suffix(path, output, s_stream.codec_name)
+            command += ["-map", f"{input_idx}:s:{s_stream.ffmpeg_index}", f"-c:s:{sub_idx}", action]
+            sub_idx += 1
 
     command += ["-map_metadata", "0"]
     command.append(str(output))
 
     # TODO: how do i handle metadata? add it here or spect an 'inspect' call later?
-    logger.info(f"appending {attachment.name} into {root.name}\n\toutputing to {output}")
+    names = ", ".join(path.name for path in attachments)
+    logger.info(f"appending {names} into {root.name}\n\toutputing to {output}")
     run_ffmpeg_command(command)
     return [output]
@@ -1,11 +1,13 @@
 import logging
 from pathlib import Path
 
-from pyutils.lists import flatten
+from pyutils.paths import create_temp_dir
 from vscripts.constants import NTSC_RATE, PAL_RATE
 from vscripts.data.streams import AudioStream, VideoStream
 from vscripts.utils import get_output_file_path, run_ffmpeg_command
 
+from ._retime import is_srt, retime_srt_file, retimed_stream_args
+
 logger = logging.getLogger("vscripts")
 
 
@@ -68,12 +70,14 @@ def atempo_with(
     """Adjust audio tempo using a fixed atempo multiplier.
 
     This function applies an FFmpeg `atempo` filter to one or more audio streams in the input media file.
-    The resulting file preserves metadata and updates stream duration information accordingly.
+    The resulting file preserves metadata and updates stream duration information accordingly. Every other stream is
+    stream copied, the filtered audio is re-encoded with the codec of its source. Text subtitle streams are rescaled
+    in-process to stay in sync, and an SRT input file is rescaled without FFmpeg.
 
     Args:
         input_path: Path to the input media file.
         atempo_value: Tempo multiplier to apply. Values greater than 1.0 speed up audio, while values between
-            0 and 1.0 slow it down. Must be non-negative.
+            0 and 1.0 slow it down. Must be positive.
         track: Optional index of the audio track to process. If ``None``, all audio tracks are adjusted.
         output: Optional output file path or directory. If not provided, a default output path is generated.
         **_: Ignored keyword arguments (accepted for API compatibility).
@@ -83,14 +87,18 @@ def atempo_with(
 
     Raises:
         ValueError: If `input_path` does not exist or is not a file.
-        ValueError: If `atempo_value` is negative.
+        ValueError: If `atempo_value` is not positive.
         ValueError: If the input file contains no audio streams.
         ValueError: If `track` is out of range for the available audio streams.
     """
     if not input_path.is_file():
         raise ValueError(f"invalid {input_path=}")
-    if atempo_value < 0:
-        raise ValueError(f"invalid atempo value {atempo_value=}, must be non-negative")
+    if atempo_value <= 0:
+        raise ValueError(f"invalid atempo value {atempo_value=}, must be positive")
+    if is_srt(input_path):
+        # faster audio means earlier cues
+        name = f"{input_path.stem}_atempo_{atempo_value}.srt"
+        return retime_srt_file(input_path, output, name, scale=1 / atempo_value)
 
     streams = AudioStream.from_file(input_path)
     if len(streams) == 0:
@@ -103,15 +111,16 @@ def atempo_with(
         default_name=f"{input_path.stem}_atempo_{atempo_value}{input_path.suffix}",
     )
 
-    indices = range(len(streams)) if track is None else [track]
-
-    command = ["-i", str(input_path)]
-    command += flatten([[f"-filter:a:{i}", f"atempo={atempo_value}"] for i in indices])
-    command += ["-map_metadata", "0"]
-    command.append(str(output))
+    with create_temp_dir() as temp_dir:
+        subtitle_inputs, args = retimed_stream_args(
+            input_path, output, Path(temp_dir), streams, track, f"atempo={atempo_value}", scale=1 / atempo_value
+        )
+        command = ["-i", str(input_path), *subtitle_inputs, *args]
+        command += ["-map_metadata", "0", "-strict", "experimental"]
+        command.append(str(output))
 
-    logger.info(f"adjusting audio tempo of {input_path.name} by atempo={atempo_value}\n\toutputing to {output}")
-    run_ffmpeg_command(command)
+        logger.info(f"adjusting audio tempo of {input_path.name} by atempo={atempo_value}\n\toutputing to {output}")
+        run_ffmpeg_command(command)
     return [output]
 
 
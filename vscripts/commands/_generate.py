@@ -1,25 +1,55 @@
 import logging
+import multiprocessing
+from collections import deque
+from collections.abc import Iterable, Iterator
+from concurrent.futures import Future, ProcessPoolExecutor
 from pathlib import Path
-from typing import Any
 
-from whisper import Whisper
+import numpy as np
 
-from pyutils.paths import create_temp_dir
-from vscripts.commands._extract import extract
-from vscripts.constants import ISO639_3_TO_1, UNKNOWN_LANGUAGE
+from vscripts.commands._skip import existing_output, subtitle_languages
+from vscripts.constants import ISO639_3_TO_1, LANGUAGE_DETECTION_THRESHOLD, UNKNOWN_LANGUAGE
+from vscripts.data.cache import audio_fingerprints
+from vscripts.data.checkpoint import TranscribedChunk, clear_checkpoint, load_checkpoint, save_checkpoint
 from vscripts.data.language import find_audio_language, is_unknown_language
 from vscripts.data.streams import AudioStream
-from vscripts.utils import get_output_file_path, load_whisper, to_srt_timestamp
+from vscripts.utils import (
+    SAMPLE_RATE,
+    ASRBackendName,
+    ASRSegment,
+    SrtWriter,
+    WhisperModel,
+    configure_threads,
+    get_asr_backend,
+    get_output_file_path,
+    get_thread_budget,
+    load_audio_track,
+    speech_segments,
+    to_srt_timestamp,
+)
 
 logger = logging.getLogger("vscripts")
 
+_TRANSCRIPTION_MODEL: WhisperModel = "medium"
+# target length of each parallel transcription chunk, chunks only break at silences so they can be longer
+_CHUNK_SECONDS = 600.0
+# chunks submitted to the worker processes ahead of the one being written, per worker
+_CHUNKS_IN_FLIGHT_PER_WORKER = 2
+
 
 def generate_subtitles(
     input_path: Path,
     language: str | None = None,
     *,
     track: int | None = None,
+    force_detection: bool = False,
+    detection_threshold: float = LANGUAGE_DETECTION_THRESHOLD,
+    workers: int = 1,
+    asr_backend: ASRBackendName = "whisper",
+    skip_existing: bool = False,
     output: Path | None = None,
+    destination: Path | None = None,
+    source: Path | None = None,
     **_,
 ) -> list[Path]:
     """
@@ -29,26 +59,43 @@ def generate_subtitles(
     recognition model. If no language is explicitly provided, the language is inferred from the audio stream when
     possible.
 
-    When multiple audio streams are present and language inference is required, non-primary streams may be temporarily
-    extracted to enable accurate language detection.
+    Audio is decoded straight from the input container, no track is extracted to an intermediate file.
 
     Args:
         input_path: Path to the input media file.
         language: Optional language code to use for transcription. If provided, it must be a valid ISO 639-3 code.
             When omitted or unknown, the language is inferred from the audio stream.
         track: Optional index of the audio track to transcribe. If ``None``, all available audio tracks are processed.
+        force_detection: If ``True``, cached language detection results are ignored and replaced by new ones.
+            Defaults to ``False``.
+        detection_threshold: Minimum confidence for a small Whisper model to decide the audio language before
+            escalating to a larger one.
+        workers: Number of worker processes used to transcribe each audio stream. With more than one worker the
+            audio is split into silence-aligned chunks that are transcribed in parallel, each worker holding its own
+            copy of the model.
+        asr_backend: Speech recognition backend used for language detection and transcription, 'whisper' (default)
+            or 'whisper-int8' for CPU nodes.
+        skip_existing: If ``True``, audio streams whose language already has a subtitle stream in the input file are
+            skipped, and so are the ones whose output file exists and is newer than the input.
         output: Optional output file path or directory. If not provided, subtitle files are written to the input
             file’s directory.
+        destination: Where the outputs are moved once the command has run, a directory or the final file, when
+            `output` is a staging directory such as the temporary directory of `do`. Outputs already there and up
+            to date are not generated again with `skip_existing`.
+        source: The original file `input_path` was derived from, e.g. before `do` extracted one of its streams. Its
+            modification time decides whether an existing output is up to date.
         **_: Ignored keyword arguments (accepted for API compatibility).
 
     Returns:
-        A list of paths to the generated subtitle (`.srt`) files. One path is returned per processed audio stream.
+        A list of paths to the generated subtitle (`.srt`) files. One path is returned per processed audio stream,
+        streams skipped because the input already has subtitles in their language are left out.
 
     Raises:
         ValueError: If `input_path` does not exist or is not a file.
         ValueError: If no audio streams are found in the input file.
         ValueError: If `track` is out of range for the available audio streams.
         ValueError: If `language` is provided and is not a valid ISO 639-3 language code.
+        ValueError: If `workers` is lower than 1.
     """
     if not input_path.is_file():
         raise ValueError(f"invalid {input_path=}")
@@ -60,55 +107,194 @@ def generate_subtitles(
         raise ValueError(f"invalid audio {track=} for {streams=}")
     if language is not None and len(language) != 3:
         raise ValueError(f"invalid language code '{language}', must be ISO 639-3")
+    if workers < 1:
+        raise ValueError(f"invalid {workers=}, must be at least 1")
 
-    model = load_whisper("medium")
+    existing_languages = subtitle_languages(input_path) if skip_existing else set()
 
-    def inner_generate(index: int, lang: str | None) -> Path:
+    def inner_generate(index: int, lang: str | None) -> Path | None:
         stream = streams[index]
 
-        if index > 0:
-            extracted = extract(input_path, track=index, stream_type="audio", output=Path(temp_dir))[0]
-            stream = AudioStream.from_file(extracted)[0]
-
         if lang is None or is_unknown_language(lang):
-            lang = find_audio_language(stream)
+            lang = find_audio_language(
+                stream,
+                threshold=detection_threshold,
+                use_cache=not force_detection,
+                asr_backend=asr_backend,
+            )
             logger.info(f"inferred {lang=} for audio={stream.ffmpeg_index} in {input_path.name}")
 
         if lang == UNKNOWN_LANGUAGE:  # pragma: no cover
             logger.warning(f"could not determine language for audio={stream.ffmpeg_index}, defaulting to 'eng'")
             lang = "eng"
 
+        if lang in existing_languages:
+            logger.info(f"skipping audio={stream.ffmpeg_index}, {input_path.name} already has '{lang}' subtitles")
+            return None
+
         if len(lang) == 3:
             logger.debug(f"converting ISO 639-3 language code {lang=} to ISO 639-1")
             lang = ISO639_3_TO_1.get(lang, lang)
 
         output_path = get_output_file_path(
             output or input_path.parent,
-            default_name=f"{stream.file_path.stem}_{lang}.srt",
+            default_name=f"{input_path.stem}_{lang}.srt" if index == 0 else f"{input_path.stem}_{index}_{lang}.srt",
         )
 
-        logger.info(f"generating subtitles for audio={stream.ffmpeg_index} in {stream.file_path.name} using {lang=}")
-        content = _transcribe(model, stream, language=lang)
-        with output_path.open("w", encoding="utf-8") as f:
-            f.write(content)
+        # the output name needs the language, so an unknown one is detected (or read from the cache) before this check
+        if skip_existing and (existing := existing_output(output_path, input_path, destination, source)) is not None:
+            logger.info(f"skipping audio={stream.ffmpeg_index}, {existing} is up to date")
+            return existing
+
+        logger.info(f"generating subtitles for audio={stream.ffmpeg_index} in {input_path.name} using {lang=}")
+        _transcribe(stream, output_path, language=lang, backend_name=asr_backend, workers=workers)
 
         return output_path
 
-    with create_temp_dir() as temp_dir:
-        indices = range(len(streams)) if track is None else [track]
-        return [inner_generate(i, lang=language) for i in indices]
+    indices = range(len(streams)) if track is None else [track]
+    return [p for i in indices if (p := inner_generate(i, lang=language)) is not None]
+
+
+def _transcribe(
+    stream: AudioStream,
+    output_path: Path,
+    language: str,
+    backend_name: ASRBackendName = "whisper",
+    model_name: WhisperModel = _TRANSCRIPTION_MODEL,
+    workers: int = 1,
+) -> None:
+    audio = load_audio_track(stream.file_path, track=stream.ffmpeg_index)
+    duration = len(audio) / SAMPLE_RATE
+
+    # only feed the speech regions to whisper, it hallucinates text on long silences and music
+    regions = speech_segments(audio)
+    if regions:
+        logger.info(f"found {len(regions)} speech regions covering {sum(e - s for s, e in regions):.0f}s")
+    else:
+        logger.warning("no speech regions found, transcribing the whole audio")
+
+    chunks = _plan_chunks(regions, total=duration)
+
+    # completed chunks are checkpointed, so a rerun on the same audio only transcribes what is missing
+    checkpoint_key = {
+        "fingerprint": audio_fingerprints([stream])[0],
+        "backend": backend_name,
+        "model": model_name,
+        "language": language,
+        "chunks": [[chunk[0][0], chunk[-1][1]] for chunk in chunks],
+    }
+    done = load_checkpoint(checkpoint_key)
+    if done:
+        resume_at = chunks[len(done) - 1][-1][1]
+        logger.info(f"resuming transcription at {to_srt_timestamp(resume_at)} ({len(done)}/{len(chunks)} chunks done)")
+
+    def transcribed_chunks() -> Iterator[TranscribedChunk]:
+        yield from list(done)
+        pending = chunks[len(done) :]
+        logger.info(f"transcribing {len(pending)} chunks with {workers} workers")
+        for result in _transcribe_chunks(audio, pending, language, backend_name, model_name, workers):
+            done.append(result)
+            save_checkpoint(checkpoint_key, done)
+            yield result
+
+    # cues are written as soon as their chunk is done, so long runs show progress and keep partial results
+    with SrtWriter(output_path, duration=duration) as writer:
+        for seg in _stitch_segments(transcribed_chunks()):
+            writer.write(seg["start"], seg["end"], seg["text"])
+    clear_checkpoint(checkpoint_key)
+
+
+def _transcribe_chunks(
+    audio: np.ndarray,
+    chunks: list[list[tuple[float, float]]],
+    language: str,
+    backend_name: ASRBackendName,
+    model_name: WhisperModel,
+    workers: int,
+) -> Iterator[TranscribedChunk]:
+    def chunk_args(chunk: list[tuple[float, float]]) -> tuple[float, np.ndarray, list[float]]:
+        offset = chunk[0][0]
+        chunk_audio = audio[int(offset * SAMPLE_RATE) : int(chunk[-1][1] * SAMPLE_RATE)]
+        return offset, chunk_audio, [t - offset for region in chunk for t in region]
+
+    if workers == 1 or len(chunks) == 1:
+        for chunk in chunks:
+            offset, chunk_audio, clip_timestamps = chunk_args(chunk)
+            yield offset, _transcribe_chunk(backend_name, model_name, chunk_audio, clip_timestamps, language)
+        return
+
+    # spawned workers load their own copy of the model, forking a process with torch state is not safe
+    with ProcessPoolExecutor(
+        max_workers=min(workers, len(chunks)),
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(backend_name, model_name, max(1, get_thread_budget().cores // workers)),
+    ) as executor:
+        # every submitted chunk holds a pickled copy of its audio, only a few wait in the queue at any time
+        in_flight: deque[tuple[float, Future[list[ASRSegment]]]] = deque()
+        for chunk in chunks:
+            offset, chunk_audio, clip_timestamps = chunk_args(chunk)
+            args = (backend_name, model_name, chunk_audio, clip_timestamps, language)
+            in_flight.append((offset, executor.submit(_transcribe_chunk, *args)))
+            if len(in_flight) >= _CHUNKS_IN_FLIGHT_PER_WORKER * workers:
+                offset, future = in_flight.popleft()
+                yield offset, future.result()
+        while in_flight:
+            offset, future = in_flight.popleft()
+            yield offset, future.result()
+
+
+def _plan_chunks(
+    regions: list[tuple[float, float]],
+    total: float,
+    chunk_seconds: float = _CHUNK_SECONDS,
+) -> list[list[tuple[float, float]]]:
+    # chunks are groups of consecutive speech regions, so every chunk boundary falls in a silence
+    if not regions:
+        regions = [(0.0, total)]
+
+    # except inside regions longer than a chunk, they are split so a long run still checkpoints its progress
+    pieces: list[tuple[float, float]] = []
+    for start, end in regions:
+        while end - start > chunk_seconds:
+            pieces.append((start, start + chunk_seconds))
+            start += chunk_seconds
+        pieces.append((start, end))
+
+    chunks: list[list[tuple[float, float]]] = []
+    for region in pieces:
+        if chunks and region[1] - chunks[-1][0][0] <= chunk_seconds:
+            chunks[-1].append(region)
+        else:
+            chunks.append([region])
+    return chunks
+
 
+def _stitch_segments(results: Iterable[TranscribedChunk]) -> Iterator[ASRSegment]:
+    last: ASRSegment | None = None
+    for offset, chunk_segments in results:
+        for seg in chunk_segments:
+            seg = {"start": seg["start"] + offset, "end": seg["end"] + offset, "text": seg["text"]}
+            if last is not None and seg["start"] < last["end"]:
+                # the same words decoded on both sides of a boundary are only kept once
+                if seg["text"].strip() == last["text"].strip():
+                    continue
+                seg["start"] = last["end"]
+            if seg["end"] > seg["start"]:
+                last = seg
+                yield seg
 
-def _transcribe(model: Whisper, stream: AudioStream, language: str) -> str:
-    transcription = model.transcribe(str(stream.file_path), language=language)
-    segments: list[dict[str, Any]] = transcription.get("segments", [])  # type: ignore
 
-    content = ""
-    for i, seg in enumerate(segments, start=1):
-        start = to_srt_timestamp(seg["start"])
-        end = to_srt_timestamp(seg["end"])
-        text = seg["text"].strip()
+def _init_worker(backend_name: ASRBackendName, model_name: WhisperModel, cores: int) -> None:
+    configure_threads(cores)
+    get_asr_backend(backend_name).load(model_name)
 
-        content += f"{i}\n{start} --> {end}\n{text}\n\n"
 
-    return content
+def _transcribe_chunk(
+    backend_name: ASRBackendName,
+    model_name: WhisperModel,
+    audio: np.ndarray,
+    clip_timestamps: list[float],
+    language: str,
+) -> list[ASRSegment]:
+    return get_asr_backend(backend_name).transcribe(model_name, audio, language, clip_timestamps)
@@ -1,21 +1,38 @@
 import logging
-import statistics as stats
 from pathlib import Path
 
+import numpy as np
+
 from pyutils.paths import create_temp_dir
 from vscripts.commands._extract import dissect
-from vscripts.data.language import find_audio_language, find_subs_language
+from vscripts.constants import LANGUAGE_DETECTION_THRESHOLD
+from vscripts.data.language import find_audio_languages, find_subs_language
 from vscripts.data.streams import AudioStream, SubtitleStream, VideoStream
-from vscripts.utils import count_srt_entries, get_output_file_path, infer_media_type, is_subs, run_ffmpeg_command
+from vscripts.utils import (
+    ASRBackendName,
+    get_output_file_path,
+    infer_media_type,
+    is_subs,
+    read_subtitle_timings,
+    run_ffmpeg_command,
+    subtitle_coverage,
+)
 
 logger = logging.getLogger("vscripts")
 
+# the largest fraction of the media a forced subtitle track covers, and of the coverage of the other tracks
+_FORCED_SUBS_MAX_COVERAGE = 0.1
+_FORCED_SUBS_MAX_RATIO = 0.25
+
 
 def merge(
     target: Path,
     data: Path,
     *,
     output: Path | None,
+    force_detection: bool = False,
+    detection_threshold: float = LANGUAGE_DETECTION_THRESHOLD,
+    asr_backend: ASRBackendName = "whisper",
     **_,
 ) -> list[Path]:
     """Merge audio and subtitle streams from a data file into a target video.
@@ -29,6 +46,10 @@ def merge(
         data: Path to the media file containing audio and subtitle streams to merge into the target.
         output: Optional output file path. If not provided, a default path is created in the target file’s directory
             with suffix `_merged.mkv`.
+        force_detection: If ``True``, cached language detection results are ignored. Defaults to ``False``.
+        detection_threshold: Minimum confidence for a small Whisper model to decide an audio language before
+            escalating to a larger one.
+        asr_backend: Speech recognition backend used for audio language detection. Defaults to ``"whisper"``.
         **_: Ignored keyword arguments (accepted for API compatibility).
 
     Returns:
@@ -57,8 +78,19 @@ def merge(
         target_path = dissect(target, output=Path(temp_dir) / target.stem)
         data_path = dissect(data, output=Path(temp_dir) / data.stem)
 
-        video, target_audios, target_subs = _retrieve_target_streams(target_path)
-        data_audios, data_subs = _retrieve_data_streams(data_path)
+        use_cache = not force_detection
+        video, target_audios, target_subs = _retrieve_target_streams(
+            target_path,
+            threshold=detection_threshold,
+            use_cache=use_cache,
+            asr_backend=asr_backend,
+        )
+        data_audios, data_subs = _retrieve_data_streams(
+            data_path,
+            threshold=detection_threshold,
+            use_cache=use_cache,
+            asr_backend=asr_backend,
+        )
 
         if len(data_audios) == 0:
             raise ValueError("no valid audio streams found in data file to merge")
@@ -71,8 +103,9 @@ def merge(
 
         # check for forced subtitles in data, using duration of the first audio stream
         duration = float(data_audios[0].duration) if data_audios[0].duration else 0
-        forced_subs = _retrieve_forced_subs(data_path, duration=duration)
+        forced_subs, confidence = _retrieve_forced_subs(data_path, duration=duration)
         if forced_subs is not None:
+            logger.info(f"found forced subtitle stream {forced_subs.file_path.name} ({confidence:.2f})")
             for sub in subtitles:
                 if sub.file_path == forced_subs.file_path:
                     sub.default = True
@@ -110,10 +143,16 @@ def merge(
         return [output]
 
 
-def _retrieve_target_streams(target_paths: list[Path]) -> tuple[VideoStream, list[AudioStream], list[SubtitleStream]]:
+def _retrieve_target_streams(
+    target_paths: list[Path],
+    threshold: float = LANGUAGE_DETECTION_THRESHOLD,
+    use_cache: bool = True,
+    asr_backend: ASRBackendName = "whisper",
+) -> tuple[VideoStream, list[AudioStream], list[SubtitleStream]]:
     video_stream: VideoStream | None = None
     audio_streams: list[AudioStream] = []
     subtitle_streams: list[SubtitleStream] = []
+    candidate_audios: list[AudioStream] = []
 
     for file in target_paths:
         if not file.is_file():
@@ -126,18 +165,11 @@ def _retrieve_target_streams(target_paths: list[Path]) -> tuple[VideoStream, lis
             video_stream = VideoStream.from_file(file)
             continue
         elif ext == "audio":
-            audio_stream = AudioStream.from_file(file)[0]
-            lang = find_audio_language(audio_stream)
-            if lang in ["eng"]:
-                logger.info(f"found audio {lang=} stream in target")
-                audio_stream.language = lang
-                audio_streams.append(audio_stream)
-            if lang in ["spa", "glg"]:
-                logger.warning(f"found audio {lang=} stream in target, skipping")
+            candidate_audios.append(AudioStream.from_file(file)[0])
             continue
         elif ext == "subtitle":
             subtitle_stream = SubtitleStream.from_file(file)[0]
-            lang = find_subs_language(subtitle_stream)
+            lang = find_subs_language(subtitle_stream, use_cache=use_cache)
             if lang in ["eng", "spa", "glg"]:
                 logger.info(f"found subtitle {lang=} stream in target")
                 subtitle_stream.language = lang
@@ -147,14 +179,34 @@ def _retrieve_target_streams(target_paths: list[Path]) -> tuple[VideoStream, lis
             logger.warning(f"skipping {ext} stream in {file}")
             continue
 
+    languages = find_audio_languages(
+        candidate_audios,
+        threshold=threshold,
+        use_cache=use_cache,
+        asr_backend=asr_backend,
+    )
+    for audio_stream, lang in zip(candidate_audios, languages):
+        if lang in ["eng"]:
+            logger.info(f"found audio {lang=} stream in target")
+            audio_stream.language = lang
+            audio_streams.append(audio_stream)
+        if lang in ["spa", "glg"]:
+            logger.warning(f"found audio {lang=} stream in target, skipping")
+
     if video_stream is None:
         raise ValueError("no video stream found in target file")
     return video_stream, audio_streams, subtitle_streams
 
 
-def _retrieve_data_streams(data_paths: list[Path]) -> tuple[list[AudioStream], list[SubtitleStream]]:
+def _retrieve_data_streams(
+    data_paths: list[Path],
+    threshold: float = LANGUAGE_DETECTION_THRESHOLD,
+    use_cache: bool = True,
+    asr_backend: ASRBackendName = "whisper",
+) -> tuple[list[AudioStream], list[SubtitleStream]]:
     audio_streams: list[AudioStream] = []
     subtitle_streams: list[SubtitleStream] = []
+    candidate_audios: list[AudioStream] = []
 
     for file in data_paths:
         if not file.is_file():
@@ -163,16 +215,11 @@ def _retrieve_data_streams(data_paths: list[Path]) -> tuple[list[AudioStream], l
 
         ext = infer_media_type(file)
         if ext == "audio":
-            audio_stream = AudioStream.from_file(file)[0]
-            lang = find_audio_language(audio_stream, force_detection=True)
-            if lang in ["spa", "glg"]:
-                logger.info(f"found audio {lang=} stream in data")
-                audio_stream.language = lang
-                audio_streams.append(audio_stream)
+            candidate_audios.append(AudioStream.from_file(file)[0])
             continue
         elif ext == "subtitle":
             subtitle_stream = SubtitleStream.from_file(file)[0]
-            lang = find_subs_language(subtitle_stream, force_detection=True)
+            lang = find_subs_language(subtitle_stream, force_detection=True, use_cache=use_cache)
             if lang in ["spa", "glg"]:
                 logger.info(f"found subtitle {lang=} stream in data")
                 subtitle_stream.language = lang
@@ -182,6 +229,19 @@ def _retrieve_data_streams(data_paths: list[Path]) -> tuple[list[AudioStream], l
             logger.warning(f"skipping {ext} stream in {file}")
             continue
 
+    languages = find_audio_languages(
+        candidate_audios,
+        threshold=threshold,
+        force_detection=True,
+        use_cache=use_cache,
+        asr_backend=asr_backend,
+    )
+    for audio_stream, lang in zip(candidate_audios, languages):
+        if lang in ["spa", "glg"]:
+            logger.info(f"found audio {lang=} stream in data")
+            audio_stream.language = lang
+            audio_streams.append(audio_stream)
+
     if len([s for s in audio_streams if s.language == "spa"]) > 1:
         scored_streams = [(s, s.score) for s in audio_streams if s.language == "spa"]
         best_stream = max(scored_streams, key=lambda x: x[1])[0]
@@ -191,28 +251,59 @@ def _retrieve_data_streams(data_paths: list[Path]) -> tuple[list[AudioStream], l
     return audio_streams, subtitle_streams
 
 
-# TODO: improve language detection for forced subtitles
-def _retrieve_forced_subs(data_paths: list[Path], duration: float) -> SubtitleStream | None:
-    subtitles = [SubtitleStream.from_file(f)[0] for f in data_paths if is_subs(f)]
-    counts = [(count_srt_entries(s.file_path.read_text(encoding="utf-8", errors="ignore")), s) for s in subtitles]
-    if len(counts) == 0:
-        return None
-
-    if len(subtitles) == 1:
-        if counts[0][0] <= duration / 60:  # less than 1 subtitle per minute
-            logger.info("only one subtitle stream found, assuming it's a forced subtitle stream")
-            subtitles[0].default = True
-            subtitles[0].language = "spa"
-            return subtitles[0]
-        return None
-
-    min_count = min([count for count, _ in counts])
-    if min_count < (5 * stats.mean([count for count, _ in counts if count > min_count])):
-        subs = next((stream for count, stream in counts if count <= min_count), None)
-        assert subs is not None, "subtitle stream should not be None here"
-        logger.info("found a subtitle stream with very few entries, assuming it's a forced subtitle stream")
-
-        subs.default = True
-        subs.language = "spa"
-        return subs
-    return None
+def _retrieve_forced_subs(data_paths: list[Path], duration: float) -> tuple[SubtitleStream | None, float]:
+    """
+    Find the forced subtitle track among the dissected subtitle files, the one whose cues cover the least of the media.
+
+    Args:
+        data_paths (list[Path]): The dissected stream files of the data file.
+        duration (float): The duration of the media in seconds, the end of the last cue is used if unknown.
+    Returns:
+        tuple[SubtitleStream | None, float]: The forced subtitle stream, if any, and the confidence of the decision.
+    """
+    paths, timings = [], []
+    for path in data_paths:
+        if not is_subs(path):
+            continue
+        try:
+            starts, ends = read_subtitle_timings(path)
+        except ValueError as e:
+            logger.warning(f"skipping subtitle file {path.name} for forced subtitles detection: {e}")
+            continue
+        if len(starts) == 0:
+            continue
+        paths.append(path)
+        timings.append((starts, ends))
+    if len(paths) == 0:
+        return None, 0.0
+
+    if duration <= 0:
+        duration = max(int(ends.max()) for _, ends in timings) / 1000
+    if duration <= 0:
+        logger.warning("unknown media duration and zero-timed subtitles, skipping forced subtitles detection")
+        return None, 0.0
+    coverages = subtitle_coverage(timings, duration)
+    index, confidence = _forced_subs_candidate(coverages)
+    logger.info(f"subtitle coverages {[round(float(c), 3) for c in coverages]}, forced {index=} ({confidence:.2f})")
+    if index is None:
+        return None, confidence
+
+    subs = SubtitleStream.from_file(paths[index])[0]
+    subs.default = True
+    subs.language = "spa"
+    return subs, confidence
+
+
+def _forced_subs_candidate(coverages: np.ndarray) -> tuple[int | None, float]:
+    # forced subtitles only cover signs and foreign dialogue, full ones follow most of the speech
+    index = int(np.argmin(coverages))
+    coverage = float(coverages[index])
+    confidence = 1 - coverage / _FORCED_SUBS_MAX_COVERAGE
+    if len(coverages) > 1:
+        others = float(np.median(np.delete(coverages, index)))
+        ratio = coverage / others if others > 0 else 1.0
+        confidence = min(confidence, 1 - ratio / _FORCED_SUBS_MAX_RATIO)
+    if confidence <= 0:
+        # how far the best candidate is from being forced, is the confidence that there are none
+        return None, min(-confidence, 1.0)
+    return index, confidence
@@ -0,0 +1,147 @@
+import logging
+from pathlib import Path
+
+from pyutils.lists import flatten
+from vscripts.data.streams import AudioStream, SubtitleStream
+from vscripts.utils import (
+    SRT_FFMPEG_CODECS,
+    ffmpeg_audio_encoder_args,
+    ffmpeg_subtitle_codec_for_suffix,
+    format_srt,
+    get_output_file_path,
+    is_audio,
+    read_srt,
+    retime_cues,
+)
+
+from ._extract import extract
+
+logger = logging.getLogger("vscripts")
+
+
+def is_srt(path: Path) -> bool:
+    return path.suffix.lower() == ".srt"
+
+
+def retime_srt_file(
+    input_path: Path,
+    output: Path | None,
+    default_name: str,
+    *,
+    offset: float = 0.0,
+    scale: float = 1.0,
+) -> list[Path]:
+    """
+    Retime an SRT file in-process, without going through ffmpeg.
+
+    Args:
+        input_path (Path): The SRT file.
+        output (Path | None): Optional output file path or directory, defaults to the input file's directory.
+        default_name (str): The output file name when `output` is a directory.
+        offset (float): Seconds added to every timestamp, negative to hasten.
+        scale (float): Factor applied to every timestamp before the offset.
+    Returns:
+        list[Path]: The path to the retimed SRT file.
+    """
+    output_path = get_output_file_path(output or input_path.parent, default_name=default_name)
+    cues = list(read_srt(input_path))
+    retimed = retime_cues(cues, offset=round(offset * 1000), scale=scale)
+
+    logger.info(f"retiming {len(cues)} cues of {input_path.name} by {offset=}s {scale=}\n\toutputing to {output_path}")
+    output_path.write_text(format_srt(retimed), encoding="utf-8")
+    return [output_path]
+
+
+def retimed_subtitle_args(
+    input_path: Path,
+    output: Path,
+    temp_dir: Path,
+    *,
+    offset: float = 0.0,
+    scale: float = 1.0,
+) -> tuple[list[str], list[str]]:
+    """
+    Retime the text subtitle streams of a container in-process, so they stay in sync with the retimed audio.
+
+    Each SRT compatible stream is extracted, retimed and added back as an extra ffmpeg input replacing the original
+    one. Other subtitle streams are copied untouched.
+    Args:
+        input_path (Path): The media file, the first ffmpeg input.
+        output (Path): The output file of the ffmpeg command.
+        temp_dir (Path): Where the retimed subtitles are written.
+        offset (float): Seconds added to every timestamp, negative to hasten.
+        scale (float): Factor applied to every timestamp before the offset.
+    Returns:
+        tuple[list[str], list[str]]: The ffmpeg arguments adding the retimed inputs and the ones mapping every subtitle
+            stream to the output, both empty if the input has no subtitle streams.
+    """
+    inputs: list[str] = []
+    maps: list[str] = []
+    for i, stream in enumerate(SubtitleStream.from_file(input_path)):
+        if stream.codec_name not in SRT_FFMPEG_CODECS:
+            logger.warning(f"subtitle stream {stream.index} ({stream.codec_name}) can not be retimed, copying it")
+            maps += ["-map", f"0:s:{i}", f"-c:s:{i}", "copy"]
+            continue
+
+        extracted = extract(input_path, track=i, stream_type="subtitle", output=temp_dir)[0]
+        retimed = retime_srt_file(extracted, temp_dir, f"{extracted.stem}_retimed.srt", offset=offset, scale=scale)[0]
+        inputs += ["-i", str(retimed)]
+        codec = ffmpeg_subtitle_codec_for_suffix(retimed, output, "subrip")
+        # the retimed file has no tags, language and title are taken from the original stream
+        maps += ["-map", f"{len(inputs) // 2}:s:0", f"-c:s:{i}", codec, f"-map_metadata:s:s:{i}", f"0:s:s:{i}"]
+    return inputs, maps
+
+
+def retimed_stream_args(
+    input_path: Path,
+    output: Path,
+    temp_dir: Path,
+    audio_streams: list[AudioStream],
+    track: int | None,
+    audio_filter: str,
+    *,
+    offset: float = 0.0,
+    scale: float = 1.0,
+) -> tuple[list[str], list[str]]:
+    """
+    Build the ffmpeg arguments of a command filtering some audio streams of a media file, e.g. to delay them.
+
+    Every stream is kept and stream copied, only the filtered audio streams are re-encoded, with the encoder and bit
+    rate of their source when the output supports them, and text subtitle streams are retimed in-process, see
+    `retimed_subtitle_args`. Audio only outputs keep only the audio streams, just the processed one if `track` is set.
+    Args:
+        input_path (Path): The media file, the first ffmpeg input.
+        output (Path): The output file of the ffmpeg command.
+        temp_dir (Path): Where the retimed subtitles are written.
+        audio_streams (list[AudioStream]): The audio streams of the media file.
+        track (int | None): The index of the audio stream to filter, all of them if None.
+        audio_filter (str): The ffmpeg filter applied to the audio streams.
+        offset (float): Seconds added to every subtitle timestamp, negative to hasten.
+        scale (float): Factor applied to every subtitle timestamp before the offset.
+    Returns:
+        tuple[list[str], list[str]]: The ffmpeg arguments adding the retimed subtitle inputs and the output ones.
+    """
+    inputs: list[str] = []
+    indices = range(len(audio_streams)) if track is None else [track]
+    if is_audio(output):
+        sources = list(indices)
+        args = ["-c", "copy", *flatten([["-map", f"0:a:{i}"] for i in sources])]
+        # the output only has the mapped streams, numbered from 0
+        filtered = list(enumerate(sources))
+    else:
+        inputs, subtitle_maps = retimed_subtitle_args(input_path, output, temp_dir, offset=offset, scale=scale)
+        args = ["-c", "copy", *_stream_maps(subtitle_maps)]
+        filtered = [(i, i) for i in indices]
+
+    for output_index, source_index in filtered:
+        stream = audio_streams[source_index]
+        args += [f"-filter:a:{output_index}", audio_filter]
+        args += ffmpeg_audio_encoder_args(stream.codec_name, stream.bit_rate, output_index, output)
+    return inputs, args
+
+
+def _stream_maps(subtitle_maps: list[str]) -> list[str]:
+    # the retimed subtitles replace the original ones, everything else is mapped in its original order
+    if not subtitle_maps:
+        return ["-map", "0"]
+    return ["-map", "0:v?", "-map", "0:a", *subtitle_maps, "-map", "0:d?", "-map", "0:t?"]
@@ -4,13 +4,28 @@ from pathlib import Path
 
 from pyutils.lists import flatten
 from pyutils.paths import create_temp_dir
-from vscripts.constants import ENCODING_1080P, ENCODING_PRESETS, UNKNOWN_LANGUAGE, EncodingPreset
-from vscripts.data.language import find_language
+from vscripts.constants import (
+    ENCODING_1080P,
+    ENCODING_PRESETS,
+    LANGUAGE_DETECTION_THRESHOLD,
+    UNKNOWN_LANGUAGE,
+    EncodingPreset,
+)
+from vscripts.data.language import find_audio_languages, find_subs_language
 from vscripts.data.streams import AudioStream, SubtitleStream
-from vscripts.utils import get_output_file_path, is_hdr, run_ffmpeg_command, run_handbrake_command
-from vscripts.utils._utils import is_audio, is_subs, suffix_by_codec
-
-from ._extract import dissect
+from vscripts.utils import (
+    ASRBackendName,
+    get_output_file_path,
+    is_audio,
+    is_hdr,
+    is_subs,
+    run_ffmpeg_command,
+    run_handbrake_command,
+)
+from vscripts.utils._utils import suffix_by_codec
+
+from ._extract import extract
+from ._retime import is_srt, retime_srt_file, retimed_stream_args, retimed_subtitle_args
 
 logger = logging.getLogger("vscripts")
 
@@ -27,7 +42,9 @@ def delay(
     Apply a delay to one or more audio tracks in a media file.
 
     This function uses FFmpeg to apply a specified delay (in seconds) to one or more audio tracks in a media file. If
-    no track is specified, the delay is applied to all audio tracks.
+    no track is specified, the delay is applied to all audio tracks. Every other stream is stream copied, the delayed
+    audio is re-encoded with the codec of its source. Text subtitle streams are delayed in-process along with the
+    audio, and an SRT input file is delayed without FFmpeg.
 
     Args:
         input_path: Path to the input media file.
@@ -48,6 +65,8 @@ def delay(
         raise ValueError(f"invalid {input_path=}")
     if delay < 0:
         raise ValueError(f"invalid delay time {delay=}, must be non-negative")
+    if is_srt(input_path):
+        return retime_srt_file(input_path, output, f"{input_path.stem}_delayed_{delay}.srt", offset=delay)
 
     streams = AudioStream.from_file(input_path)
     if len(streams) == 0:
@@ -55,20 +74,22 @@ def delay(
     if track is not None and (track < 0 or track >= len(streams)):
         raise ValueError(f"invalid audio {track=} for {streams=}")
 
-    suffix = suffix_by_codec(streams[track].codec_name, "audio") if track is not None else "mka"
     output = get_output_file_path(
         output or input_path.parent,
-        default_name=f"{input_path.stem}_delayed_{delay}.{suffix}",
+        default_name=f"{input_path.stem}_delayed_{delay}{input_path.suffix}",
     )
 
-    indices = range(len(streams)) if track is None else [track]
-    command = ["-i", str(input_path)]
-    command += flatten([[f"-filter:a:{i}", f"adelay={int(float(delay) * 1000)}:all=true"] for i in indices])
-    command += ["-strict", "experimental"]
-    command.append(str(output))
-
-    logger.info(f"applying audio {delay=}ms to {input_path.name}\n\toutputing to {output}")
-    run_ffmpeg_command(command)
+    with create_temp_dir() as temp_dir:
+        audio_filter = f"adelay={int(float(delay) * 1000)}:all=true"
+        subtitle_inputs, args = retimed_stream_args(
+            input_path, output, Path(temp_dir), streams, track, audio_filter, offset=delay
+        )
+        command = ["-i", str(input_path), *subtitle_inputs, *args]
+        command += ["-map_metadata", "0", "-strict", "experimental"]
+        command.append(str(output))
+
+        logger.info(f"applying audio {delay=}ms to {input_path.name}\n\toutputing to {output}")
+        run_ffmpeg_command(command)
     return [output]
 
 
@@ -84,7 +105,8 @@ def hasten(
     Apply a hasten (negative delay) to one or more audio tracks in a media file.
 
     This function uses FFmpeg to apply a specified hasten (in seconds) to one or more audio tracks in a media file. If
-    no track is specified, the hasten is applied to all audio tracks.
+    no track is specified, the hasten is applied to all audio tracks. Text subtitle streams are hastened in-process
+    along with the audio, and an SRT input file is hastened without FFmpeg.
 
     Args:
         input_path: Path to the input media file.
@@ -104,7 +126,9 @@ def hasten(
     if not input_path.is_file():
         raise ValueError(f"invalid {input_path=}")
     if hasten < 0:
-        raise ValueError(f"invalid delay time {delay=}, must be non-negative")
+        raise ValueError(f"invalid hasten time {hasten=}, must be non-negative")
+    if is_srt(input_path):
+        return retime_srt_file(input_path, output, f"{input_path.stem}_hastened_{hasten}.srt", offset=-hasten)
 
     streams = AudioStream.from_file(input_path)
     if len(streams) == 0:
@@ -119,13 +143,19 @@ def hasten(
     )
 
     indices = range(len(streams)) if track is None else [track]
-    command = ["-i", str(input_path), "-ss", f"{hasten}"]
-    command += flatten([["-map", f"0:a:{i}"] for i in indices])
-    command += ["-c:a", "copy", "-strict", "experimental"]
-    command.append(str(output))
-
-    logger.info(f"adjusting playback speed of {input_path.name} by {hasten=}\n\toutputing to {output}")
-    run_ffmpeg_command(command)
+    with create_temp_dir() as temp_dir:
+        subtitle_inputs, subtitle_maps = [], []
+        if not is_audio(output):
+            # audio only outputs, e.g. the codec suffix of a single track, can not hold subtitles
+            subtitle_inputs, subtitle_maps = retimed_subtitle_args(input_path, output, Path(temp_dir), offset=-hasten)
+        # seeking on the input only cuts the media, the retimed subtitles are already hastened
+        command = ["-ss", f"{hasten}", "-i", str(input_path), *subtitle_inputs]
+        command += flatten([["-map", f"0:a:{i}"] for i in indices])
+        command += ["-c:a", "copy", *subtitle_maps, "-strict", "experimental"]
+        command.append(str(output))
+
+        logger.info(f"adjusting playback speed of {input_path.name} by {hasten=}\n\toutputing to {output}")
+        run_ffmpeg_command(command)
     return [output]
 
 
@@ -133,6 +163,8 @@ def inspect(
     input_path: Path,
     *,
     force_detection: bool = False,
+    detection_threshold: float = LANGUAGE_DETECTION_THRESHOLD,
+    asr_backend: ASRBackendName = "whisper",
     output: Path | None = None,
     **_,
 ) -> list[Path]:
@@ -145,8 +177,11 @@ def inspect(
 
     Args:
         input_path: Path to the input video file.
-        force_detection: If ``True``, forces language detection even if metadata is already present.
-            Defaults to ``False``.
+        force_detection: If ``True``, forces language detection even if metadata or a cached detection result is
+            already present. Defaults to ``False``.
+        detection_threshold: Minimum confidence for a small Whisper model to decide an audio language before
+            escalating to a larger one.
+        asr_backend: Speech recognition backend used for audio language detection. Defaults to ``"whisper"``.
         output: Optional output file path or directory. If not provided, a default output path is generated.
         **_: Ignored keyword arguments (accepted for API compatibility).
 
@@ -167,29 +202,36 @@ def inspect(
     metadata = []
     found_metadata: dict[str, dict[str, str]] = {"audio": {}, "subtitle": {}}
 
+    # audio languages are detected straight from the container, all the tracks in one batch
+    audio_streams = AudioStream.from_file(input_path)
+    languages = find_audio_languages(
+        audio_streams,
+        threshold=detection_threshold,
+        force_detection=force_detection,
+        use_cache=not force_detection,
+        asr_backend=asr_backend,
+    )
+    for audio_idx, lang in enumerate(languages):
+        if lang != UNKNOWN_LANGUAGE:
+            logger.info(f"identified audio stream language as: {lang}")
+            metadata += [f"-metadata:s:a:{audio_idx}", f"language={lang}"]
+        found_metadata["audio"][str(audio_idx)] = lang
+
     with create_temp_dir() as temp_dir:
-        audio_idx = 0
-        subtitle_idx = 0
-        for f in dissect(input_path, skip_video=True, output=Path(temp_dir)):
-            if not is_audio(f) and not is_subs(f):
-                logger.warning(f"unrecognized stream type for extracted file: {f}")
+        subtitle_paths = extract(input_path, stream_type="subtitle", output=Path(temp_dir))
+        for subtitle_idx, f in enumerate(subtitle_paths):
+            if not is_subs(f):
+                # bitmap subtitles such as PGS or VobSub have no text to detect a language from
+                logger.warning(f"skipping language detection for non-text subtitle stream: {f.name}")
+                found_metadata["subtitle"][str(subtitle_idx)] = UNKNOWN_LANGUAGE
                 continue
-
-            stream = AudioStream.from_file(f)[0] if is_audio(f) else SubtitleStream.from_file(f)[0]
+            stream = SubtitleStream.from_file(f)[0]
             logger.info(f"found stream: {stream}")
-            lang = find_language(stream, force_detection=force_detection)
-            if isinstance(stream, AudioStream):
-                if lang != UNKNOWN_LANGUAGE:
-                    logger.info(f"identified audio stream language as: {lang}")
-                    metadata += [f"-metadata:s:a:{audio_idx}", f"language={lang}"]
-                found_metadata["audio"][str(audio_idx)] = lang
-                audio_idx += 1
-            else:
-                if lang != UNKNOWN_LANGUAGE:
-                    logger.info(f"identified subtitle stream language as: {lang}")
-                    metadata += [f"-metadata:s:s:{subtitle_idx}", f"language={lang}"]
-                found_metadata["subtitle"][str(subtitle_idx)] = lang
-                subtitle_idx += 1
+            lang = find_subs_language(stream, force_detection=force_detection, use_cache=not force_detection)
+            if lang != UNKNOWN_LANGUAGE:
+                logger.info(f"identified subtitle stream language as: {lang}")
+                metadata += [f"-metadata:s:s:{subtitle_idx}", f"language={lang}"]
+            found_metadata["subtitle"][str(subtitle_idx)] = lang
 
     if not metadata:
         logger.warning(f"no metadata updates found for {input_path}, skipping re-mux")
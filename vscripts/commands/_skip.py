@@ -0,0 +1,67 @@
+import logging
+from pathlib import Path
+
+from vscripts.constants import UNKNOWN_LANGUAGE
+from vscripts.data.heuristics import guess_language
+from vscripts.data.streams import SubtitleStream
+
+logger = logging.getLogger("vscripts")
+
+
+def subtitle_languages(input_path: Path) -> set[str]:
+    """
+    Collect the languages of the subtitle streams already present in a file, from their tags or titles.
+
+    Forced subtitle streams only carry signs and foreign dialogue, so they do not count as subtitles for their language.
+    Args:
+        input_path (Path): The media file to probe.
+    Returns:
+        set[str]: The ISO 639-3 codes of the known subtitle languages.
+    """
+    languages = set()
+    for stream in SubtitleStream.from_file(input_path):
+        if stream.forced:
+            logger.debug(f"ignoring forced subtitle stream {stream.index} of {input_path.name}")
+            continue
+        lang = stream.language if stream.language != UNKNOWN_LANGUAGE else guess_language(stream.tags)
+        if lang != UNKNOWN_LANGUAGE:
+            languages.add(lang)
+    logger.debug(f"found subtitle languages {languages} in {input_path.name}")
+    return languages
+
+
+def is_up_to_date(output_path: Path, input_path: Path) -> bool:
+    """
+    Check whether an output file was already generated from the current version of its input.
+
+    Args:
+        output_path (Path): The generated file.
+        input_path (Path): The file it was generated from.
+    Returns:
+        bool: True if `output_path` exists and is newer than `input_path`.
+    """
+    return output_path.is_file() and output_path.stat().st_mtime > input_path.stat().st_mtime
+
+
+def existing_output(
+    output_path: Path,
+    input_path: Path,
+    destination: Path | None = None,
+    source: Path | None = None,
+) -> Path | None:
+    """
+    Find an up to date output of a command where it ends up, which is not where it is written when the command runs in
+    a staging directory, e.g. the temporary directory of `do`.
+
+    Args:
+        output_path (Path): The file the command would write.
+        input_path (Path): The file it would be generated from.
+        destination (Path | None): The directory the outputs are moved to, or the final file, `output_path` if None.
+        source (Path | None): The original file `input_path` was derived from, `input_path` if None.
+    Returns:
+        Path | None: The up to date output, None if it has to be generated.
+    """
+    final_path = output_path
+    if destination is not None:
+        final_path = destination / output_path.name if destination.is_dir() else destination
+    return final_path if is_up_to_date(final_path, source or input_path) else None
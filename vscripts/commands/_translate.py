@@ -1,60 +1,101 @@
 import asyncio
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Literal
+from typing import Any, Literal
 
+import torch
 from googletrans import Translator
-from transformers import AutoModelForSeq2SeqLM, AutoTokenizer
 
 from pyutils.paths import create_temp_dir
 from vscripts.commands._extract import extract
+from vscripts.commands._skip import existing_output, subtitle_languages
 from vscripts.constants import INVISIBLE_SEPARATOR, ISO639_3_TO_1, UNKNOWN_LANGUAGE
 from vscripts.data.language import find_subs_language
 from vscripts.data.streams import SubtitleStream
-from vscripts.utils import get_output_file_path, parse_srt, rebuild_srt
+from vscripts.data.translation_memory import translate_with_memory
+from vscripts.utils import (
+    Cue,
+    get_output_file_path,
+    load_onnx_translation_model,
+    load_translation_model,
+    read_srt,
+    rebuild_srt,
+)
 
 logger = logging.getLogger("vscripts")
 
+# number of subtitle lines translated in a single forward pass by the local models
+_TRANSLATION_BATCH_SIZE = 32
+
+# Google rejects requests of ~5000 characters, keep every chunk well below that
+_GOOGLE_CHUNK_CHARS = 4500
+_GOOGLE_CONCURRENCY = 4
+_GOOGLE_RETRIES = 3
+_GOOGLE_BACKOFF = 1.0
+
 
 def translate_subtitles(
     input_path: Path,
-    to_language: str,
+    to_language: str | list[str],
     from_language: str | None = None,
     *,
     track: int | None = None,
-    mode: Literal["local", "google"] = "local",
+    translation_mode: Literal["local", "onnx", "google"] = "local",
+    force_detection: bool = False,
+    skip_existing: bool = False,
+    batch_size: int = _TRANSLATION_BATCH_SIZE,
     output: Path | None = None,
+    destination: Path | None = None,
+    source: Path | None = None,
     **_,
 ) -> list[Path]:
     """
-    Translate subtitle files from one language to another.
+    Translate subtitle files from one language to one or more others.
 
-    This function translates one or more subtitle streams from a media file into a specified target language. If no
+    This function translates one or more subtitle streams from a media file into the specified target languages. If no
     track is specified, all available subtitle streams are processed. The source language can be explicitly provided
-    or inferred from the subtitle stream when possible.
+    or inferred from the subtitle stream when possible. Each stream is extracted, detected and parsed once, however many
+    target languages are requested.
 
     Args:
         input_path: Path to the input media file containing subtitle streams.
-        to_language: Target language code for translation. Must be a valid ISO 639-3 code.
+        to_language: Target language code, or list of codes, for translation. Must be valid ISO 639-3 codes.
         from_language: Optional source language code. If provided, it must be a valid ISO 639-3 code. When omitted,
             the source language is inferred from the subtitle stream.
         track: Optional index of the subtitle track to translate. If ``None``, all available subtitle tracks are
             processed.
-        mode: Translation mode to use. Must be either ``"local"`` or ``"google"``.
+        translation_mode: Translation mode to use. ``"local"`` runs the Helsinki-NLP models with PyTorch, ``"onnx"``
+            runs them exported to ONNX with int8 weights (requires onnxruntime) and ``"google"`` uses Google Translate.
+        force_detection: If ``True``, cached language detection results are ignored and replaced by new ones.
+            Defaults to ``False``.
+        skip_existing: If ``True``, target languages the input file already has a subtitle stream in are not
+            translated, and outputs that exist and are newer than the input are not rebuilt.
+        batch_size: Number of subtitle lines translated together by the local models. Defaults to 32.
         output: Optional output file path or directory. If not provided, translated subtitle files are written to the
             input file’s directory.
+        destination: Where the outputs are moved once the command has run, a directory or the final file, when
+            `output` is a staging directory such as the temporary directory of `do`. Outputs already there and up
+            to date are not generated again with `skip_existing`.
+        source: The original file `input_path` was derived from, e.g. before `do` extracted one of its streams. Its
+            modification time decides whether an existing output is up to date.
         **_: Ignored keyword arguments (accepted for API compatibility).
 
     Returns:
-        A list of paths to the translated subtitle (`.srt`) files. One path is returned per processed subtitle stream.
+        A list of paths to the translated subtitle (`.srt`) files. One path is returned per processed subtitle stream
+        and target language, none if the input already has subtitles in every target language.
 
     Raises:
         ValueError: If `input_path` does not exist or is not a file.
         ValueError: If no subtitle streams are found in the input file.
         ValueError: If `track` is out of range for the available subtitle streams.
-        ValueError: If `to_language` is not a valid ISO 639-3 language code.
+        ValueError: If any `to_language` is not a valid ISO 639-3 language code.
         ValueError: If `from_language` is provided and is not a valid ISO
+        ValueError: If `batch_size` is lower than 1.
+        ValueError: If several target languages are given and `output` is not a directory.
     """
+    to_languages = [to_language] if isinstance(to_language, str) else list(dict.fromkeys(to_language))
+
     if not input_path.is_file():
         raise ValueError(f"invalid {input_path=}")
 
@@ -63,24 +104,49 @@ def translate_subtitles(
         raise ValueError(f"no subtitle streams found in {input_path=}")
     if track is not None and (track < 0 or track >= len(streams)):
         raise ValueError(f"invalid subtitle track index {track=} for {streams=}")
-    if len(to_language) != 3:
-        raise ValueError(f"invalid target language code '{to_language}', must be ISO 639-3")
+    if not to_languages or any(len(lang) != 3 for lang in to_languages):
+        raise ValueError(f"invalid target language codes {to_languages}, must be ISO 639-3")
     if from_language is not None and len(from_language) != 3:
         raise ValueError(f"invalid source language code '{from_language}', must be ISO 639-3")
+    if batch_size < 1:
+        raise ValueError(f"invalid {batch_size=}, must be at least 1")
+    if len(to_languages) > 1 and output is not None and not output.is_dir():
+        raise ValueError(f"output must be a directory when translating to several languages. Got {output=}")
+
+    if skip_existing:
+        existing = subtitle_languages(input_path)
+        for lang in [lang for lang in to_languages if lang in existing]:
+            logger.info(f"skipping translation, {input_path.name} already has '{lang}' subtitles")
+            to_languages.remove(lang)
+        if not to_languages:
+            return []
+
+    def inner_translate(index: int, from_lang: str | None) -> list[Path]:
+        output_paths = {
+            to_lang: get_output_file_path(
+                output or input_path.parent,
+                default_name=f"{input_path.stem}_track{index}_{to_lang}.srt",
+            )
+            for to_lang in to_languages
+        }
+        pending = list(to_languages)
+        if skip_existing:
+            for to_lang in to_languages:
+                existing = existing_output(output_paths[to_lang], input_path, destination, source)
+                if existing is not None:
+                    logger.info(f"skipping subtitle track {index}, {existing} is up to date")
+                    output_paths[to_lang] = existing
+                    pending.remove(to_lang)
+        if not pending:
+            return list(output_paths.values())
 
-    def inner_translate(index: int, to_lang: str, from_lang: str | None) -> Path:
         stream = streams[index]
         if index > 0:
             extracted = extract(input_path, track=index, stream_type="subtitle", output=Path(temp_dir))[0]
             stream = SubtitleStream.from_file(extracted)[0]
 
-        output_path = get_output_file_path(
-            output or input_path.parent,
-            default_name=f"{input_path.stem}_track{index}_{to_lang}.srt",
-        )
-
         if from_lang is None:
-            from_lang = find_subs_language(stream)
+            from_lang = find_subs_language(stream, use_cache=not force_detection)
             logger.info(f"inferred '{from_lang}' for {input_path.name} from audio stream")
 
         if from_lang == UNKNOWN_LANGUAGE:
@@ -90,50 +156,153 @@ def translate_subtitles(
         if len(from_lang) == 3:
             logger.debug(f"converting ISO 639-3 from_lang code '{from_lang=}' to ISO 639-1")
             from_lang = ISO639_3_TO_1.get(from_lang, from_lang)
-        if len(to_lang) == 3:
-            logger.debug(f"converting ISO 639-3 lang code '{to_lang=}' to ISO 639-1")
-            to_lang = ISO639_3_TO_1.get(to_lang, to_lang)
 
-        with stream.file_path.open("r", encoding="utf-8", errors="ignore") as f:
-            content = f.read()
+        cues = list(read_srt(stream.file_path))
 
-        logger.info(f"translating subtitles from '{from_lang=}' to '{to_lang=}'. {mode=}")
-        if mode == "google":
-            content = _translate_subtitles_googletrans(content, from_lang, to_lang)
-        else:
-            content = _translate_subtitles_helsinki(content, from_lang, to_lang)
+        def translate_to(to_lang: str) -> None:
+            lang = ISO639_3_TO_1.get(to_lang, to_lang)
+            logger.info(f"translating subtitles from '{from_lang=}' to '{lang=}'. {translation_mode=}")
+            if translation_mode == "google":
+                content = _translate_cues_googletrans(cues, from_lang, lang)
+            else:
+                onnx = translation_mode == "onnx"
+                content = _translate_cues_helsinki(cues, from_lang, lang, batch_size=batch_size, onnx=onnx)
 
-        logger.info(f"writing translated subtitles to {output_path}")
-        with output_path.open("w", encoding="utf-8") as f:
-            f.write(content)
+            logger.info(f"writing translated subtitles to {output_paths[to_lang]}")
+            with output_paths[to_lang].open("w", encoding="utf-8") as f:
+                f.write(content)
 
-        return output_path
+        # every target shares the parsed cues, remote ones are translated at once as they only wait on the network
+        if translation_mode == "google":
+            with ThreadPoolExecutor(max_workers=len(pending)) as executor:
+                list(executor.map(translate_to, pending))
+        else:
+            # a local model already uses the whole thread budget, running several at once would oversubscribe the CPU
+            for to_lang in pending:
+                translate_to(to_lang)
+
+        return list(output_paths.values())
 
     with create_temp_dir() as temp_dir:
         indices = range(len(streams)) if track is None else [track]
-        return [inner_translate(i, to_language, from_language) for i in indices]
+        return [path for i in indices for path in inner_translate(i, from_language)]
+
+
+def _translate_cues_helsinki(
+    cues: list[Cue],
+    from_language: str,
+    language: str,
+    batch_size: int = _TRANSLATION_BATCH_SIZE,
+    onnx: bool = False,
+) -> str:
+    def translate(lines: list[str]) -> list[str]:
+        if onnx:
+            tokenizer, model = load_onnx_translation_model(from_language, language)
+        else:
+            tokenizer, model = load_translation_model(from_language, language)
+        return _translate_lines(tokenizer, model, lines, batch_size)
+
+    # int8 weights can change a translation, so the exported models keep their own translation memory
+    backend = "helsinki-onnx" if onnx else "helsinki"
+
+    # only the text slots of each cue are translated, cue numbers and timestamps are rebuilt as they were
+    lines = [line for cue in cues for line in cue.lines]
+    return rebuild_srt(cues, translate_with_memory(lines, from_language, language, backend, translate))
 
 
-def _translate_subtitles_helsinki(content: str, from_language: str, language: str) -> str:
-    model_name = f"Helsinki-NLP/opus-mt-{from_language}-{language}"
-    logger.info(f"loading translation model '{model_name}'")
-    tokenizer = AutoTokenizer.from_pretrained(model_name)
-    model = AutoModelForSeq2SeqLM.from_pretrained(model_name)
+def _translate_lines(tokenizer: Any, model: Any, lines: list[str], batch_size: int) -> list[str]:
+    if not lines:
+        return []
 
-    for line in content.splitlines():
-        if line.strip().isdigit() or "-->" in line or not line.strip():
-            continue
-        inputs = tokenizer.encode(line, return_tensors="pt", truncation=True)
-        outputs = model.generate(inputs)
-        translated_line = tokenizer.decode(outputs[0], skip_special_tokens=True)
-        content = content.replace(line, translated_line)
+    # lines are batched by token length, so each padded batch wastes as little compute as possible on padding
+    lengths = [len(ids) for ids in tokenizer(lines, truncation=True)["input_ids"]]
+    order = sorted(range(len(lines)), key=lambda i: lengths[i])
 
-    return content
+    translated = [""] * len(lines)
+    with torch.inference_mode():
+        for start in range(0, len(order), batch_size):
+            indices = order[start : start + batch_size]
+            inputs = tokenizer([lines[i] for i in indices], return_tensors="pt", padding=True, truncation=True)
+            outputs = model.generate(**inputs)
+            for i, text in zip(indices, tokenizer.batch_decode(outputs, skip_special_tokens=True)):
+                translated[i] = text
+            logger.debug(f"translated {min(start + batch_size, len(order))}/{len(order)} lines")
+    return translated
 
 
-def _translate_subtitles_googletrans(content: str, from_language: str, language: str) -> str:
-    translator = Translator()
-    blocks = parse_srt(content)
-    text = INVISIBLE_SEPARATOR.join([line for b in blocks for line in b["lines"]])
-    translated = asyncio.run(translator.translate(text, src=from_language, dest=language))
-    return rebuild_srt(blocks, translated.text.split(INVISIBLE_SEPARATOR))
+def _translate_cues_googletrans(cues: list[Cue], from_language: str, language: str) -> str:
+    def translate(lines: list[str]) -> list[str]:
+        return asyncio.run(_translate_lines_google(Translator(), lines, from_language, language))
+
+    lines = [line for cue in cues for line in cue.lines]
+    return rebuild_srt(cues, translate_with_memory(lines, from_language, language, "google", translate))
+
+
+async def _translate_lines_google(
+    translator: Any,
+    lines: list[str],
+    from_language: str,
+    language: str,
+    max_chars: int = _GOOGLE_CHUNK_CHARS,
+    concurrency: int = _GOOGLE_CONCURRENCY,
+    retries: int = _GOOGLE_RETRIES,
+    backoff: float = _GOOGLE_BACKOFF,
+) -> list[str]:
+    """
+    Translate lines with Google, sending size-bounded chunks concurrently through a single client.
+
+    Each chunk is retried on its own with exponential backoff, so one failed request does not restart the whole file.
+    Args:
+        translator (Any): The googletrans client, or anything with the same async `translate` method.
+        lines (list[str]): The lines to translate.
+        from_language (str): The source language in ISO 639-1 format.
+        language (str): The target language in ISO 639-1 format.
+        max_chars (int): The maximum size of the text sent in a single request.
+        concurrency (int): The maximum number of requests in flight.
+        retries (int): How many times a failed chunk is sent again.
+        backoff (float): Seconds to wait before the first retry, doubled on every further one.
+    Returns:
+        list[str]: The translation of each line, in the same order as `lines`.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def translate_chunk(index: int, chunk: list[str]) -> list[str]:
+        attempt = 0
+        while True:
+            try:
+                async with semaphore:
+                    translated = await translator.translate(
+                        INVISIBLE_SEPARATOR.join(chunk), src=from_language, dest=language
+                    )
+                parts = translated.text.split(INVISIBLE_SEPARATOR)
+                if len(parts) != len(chunk):
+                    raise ValueError(f"expected {len(chunk)} lines, got {len(parts)}")
+                return parts
+            except Exception as e:
+                if attempt >= retries:
+                    raise
+                delay = backoff * 2**attempt
+                attempt += 1
+                logger.warning(f"google chunk {index} failed ({e}), retry {attempt}/{retries} in {delay:.1f}s")
+                # the semaphore is released while waiting, so other chunks keep going
+                await asyncio.sleep(delay)
+
+    chunks = _chunk_lines(lines, max_chars)
+    logger.info(f"translating {len(lines)} lines with google in {len(chunks)} chunks")
+    results = await asyncio.gather(*(translate_chunk(i, chunk) for i, chunk in enumerate(chunks)))
+    return [line for chunk in results for line in chunk]
+
+
+def _chunk_lines(lines: list[str], max_chars: int) -> list[list[str]]:
+    # a line longer than max_chars is sent alone, Google is left to decide whether it can handle it
+    chunks: list[list[str]] = []
+    size = 0
+    for line in lines:
+        line_size = len(line) + len(INVISIBLE_SEPARATOR)
+        if chunks and size + line_size <= max_chars:
+            chunks[-1].append(line)
+            size += line_size
+        else:
+            chunks.append([line])
+            size = line_size
+    return chunks
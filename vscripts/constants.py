@@ -11,6 +11,7 @@ PAL_RATE = 25.0
 NTSC_BROADCAST_RATE = 29.97
 
 UNKNOWN_LANGUAGE = "unk"
+LANGUAGE_DETECTION_THRESHOLD = 0.8
 INVISIBLE_SEPARATOR = "<§§§>"
 
 COMMAND_ATEMPO = "atempo"
@@ -1,10 +1,16 @@
 from .language import (
     find_audio_language as find_audio_language,
+    find_audio_languages as find_audio_languages,
     find_subs_language as find_subs_language,
     find_language as find_language,
     is_unknown_language as is_unknown_language,
 )
 
+from .heuristics import (
+    guess_language as guess_language,
+    normalize_language_code as normalize_language_code,
+)
+
 from .matcher import (
     NameMatcher as NameMatcher,
 )
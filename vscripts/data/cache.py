@@ -0,0 +1,107 @@
+import contextlib
+import hashlib
+import logging
+import sqlite3
+from collections.abc import Generator
+from dataclasses import dataclass
+from datetime import UTC, datetime
+from pathlib import Path
+
+from vscripts.data.streams import AudioStream, SubtitleStream
+from vscripts.utils import audio_packet_hashes, get_cache_dir
+
+logger = logging.getLogger("vscripts")
+
+_DB_NAME = "languages.sqlite3"
+# subtitle files are small, but there is no need to hash a whole caption dump to identify it
+_SUBS_HASH_BYTES = 1 << 20
+
+
+@dataclass
+class CachedLanguage:
+    language: str
+    confidence: float
+    detected_at: datetime
+
+
+def audio_fingerprints(streams: list[AudioStream]) -> list[str]:
+    """
+    Compute a content fingerprint for each audio stream (codec, duration and a hash of its first packets).
+
+    Packets are hashed stream-copied, so the same track keeps its fingerprint once extracted or remuxed.
+    Args:
+        streams (list[AudioStream]): The audio streams to fingerprint.
+    Returns:
+        list[str]: One fingerprint per stream, in the same order as `streams`.
+    """
+    hashes = audio_packet_hashes([(s.file_path, s.ffmpeg_index) for s in streams])
+    return [f"{s.codec_name}:{round(s.duration or 0)}:{h}" for s, h in zip(streams, hashes)]
+
+
+def subs_fingerprint(stream: SubtitleStream | Path) -> str:
+    """
+    Compute a content fingerprint for a subtitle file (codec, size and a hash of its content).
+
+    Args:
+        stream (SubtitleStream | Path): The subtitle stream or file to fingerprint.
+    Returns:
+        str: The fingerprint.
+    """
+    file_path = stream.file_path if isinstance(stream, SubtitleStream) else stream
+    codec = stream.codec_name if isinstance(stream, SubtitleStream) else file_path.suffix.lstrip(".").lower()
+    with file_path.open("rb") as f:
+        digest = hashlib.md5(f.read(_SUBS_HASH_BYTES)).hexdigest()
+    return f"{codec}:{file_path.stat().st_size}:{digest}"
+
+
+def get_cached_language(fingerprint: str, model: str, method: str) -> CachedLanguage | None:
+    """
+    Retrieve a previous language detection result.
+
+    Args:
+        fingerprint (str): The stream fingerprint.
+        model (str): The model (or model configuration) used for the detection.
+        method (str): The detection method, e.g. 'whisper' or 'fast_langdetect'.
+    Returns:
+        CachedLanguage | None: The cached result, or None if the stream was never detected with this model and method.
+    """
+    with _connect() as conn:
+        row = conn.execute(
+            "SELECT language, confidence, detected_at FROM languages WHERE key = ?",
+            (_key(fingerprint, model, method),),
+        ).fetchone()
+    if row is None:
+        return None
+    return CachedLanguage(language=row[0], confidence=row[1], detected_at=datetime.fromisoformat(row[2]))
+
+
+def set_cached_language(fingerprint: str, model: str, method: str, language: str, confidence: float) -> None:
+    """
+    Store a language detection result, replacing any previous one for the same stream, model and method.
+
+    Args:
+        fingerprint (str): The stream fingerprint.
+        model (str): The model (or model configuration) used for the detection.
+        method (str): The detection method, e.g. 'whisper' or 'fast_langdetect'.
+        language (str): The detected language code in ISO 639-3 format.
+        confidence (float): The probability of the detected language.
+    """
+    with _connect() as conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO languages (key, language, confidence, detected_at) VALUES (?, ?, ?, ?)",
+            (_key(fingerprint, model, method), language, confidence, datetime.now(UTC).isoformat()),
+        )
+
+
+def _key(fingerprint: str, model: str, method: str) -> str:
+    return f"{method}|{model}|{fingerprint}"
+
+
+@contextlib.contextmanager
+def _connect() -> Generator[sqlite3.Connection]:
+    with contextlib.closing(sqlite3.connect(get_cache_dir() / _DB_NAME)) as conn, conn:
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS languages "
+            "(key TEXT PRIMARY KEY, language TEXT NOT NULL, confidence REAL NOT NULL, detected_at TEXT NOT NULL)"
+        )
+        yield conn
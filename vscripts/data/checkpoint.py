@@ -0,0 +1,72 @@
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Any
+
+from vscripts.utils import ASRSegment, get_cache_dir
+
+logger = logging.getLogger("vscripts")
+
+_CHECKPOINTS_DIR = "checkpoints"
+
+TranscribedChunk = tuple[float, list[ASRSegment]]
+
+
+def load_checkpoint(key: dict[str, Any]) -> list[TranscribedChunk]:
+    """
+    Retrieve the chunks already transcribed by a previous, unfinished run.
+
+    Args:
+        key (dict[str, Any]): What identifies the transcription: audio fingerprint, backend, model, language and the
+            planned chunks. A checkpoint written with a different key is ignored.
+    Returns:
+        list[TranscribedChunk]: The (offset, segments) of each completed chunk, in order, empty if there is nothing
+            to resume.
+    """
+    path = _checkpoint_path(key)
+    if not path.is_file():
+        return []
+
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, json.JSONDecodeError) as e:
+        logger.warning(f"ignoring unreadable transcription checkpoint {path.name}: {e}")
+        return []
+    if data.get("key") != key:
+        logger.warning(f"ignoring transcription checkpoint {path.name} written for a different input")
+        return []
+    return [(offset, segments) for offset, segments in data["chunks"]]
+
+
+def save_checkpoint(key: dict[str, Any], chunks: list[TranscribedChunk]) -> None:
+    """
+    Persist the chunks transcribed so far, replacing the previous checkpoint for the same key.
+
+    Args:
+        key (dict[str, Any]): What identifies the transcription, see `load_checkpoint`.
+        chunks (list[TranscribedChunk]): The (offset, segments) of each completed chunk, in order.
+    """
+    path = _checkpoint_path(key)
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    # written aside and renamed, so a crash while saving never leaves a truncated checkpoint behind
+    temp_path = path.with_suffix(".tmp")
+    temp_path.write_text(json.dumps({"key": key, "chunks": chunks}), encoding="utf-8")
+    os.replace(temp_path, path)
+
+
+def clear_checkpoint(key: dict[str, Any]) -> None:
+    """
+    Remove the checkpoint of a finished transcription.
+
+    Args:
+        key (dict[str, Any]): What identifies the transcription, see `load_checkpoint`.
+    """
+    _checkpoint_path(key).unlink(missing_ok=True)
+
+
+def _checkpoint_path(key: dict[str, Any]) -> Path:
+    digest = hashlib.sha1(json.dumps(key, sort_keys=True).encode()).hexdigest()
+    return get_cache_dir() / _CHECKPOINTS_DIR / f"{digest}.json"
@@ -0,0 +1,133 @@
+import logging
+import re
+from pathlib import Path
+
+from vscripts.constants import ISO639_1_TO_3, ISO639_3_TO_1, UNKNOWN_LANGUAGE
+from vscripts.utils import is_video
+
+logger = logging.getLogger("vscripts")
+
+# ISO 639-2/B codes, still used by many muxers, and other common non-standard codes
+_ALTERNATIVE_CODES = {
+    "fre": "fra",
+    "ger": "deu",
+    "chi": "zho",
+    "esp": "spa",
+    "en-us": "eng",
+    "en-gb": "eng",
+    "es-es": "spa",
+    "es-419": "spa",
+    "es-mx": "spa",
+}
+
+# words found in track titles and file names, in any of the languages we usually handle
+_LANGUAGE_NAMES = {
+    "english": "eng",
+    "ingles": "eng",
+    "inglés": "eng",
+    "spanish": "spa",
+    "español": "spa",
+    "espanol": "spa",
+    "castellano": "spa",
+    "castilian": "spa",
+    "latino": "spa",
+    "latam": "spa",
+    "galician": "glg",
+    "galego": "glg",
+    "gallego": "glg",
+    "french": "fra",
+    "français": "fra",
+    "francais": "fra",
+    "frances": "fra",
+    "francés": "fra",
+    "german": "deu",
+    "deutsch": "deu",
+    "aleman": "deu",
+    "alemán": "deu",
+    "italian": "ita",
+    "italiano": "ita",
+    "japanese": "jpn",
+    "japones": "jpn",
+    "japonés": "jpn",
+    "chinese": "zho",
+    "mandarin": "zho",
+    "chino": "zho",
+}
+
+_UNKNOWN_VALUES = {"und", "unknown", "none", ""}
+_TOKEN_SEPARATORS = re.compile(r"[\s._\-\[\](){},;/|+]+")
+
+
+def normalize_language_code(code: str | None) -> str:
+    """
+    Normalize a language tag into an ISO 639-3 code.
+
+    Accepts ISO 639-1 codes ('en'), ISO 639-2/B codes ('fre'), regional variants ('es-419') and undetermined values.
+    Args:
+        code (str | None): The language tag to normalize.
+    Returns:
+        str: The ISO 639-3 code, the lowercased input if it is not a known code, or "unk" if undetermined.
+    """
+    if code is None:
+        return UNKNOWN_LANGUAGE
+    code = code.strip().lower().replace("_", "-")
+    if code in _UNKNOWN_VALUES or code == UNKNOWN_LANGUAGE:
+        return UNKNOWN_LANGUAGE
+    if code in _ALTERNATIVE_CODES:
+        return _ALTERNATIVE_CODES[code]
+    if len(code) == 2:
+        return ISO639_1_TO_3.get(code, code)
+    return code
+
+
+def guess_language(tags: dict[str, str], file_path: Path | None = None) -> str:
+    """
+    Guess the language of a stream from its metadata and file name, without running any detection model.
+
+    Sources are checked in order of reliability: the language tag, the track title, the handler name and, for files
+    holding a single extracted track, the file name. The first source that points to exactly one language wins.
+    Args:
+        tags (dict[str, str]): The stream tags as reported by ffprobe.
+        file_path (Path | None): The file holding the stream.
+    Returns:
+        str: The guessed language code in ISO 639-3 format, or "unk" if the hints are missing or ambiguous.
+    """
+    lowered = {k.lower(): v for k, v in tags.items()}
+
+    candidates: list[tuple[str, set[str]]] = [
+        ("language tag", {normalize_language_code(lowered.get("language"))} - {UNKNOWN_LANGUAGE}),
+        ("title", _languages_in_text(lowered.get("title", ""))),
+        ("handler name", _languages_in_text(lowered.get("handler_name", ""))),
+    ]
+    # the name of a video container says nothing about which of its tracks is which
+    if file_path is not None and not is_video(file_path):
+        candidates.append(("file name", _languages_in_file_name(file_path)))
+
+    for source, languages in candidates:
+        if len(languages) == 1:
+            language = languages.pop()
+            logger.debug(f"guessed language '{language}' from {source}")
+            return language
+        if len(languages) > 1:
+            logger.debug(f"ambiguous languages {languages} in {source}")
+    return UNKNOWN_LANGUAGE
+
+
+def _languages_in_text(text: str) -> set[str]:
+    languages = set()
+    for token in _TOKEN_SEPARATORS.split(text.lower()):
+        if token in _LANGUAGE_NAMES:
+            languages.add(_LANGUAGE_NAMES[token])
+        elif token in ISO639_3_TO_1 or token in _ALTERNATIVE_CODES:
+            languages.add(normalize_language_code(token))
+    return languages
+
+
+def _languages_in_file_name(file_path: Path) -> set[str]:
+    languages = _languages_in_text(file_path.stem)
+
+    # two letter codes are only trusted as the last suffix ('movie.es.srt'), anywhere else they are usually words
+    suffix = Path(file_path.stem).suffix.lstrip(".").lower()
+    if suffix in ISO639_1_TO_3:
+        languages.add(ISO639_1_TO_3[suffix])
+    return languages
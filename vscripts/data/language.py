@@ -1,34 +1,65 @@
 import logging
+from collections.abc import Sequence
 from pathlib import Path
-from typing import Any, Literal, cast
+from typing import Literal
 
-import whisper
+import numpy as np
 from fast_langdetect import detect
 
-from vscripts.constants import ISO639_1_TO_3, UNKNOWN_LANGUAGE
+from vscripts.constants import ISO639_1_TO_3, LANGUAGE_DETECTION_THRESHOLD, UNKNOWN_LANGUAGE
+from vscripts.data.cache import audio_fingerprints, get_cached_language, set_cached_language, subs_fingerprint
+from vscripts.data.heuristics import guess_language, normalize_language_code
 from vscripts.data.streams import AudioStream, SubtitleStream
-from vscripts.utils import WhisperModel, flatten_srt_text, load_whisper
+from vscripts.utils import (
+    DETECTION_WHISPER_MODELS,
+    SAMPLE_RATE,
+    ASRBackendName,
+    WhisperModel,
+    densest_speech_window,
+    flatten_cues,
+    get_asr_backend,
+    load_audio_tracks,
+    read_subtitles,
+)
 from vscripts.utils._utils import is_subs
 
 logger = logging.getLogger("vscripts")
 
 
-def find_language(stream: AudioStream | SubtitleStream, force_detection: bool = False) -> str:
+def find_language(
+    stream: AudioStream | SubtitleStream,
+    force_detection: bool = False,
+    threshold: float = LANGUAGE_DETECTION_THRESHOLD,
+    use_cache: bool = True,
+    asr_backend: ASRBackendName = "whisper",
+) -> str:
     """
     Detect the language of a given stream (audio or subtitle).
     Args:
         stream (AudioStream | SubtitleStream): The stream to analyze.
         force_detection (bool): Whether to force detection even if metadata exists.
+        threshold (float): Minimum probability for a whisper model to decide an audio language without escalating.
+        use_cache (bool): Whether to reuse a previous detection result for the same content. New results are
+            cached either way, so detecting without the cache refreshes it.
+        asr_backend (ASRBackendName): The speech recognition backend used for audio streams.
     Returns:
         str: The detected language code in ISO 639-3 format, or "unk" if undetermined.
     """
     if isinstance(stream, AudioStream):
-        return find_audio_language(stream, force_detection=force_detection)
+        return find_audio_language(
+            stream,
+            threshold=threshold,
+            force_detection=force_detection,
+            use_cache=use_cache,
+            asr_backend=asr_backend,
+        )
     elif isinstance(stream, SubtitleStream):
-        return find_subs_language(stream, force_detection=force_detection)
+        return find_subs_language(stream, force_detection=force_detection, use_cache=use_cache)
 
 
 _MODEL_MAP: dict[WhisperModel, Literal["lite", "full", "auto"]] = {
+    "tiny": "lite",
+    "base": "lite",
     "small": "lite",
     "medium": "auto",
     "large": "full",
@@ -36,77 +67,208 @@ _MODEL_MAP: dict[WhisperModel, Literal["lite", "full", "auto"]] = {
 }
 
 
+# characters of subtitle text given to the detection model
+_DETECTION_SAMPLE_CHARS = 32 * 1024
+
+
 def find_subs_language(
     stream: SubtitleStream | Path,
     model_name: WhisperModel = "medium",
     force_detection: bool = False,
     only_metadata: bool = False,
+    use_cache: bool = True,
 ) -> str:
     """
     Detect the language of a subtitle stream using its content.
+
+    Language tags, track titles and file names are checked first, the detection model only runs when they are
+    missing or ambiguous. Only SRT, ASS, SSA and WebVTT content can be detected, other formats are "unk".
     Args:
         stream (SubtitleStream | Path): The subtitle stream to analyze.
         model_name (FastLangDetectModel): The language detection model to use.
         force_detection (bool): Whether to force detection even if metadata exists.
         only_metadata (bool): If True, only use existing metadata without detection.
+        use_cache (bool): Whether to reuse a previous detection result for the same content, model and method. New
+            results are cached either way, so detecting without the cache refreshes it.
     Returns:
         str: The detected language code in ISO 639-3 format, or "unk" if undetermined.
     """
-    if isinstance(stream, Path) and (not stream.is_file() or not is_subs(stream)):
+    if isinstance(stream, Path) and not stream.is_file():
         raise ValueError(f"invalid {stream=}")
 
-    if not force_detection and isinstance(stream, SubtitleStream) and stream.language != UNKNOWN_LANGUAGE:
-        logger.info(f"using existing audio language metadata: {stream.language}")
-        return stream.language
+    if not force_detection:
+        lang = _language_hint(stream)
+        if lang != UNKNOWN_LANGUAGE:
+            logger.info(f"using subtitle language from metadata: {lang}")
+            return lang
 
     if only_metadata:
         logger.info(f"{only_metadata=}, skipping audio language detection")
         return UNKNOWN_LANGUAGE
 
     file_path = stream.file_path if isinstance(stream, SubtitleStream) else stream
-    with file_path.open("r", encoding="utf-8", errors="ignore") as f:
-        content = f.read()
+    if not is_subs(file_path):
+        # bitmap subtitles such as PGS or VobSub have no text to detect a language from
+        logger.warning(f"unsupported subtitle format for language detection: {file_path.name}")
+        return UNKNOWN_LANGUAGE
+
+    fingerprint = subs_fingerprint(stream)
+    if use_cache and (cached := get_cached_language(fingerprint, _MODEL_MAP[model_name], "fast_langdetect")):
+        logger.info(f"using cached subtitle language: {cached.language} ({cached.confidence:.2f})")
+        return cached.language
 
-    lang = None
-    t = detect(flatten_srt_text(content), model=_MODEL_MAP[model_name], k=3)
+    # the beginning of the file is enough to tell its language, the rest is never read
+    text = flatten_cues(read_subtitles(file_path), max_chars=_DETECTION_SAMPLE_CHARS)
+
+    lang, score = None, 0.0
+    t = detect(text, model=_MODEL_MAP[model_name], k=3)
     if len(t) > 0:
-        lang = str(t[0]["lang"])
-        if float(t[0]["score"]) < 0.8:
-            logger.warning(f"low confidence for detected subtitle language '{lang}': {t[0]['score']:.2f}")
+        lang, score = str(t[0]["lang"]), float(t[0]["score"])
+        if score < 0.8:
+            logger.warning(f"low confidence for detected subtitle language '{lang}': {score:.2f}")
     lang = _convert_lang_code(lang) if lang else UNKNOWN_LANGUAGE
     logger.info(f"determined subtitle language as: {lang}")
+    set_cached_language(fingerprint, _MODEL_MAP[model_name], "fast_langdetect", lang, score)
     return lang
 
 
+_DETECTION_WINDOW_SECONDS = 30.0
+# only the beginning of each track is decoded to look for a speech window, decoding whole films is too expensive
+_DETECTION_SCAN_SECONDS = 600.0
+
+
 def find_audio_language(
     stream: AudioStream,
-    model_name: WhisperModel = "medium",
+    models: Sequence[WhisperModel] = DETECTION_WHISPER_MODELS,
+    threshold: float = LANGUAGE_DETECTION_THRESHOLD,
     force_detection: bool = False,
+    use_cache: bool = True,
+    asr_backend: ASRBackendName = "whisper",
 ) -> str:
     """
     Detect the language of an audio stream using sampled segments.
+
+    The 30 seconds window with the most speech is used for detection, so intros, credits and silent scenes do not
+    drive the result.
     Args:
         stream (AudioStream): The audio stream to analyze.
-        model_name (WhisperModel): The Whisper model to use for transcription.
+        models (Sequence[WhisperModel]): The Whisper models to use for detection, from smallest to largest.
+        threshold (float): Minimum probability for a model to decide the language without escalating.
         force_detection (bool): Whether to force detection even if metadata exists.
+        use_cache (bool): Whether to reuse a previous detection result for the same content, models and threshold.
+            New results are cached either way, so detecting without the cache refreshes it.
+        asr_backend (ASRBackendName): The speech recognition backend running the models.
     Returns:
         str: The detected language code in ISO 639-3 format, or "unk"
     """
-    if not force_detection and stream.language != UNKNOWN_LANGUAGE:
-        logger.info(f"using existing audio language metadata: {stream.language}")
-        return stream.language
+    return find_audio_languages(
+        [stream],
+        models=models,
+        threshold=threshold,
+        force_detection=force_detection,
+        use_cache=use_cache,
+        asr_backend=asr_backend,
+    )[0]
+
+
+def find_audio_languages(
+    streams: list[AudioStream],
+    models: Sequence[WhisperModel] = DETECTION_WHISPER_MODELS,
+    threshold: float = LANGUAGE_DETECTION_THRESHOLD,
+    force_detection: bool = False,
+    use_cache: bool = True,
+    asr_backend: ASRBackendName = "whisper",
+) -> list[str]:
+    """
+    Detect the language of several audio streams with a single decode and a single batched model pass per tier.
+
+    The sample windows of all the streams that need detection are decoded in one ffmpeg invocation, and their mel
+    spectrograms are stacked into one batch for Whisper language detection. The smallest model runs first, and only
+    the streams whose top language probability is below `threshold` are escalated to the next model. Streams whose
+    language tag, track title or file name already give away the language are not decoded at all.
+    Args:
+        streams (list[AudioStream]): The audio streams to analyze, they can belong to one or several files.
+        models (Sequence[WhisperModel]): The Whisper models to use for detection, from smallest to largest.
+        threshold (float): Minimum probability for a model to decide the language without escalating.
+        force_detection (bool): Whether to force detection even if metadata exists.
+        use_cache (bool): Whether to reuse previous detection results for the same content, models and threshold.
+            New results are cached either way, so detecting without the cache refreshes it.
+        asr_backend (ASRBackendName): The speech recognition backend running the models.
+    Returns:
+        list[str]: The detected language codes in ISO 639-3 format (or "unk"), in the same order as `streams`.
+    """
+    if len(models) == 0:
+        raise ValueError("at least one whisper model is required for audio language detection")
 
-    model = load_whisper(model_name)
-    audio = whisper.load_audio(str(stream.file_path))
-    audio = whisper.pad_or_trim(audio)
+    languages = [UNKNOWN_LANGUAGE] * len(streams)
+    pending: list[int] = []
+    for i, stream in enumerate(streams):
+        lang = _language_hint(stream) if not force_detection else UNKNOWN_LANGUAGE
+        if lang != UNKNOWN_LANGUAGE:
+            logger.info(f"using audio language from metadata: {lang}")
+            languages[i] = lang
+        else:
+            pending.append(i)
 
-    mel = whisper.log_mel_spectrogram(audio, n_mels=model.dims.n_mels).to(model.device)
+    if not pending:
+        return languages
 
-    _, probs = cast(tuple[Any, dict[str, float]], model.detect_language(mel))
-    logger.debug(f"found audio languages: {probs}")
-    lang = _convert_lang_code(max(probs.items(), key=lambda x: x[1])[0])
-    logger.info(f"determined audio language as: {lang}")
-    return lang
+    # cached results are looked up before decoding anything or loading any model
+    model_key = f"{asr_backend}:{'+'.join(models)}@{threshold}"
+    fingerprints = dict(zip(pending, audio_fingerprints([streams[i] for i in pending])))
+    if use_cache:
+        uncached: list[int] = []
+        for i in pending:
+            cached = get_cached_language(fingerprints[i], model_key, "whisper")
+            if cached is None:
+                uncached.append(i)
+                continue
+            logger.info(f"using cached audio language: {cached.language} ({cached.confidence:.2f})")
+            languages[i] = cached.language
+        pending = uncached
+        if not pending:
+            return languages
+
+    audios = load_audio_tracks(
+        [(streams[i].file_path, streams[i].ffmpeg_index) for i in pending],
+        duration=_DETECTION_SCAN_SECONDS,
+    )
+
+    windows: dict[int, np.ndarray] = {}
+    for i, audio in zip(pending, audios):
+        start = densest_speech_window(audio, window_seconds=_DETECTION_WINDOW_SECONDS)
+        logger.debug(f"using audio window starting at {start / SAMPLE_RATE:.2f}s for language detection")
+        windows[i] = audio[start : start + int(_DETECTION_WINDOW_SECONDS * SAMPLE_RATE)]
+
+    backend = get_asr_backend(asr_backend)
+    for tier, model_name in enumerate(models, start=1):
+        probs = backend.detect_language(model_name, [windows[i] for i in pending])
+
+        escalated: list[int] = []
+        for i, stream_probs in zip(pending, probs):
+            logger.debug(f"found audio languages: {stream_probs}")
+            lang, score = max(stream_probs.items(), key=lambda x: x[1])
+            languages[i] = _convert_lang_code(lang)
+            if score < threshold and tier < len(models):
+                logger.info(f"low confidence for audio language '{languages[i]}' ({score:.2f}) with '{model_name}'")
+                escalated.append(i)
+                continue
+            logger.info(f"determined audio language as: {languages[i]} ({score:.2f}, tier {tier} '{model_name}')")
+            set_cached_language(fingerprints[i], model_key, "whisper", languages[i], score)
+
+        if not escalated:
+            break
+        pending = escalated
+    return languages
+
+
+def _language_hint(stream: AudioStream | SubtitleStream | Path) -> str:
+    # language tags, titles and file names are checked before running any detection model
+    if isinstance(stream, Path):
+        return guess_language({}, stream)
+    if stream.language != UNKNOWN_LANGUAGE:
+        return stream.language
+    return guess_language(stream.tags, stream.file_path)
 
 
 def is_unknown_language(lang: str) -> bool:
@@ -117,6 +279,6 @@ def _convert_lang_code(lang: str) -> str:
     if lang is None or len(lang) == 3:
         return lang
     if len(lang) == 2 and lang in ISO639_1_TO_3:
-        return ISO639_1_TO_3.get(lang, UNKNOWN_LANGUAGE)
+        return normalize_language_code(lang)
     logger.warning(f"unknown ISO 639-1 code: {lang}")
     return lang
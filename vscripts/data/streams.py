@@ -6,7 +6,8 @@ from datetime import datetime, timedelta
 from pathlib import Path
 from typing import Any, Literal
 
-from vscripts.constants import HDR_COLOR_TRANSFERS, ISO639_1_TO_3, UNKNOWN_LANGUAGE
+from vscripts.constants import HDR_COLOR_TRANSFERS, UNKNOWN_LANGUAGE
+from vscripts.data.heuristics import normalize_language_code
 from vscripts.utils import run_ffprobe_command
 
 logger = logging.getLogger("vscripts")
@@ -123,12 +124,7 @@ class AudioStream(Stream):
             duration_time = data["tags"]["DURATION"]
             duration = _parse_duration(duration_time)
 
-        lang = data.get("tags", {}).get("language", UNKNOWN_LANGUAGE)
-        if len(lang) < 3:
-            logger.debug(f"found audio language tag: {lang}")
-            ISO639_1_TO_3.get(lang, UNKNOWN_LANGUAGE)
-        if lang in {"und", "unknown", "none", ""}:
-            lang = UNKNOWN_LANGUAGE
+        lang = normalize_language_code(data.get("tags", {}).get("language"))
 
         return AudioStream(
             _index=data["index"],
@@ -170,20 +166,17 @@ class AudioStream(Stream):
 class SubtitleStream(Stream):
     language: str = UNKNOWN_LANGUAGE
     default: bool = False
+    forced: bool = False
     generated: bool = False
 
     @classmethod
     def from_dict(cls, data: dict[str, Any]) -> "SubtitleStream":
-        lang = data.get("tags", {}).get("language", UNKNOWN_LANGUAGE)
-        if len(lang) < 3:
-            logger.debug(f"found audio language tag: {lang}")
-            ISO639_1_TO_3.get(lang, UNKNOWN_LANGUAGE)
-        if lang in {"und", "unknown", "none", ""}:
-            lang = UNKNOWN_LANGUAGE
+        lang = normalize_language_code(data.get("tags", {}).get("language"))
 
         return SubtitleStream(
             _index=data["index"],
             language=lang,
+            forced=bool(data.get("disposition", {}).get("forced", 0)),
             codec_name=data["codec_name"],
             codec_type=data["codec_type"],
             tags=data.get("tags", {}),
@@ -251,6 +244,8 @@ def _ffprobe_streams(file_path: Path, stream_type: Literal["v", "a", "s"] | None
         "format=format_name",
         "-show_entries",
         "stream_tags",
+        "-show_entries",
+        "stream_disposition=default,forced",
         "-of",
         "json",
     ]
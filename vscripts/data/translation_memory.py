@@ -0,0 +1,109 @@
+import contextlib
+import logging
+import sqlite3
+from collections.abc import Callable, Generator
+
+from vscripts.utils import get_cache_dir
+
+logger = logging.getLogger("vscripts")
+
+_DB_NAME = "translations.sqlite3"
+# stay well below the SQLite limit of host parameters per statement
+_LOOKUP_CHUNK = 500
+
+
+def normalize_text(text: str) -> str:
+    """Normalize a subtitle line for translation memory lookups: collapsed whitespace, no surrounding spaces."""
+    return " ".join(text.split())
+
+
+def get_translations(from_language: str, to_language: str, backend: str, texts: list[str]) -> dict[str, str]:
+    """
+    Retrieve the stored translations of some normalized lines.
+
+    Args:
+        from_language (str): The source language.
+        to_language (str): The target language.
+        backend (str): The translation backend, e.g. 'helsinki' or 'google'.
+        texts (list[str]): The normalized lines to look up.
+    Returns:
+        dict[str, str]: The translation of every line found in the memory.
+    """
+    found: dict[str, str] = {}
+    with _connect() as conn:
+        for start in range(0, len(texts), _LOOKUP_CHUNK):
+            chunk = texts[start : start + _LOOKUP_CHUNK]
+            rows = conn.execute(
+                "SELECT text, translation FROM translations WHERE src = ? AND tgt = ? AND backend = ? "
+                f"AND text IN ({', '.join('?' * len(chunk))})",
+                (from_language, to_language, backend, *chunk),
+            ).fetchall()
+            found.update(rows)
+    return found
+
+
+def set_translations(from_language: str, to_language: str, backend: str, translations: dict[str, str]) -> None:
+    """
+    Store new translations, replacing any previous ones for the same lines.
+
+    Args:
+        from_language (str): The source language.
+        to_language (str): The target language.
+        backend (str): The translation backend, e.g. 'helsinki' or 'google'.
+        translations (dict[str, str]): The translation of each normalized line.
+    """
+    with _connect() as conn:
+        conn.executemany(
+            "INSERT OR REPLACE INTO translations (src, tgt, backend, text, translation) VALUES (?, ?, ?, ?, ?)",
+            [(from_language, to_language, backend, text, t) for text, t in translations.items()],
+        )
+
+
+def translate_with_memory(
+    lines: list[str],
+    from_language: str,
+    to_language: str,
+    backend: str,
+    translate: Callable[[list[str]], list[str]],
+) -> list[str]:
+    """
+    Translate subtitle lines, sending each distinct line to the backend only once and only if it was never
+    translated before.
+
+    Lines are normalized and de-duplicated, the translation memory is consulted, and only the missing lines are passed
+    to `translate`. Its results are written back to the memory.
+    Args:
+        lines (list[str]): The lines to translate.
+        from_language (str): The source language.
+        to_language (str): The target language.
+        backend (str): The translation backend, e.g. 'helsinki' or 'google'.
+        translate (Callable[[list[str]], list[str]]): Translates a list of lines with the backend, keeping the order.
+    Returns:
+        list[str]: The translation of each line, in the same order as `lines`.
+    """
+    normalized = [normalize_text(line) for line in lines]
+    unique = list(dict.fromkeys(normalized))
+    known = get_translations(from_language, to_language, backend, unique)
+    missing = [text for text in unique if text not in known]
+
+    hits = len(unique) - len(missing)
+    logger.info(
+        f"translation memory: {len(lines)} lines, {len(unique)} unique ({1 - len(unique) / max(len(lines), 1):.0%} "
+        f"duplicated), {hits} hits ({hits / max(len(unique), 1):.0%}), {len(missing)} to translate"
+    )
+
+    if missing:
+        translated = dict(zip(missing, translate(missing), strict=True))
+        set_translations(from_language, to_language, backend, translated)
+        known.update(translated)
+    return [known[text] for text in normalized]
+
+
+@contextlib.contextmanager
+def _connect() -> Generator[sqlite3.Connection]:
+    with contextlib.closing(sqlite3.connect(get_cache_dir() / _DB_NAME)) as conn, conn:
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS translations (src TEXT NOT NULL, tgt TEXT NOT NULL, backend TEXT NOT NULL, "
+            "text TEXT NOT NULL, translation TEXT NOT NULL, PRIMARY KEY (src, tgt, backend, text))"
+        )
+        yield conn
@@ -6,6 +6,7 @@ from vscripts import cli
 from vscripts.reporters.errors import error_handler
 from vscripts.reporters.logs import logging_handler
 from vscripts.reporters.output import print_logo
+from vscripts.utils import configure_threads
 
 
 def main() -> int:
@@ -35,19 +36,30 @@ def main() -> int:
             parser.print_help()
             return 1
 
+        configure_threads(args.cores)
+
         if args.command == "do":
             return cli.cmd_do(
                 Path(args.path),
                 actions=args.actions,
                 output=Path(args.output) if args.output else None,
                 force_detection=args.force_detection,
+                detection_threshold=args.detection_threshold,
+                asr_backend=args.asr_backend,
                 translation_mode=args.translation_mode,
+                workers=args.workers,
+                skip_existing=args.skip_existing,
+                batch_size=args.translation_batch_size,
+                preload_translations=args.preload_translation,
             )
         elif args.command == "merge":
             return cli.cmd_merge(
                 Path(args.path),
                 Path(args.data),
                 output=Path(args.output) if args.output else None,
+                force_detection=args.force_detection,
+                detection_threshold=args.detection_threshold,
+                asr_backend=args.asr_backend,
             )
         else:
             parser.print_help()
@@ -57,13 +69,39 @@ def main() -> int:
 def _cmd_do(parser: argparse.ArgumentParser) -> argparse.ArgumentParser:
     parser.add_argument("path", help="path to be handled")
     parser.add_argument("actions", type=str, nargs="*", help="list of actions to be ran")
-    parser.add_argument("--force-detection", action="store_true", help="Force overwrite of metadata.", default=False)
+    _set_detection(parser)
     parser.add_argument(
         "--translation-mode",
-        choices=["google", "local"],
-        help="Choose translation backend: 'google' or 'local'.",
+        choices=["google", "local", "onnx"],
+        help="Choose translation backend: 'google', 'local' or 'onnx' (local models exported to int8 ONNX).",
         default="local",
     )
+    parser.add_argument(
+        "--skip-existing",
+        action="store_true",
+        help="Skip generate-subs and translate for languages that already have subtitles or up to date outputs.",
+        default=False,
+    )
+    parser.add_argument(
+        "--translation-batch-size",
+        type=int,
+        help="Number of subtitle lines translated together by the local translation models.",
+        default=32,
+    )
+    parser.add_argument(
+        "--preload-translation",
+        type=str,
+        nargs="*",
+        metavar="FROM-TO",
+        help="Language pairs (e.g. 'en-es') whose local translation models are loaded before running the actions.",
+        default=None,
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        help="Number of worker processes used to transcribe each audio track when generating subtitles.",
+        default=1,
+    )
     parser.set_defaults(func=cli.cmd_do)
 
     _set_io(parser)
@@ -75,10 +113,39 @@ def _cmd_merge(parser: argparse.ArgumentParser) -> argparse.ArgumentParser:
     parser.add_argument("data", help="path with the extra data to merge")
     parser.set_defaults(func=cli.cmd_merge)
 
+    _set_detection(parser)
     _set_io(parser)
     return parser
 
 
 def _set_io(parser: argparse.ArgumentParser) -> argparse.ArgumentParser:
     parser.add_argument("-o", "--output", type=str, help="Output file name.", default=None)
+    parser.add_argument(
+        "--cores",
+        type=int,
+        help="Number of cores this process may use for torch and ffmpeg threads (defaults to $VSCRIPTS_CORES or all).",
+        default=None,
+    )
+    return parser
+
+
+def _set_detection(parser: argparse.ArgumentParser) -> argparse.ArgumentParser:
+    parser.add_argument(
+        "--force-detection",
+        action="store_true",
+        help="Force overwrite of metadata and refresh cached language detections.",
+        default=False,
+    )
+    parser.add_argument(
+        "--detection-threshold",
+        type=float,
+        help="Minimum confidence for a small whisper model to decide an audio language before escalating.",
+        default=C.LANGUAGE_DETECTION_THRESHOLD,
+    )
+    parser.add_argument(
+        "--asr-backend",
+        choices=["whisper", "whisper-int8"],
+        help="Speech recognition backend: 'whisper' or 'whisper-int8' (quantized, for CPU-only machines).",
+        default="whisper",
+    )
     return parser
@@ -9,6 +9,7 @@ from ._utils import (
     get_output_file_path as get_output_file_path,
     ffmpeg_subtitle_codec_for_suffix as ffmpeg_subtitle_codec_for_suffix,
     ffmpeg_audio_codec_for_suffix as ffmpeg_audio_codec_for_suffix,
+    ffmpeg_audio_encoder_args as ffmpeg_audio_encoder_args,
     suffix_by_codec as suffix_by_codec,
     run_ffprobe_command as run_ffprobe_command,
     run_ffmpeg_command as run_ffmpeg_command,
@@ -21,14 +22,77 @@ from ._utils import (
 )
 
 from ._srt import (
+    Cue as Cue,
+    SrtWriter as SrtWriter,
     to_srt_timestamp as to_srt_timestamp,
     parse_srt as parse_srt,
+    format_srt as format_srt,
     rebuild_srt as rebuild_srt,
     flatten_srt_text as flatten_srt_text,
+    flatten_cues as flatten_cues,
+    iter_srt as iter_srt,
+    read_srt as read_srt,
     count_srt_entries as count_srt_entries,
 )
 
+from ._subtitles import (
+    iter_ass as iter_ass,
+    iter_vtt as iter_vtt,
+    read_subtitles as read_subtitles,
+    read_subtitle_timings as read_subtitle_timings,
+    subtitle_coverage as subtitle_coverage,
+)
+
+from ._retime import (
+    retime_cues as retime_cues,
+    retime_timestamps as retime_timestamps,
+)
+
 from ._whisper import (
+    DETECTION_WHISPER_MODELS as DETECTION_WHISPER_MODELS,
     WhisperModel as WhisperModel,
     load_whisper as load_whisper,
 )
+
+from ._translation import (
+    load_translation_model as load_translation_model,
+    preload_translation_models as preload_translation_models,
+)
+
+from ._onnx_translation import (
+    OnnxMarianModel as OnnxMarianModel,
+    load_onnx_translation_model as load_onnx_translation_model,
+)
+
+from ._resources import (
+    ThreadBudget as ThreadBudget,
+    configure_threads as configure_threads,
+    get_thread_budget as get_thread_budget,
+)
+
+from ._protocol import (
+    ASRBackend as ASRBackend,
+    ASRBackendName as ASRBackendName,
+    ASRSegment as ASRSegment,
+)
+
+from ._asr import (
+    get_asr_backend as get_asr_backend,
+)
+
+from ._vad import (
+    SAMPLE_RATE as SAMPLE_RATE,
+    speech_frames as speech_frames,
+    speech_segments as speech_segments,
+    densest_speech_window as densest_speech_window,
+)
+
+from ._audio import (
+    audio_packet_hashes as audio_packet_hashes,
+    load_audio_track as load_audio_track,
+    load_audio_tracks as load_audio_tracks,
+)
+
+from ._cache import (
+    get_cache_dir as get_cache_dir,
+)
@@ -0,0 +1,74 @@
+from typing import Any, cast
+
+import numpy as np
+import torch
+import whisper
+from whisper import Whisper
+
+from ._protocol import ASRBackend, ASRBackendName, ASRSegment
+from ._whisper import WhisperModel, load_whisper
+
+
+class WhisperBackend:
+    """openai-whisper models at full precision, on whatever device torch picks."""
+
+    name: ASRBackendName = "whisper"
+    quantized = False
+
+    def load(self, model: WhisperModel) -> None:
+        self._model(model)
+
+    def detect_language(self, model: WhisperModel, audios: list[np.ndarray]) -> list[dict[str, float]]:
+        whisper_model = self._model(model)
+        n_mels = whisper_model.dims.n_mels
+        mels = [whisper.log_mel_spectrogram(whisper.pad_or_trim(audio), n_mels=n_mels) for audio in audios]
+        batch = torch.stack(mels).to(whisper_model.device)
+        _, probs = cast(tuple[Any, list[dict[str, float]]], whisper_model.detect_language(batch))
+        return probs
+
+    def transcribe(
+        self,
+        model: WhisperModel,
+        audio: np.ndarray,
+        language: str,
+        clip_timestamps: list[float],
+    ) -> list[ASRSegment]:
+        options: dict[str, Any] = {"fp16": False} if self.quantized else {}
+        transcription = self._model(model).transcribe(
+            audio,
+            language=language,
+            clip_timestamps=clip_timestamps,
+            **options,
+        )
+        segments: list[dict[str, Any]] = transcription.get("segments", [])  # type: ignore
+        return [{"start": seg["start"], "end": seg["end"], "text": seg["text"]} for seg in segments]
+
+    def _model(self, model: WhisperModel) -> Whisper:
+        return load_whisper(model, quantized=self.quantized)
+
+
+class QuantizedWhisperBackend(WhisperBackend):
+    """openai-whisper models on CPU with their linear layers dynamically quantized to int8."""
+
+    name: ASRBackendName = "whisper-int8"
+    quantized = True
+
+
+_ASR_BACKENDS: dict[ASRBackendName, type[WhisperBackend]] = {
+    "whisper": WhisperBackend,
+    "whisper-int8": QuantizedWhisperBackend,
+}
+
+
+def get_asr_backend(name: ASRBackendName = "whisper") -> ASRBackend:
+    """
+    Build the speech recognition backend with the given name.
+
+    Args:
+        name (ASRBackendName): 'whisper' (default) or 'whisper-int8'.
+    Returns:
+        ASRBackend: The backend.
+    """
+    if name not in _ASR_BACKENDS:
+        raise ValueError(f"invalid ASR backend '{name}', must be one of {list(_ASR_BACKENDS)}")
+    return _ASR_BACKENDS[name]()
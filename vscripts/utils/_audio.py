@@ -0,0 +1,103 @@
+import logging
+import subprocess
+from pathlib import Path
+
+import numpy as np
+
+from pyutils.paths import create_temp_dir
+
+from ._utils import ffmpeg_command, run_ffmpeg_command
+from ._vad import SAMPLE_RATE
+
+logger = logging.getLogger("vscripts")
+
+
+def load_audio_track(file_path: Path, track: int = 0, sample_rate: int = SAMPLE_RATE) -> np.ndarray:
+    """
+    Decode one audio track of a media file into mono PCM, streamed from ffmpeg through a pipe.
+
+    The track is read straight from its container, there is no need to extract it to a file first.
+
+    Args:
+        file_path (Path): The media file holding the track.
+        track (int): The ffmpeg audio index of the track (the N in `0:a:N`).
+        sample_rate (int): Output sample rate.
+    Returns:
+        np.ndarray: Float32 samples in the [-1, 1] range.
+    """
+    command = ["-i", str(file_path), "-map", f"0:a:{track}", "-ac", "1", "-ar", str(sample_rate), "-f", "s16le"]
+    full_command = ffmpeg_command(command + ["pipe:1"])
+    logger.debug(full_command)
+    result = subprocess.run(full_command, capture_output=True, check=True)
+    return np.frombuffer(result.stdout, dtype=np.int16).astype(np.float32) / 32768.0
+
+
+def load_audio_tracks(
+    sources: list[tuple[Path, int]],
+    duration: float | None = None,
+    sample_rate: int = SAMPLE_RATE,
+) -> list[np.ndarray]:
+    """
+    Decode several audio tracks into mono PCM using a single ffmpeg invocation.
+
+    Every (file, track) pair gets its own PCM output, so all the tracks of a container (or of several containers) are
+    demuxed and decoded in one pass instead of one ffmpeg process per track.
+
+    Args:
+        sources (list[tuple[Path, int]]): Pairs of media file and ffmpeg audio index (the N in `0:a:N`).
+        duration (float | None): Maximum number of seconds to decode from the start of each track.
+        sample_rate (int): Output sample rate.
+    Returns:
+        list[np.ndarray]: Float32 samples in the [-1, 1] range, in the same order as `sources`.
+    """
+    if not sources:
+        return []
+
+    inputs = list(dict.fromkeys(path for path, _ in sources))
+    command: list[str] = []
+    for path in inputs:
+        command += ["-i", str(path)]
+
+    with create_temp_dir() as temp_dir:
+        outputs = []
+        for i, (path, track) in enumerate(sources):
+            output = Path(temp_dir) / f"track_{i}.pcm"
+            command += ["-map", f"{inputs.index(path)}:a:{track}", "-ac", "1", "-ar", str(sample_rate), "-f", "s16le"]
+            if duration is not None:
+                command += ["-t", str(duration)]
+            command.append(str(output))
+            outputs.append(output)
+
+        logger.debug(f"decoding {len(sources)} audio tracks from {len(inputs)} files")
+        run_ffmpeg_command(command, outputs=[str(output) for output in outputs])
+        return [np.fromfile(output, dtype=np.int16).astype(np.float32) / 32768.0 for output in outputs]
+
+
+def audio_packet_hashes(sources: list[tuple[Path, int]], packets: int = 256) -> list[str]:
+    """
+    Hash the first packets of several audio tracks without decoding them, using a single ffmpeg invocation.
+
+    Args:
+        sources (list[tuple[Path, int]]): Pairs of media file and ffmpeg audio index (the N in `0:a:N`).
+        packets (int): Number of packets to hash from the start of each track.
+    Returns:
+        list[str]: MD5 hex digests of the stream-copied packets, in the same order as `sources`.
+    """
+    if not sources:
+        return []
+
+    inputs = list(dict.fromkeys(path for path, _ in sources))
+    command: list[str] = []
+    for path in inputs:
+        command += ["-i", str(path)]
+
+    with create_temp_dir() as temp_dir:
+        outputs = []
+        for i, (path, track) in enumerate(sources):
+            output = Path(temp_dir) / f"track_{i}.md5"
+            command += ["-map", f"{inputs.index(path)}:a:{track}", "-c", "copy", "-frames:a", str(packets)]
+            command += ["-f", "md5", str(output)]
+            outputs.append(output)
+
+        run_ffmpeg_command(command, outputs=[str(output) for output in outputs])
+        return [output.read_text().strip().removeprefix("MD5=") for output in outputs]
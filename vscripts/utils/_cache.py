@@ -0,0 +1,20 @@
+import os
+from pathlib import Path
+
+
+def get_cache_dir() -> Path:
+    """
+    Resolve the directory where vscripts keeps its persistent caches, creating it if needed.
+
+    The location can be overridden with the `VSCRIPTS_CACHE_DIR` environment variable, otherwise it follows the XDG
+    base directory spec (`$XDG_CACHE_HOME/vscripts`, defaulting to `~/.cache/vscripts`).
+    Returns:
+        Path: The cache directory.
+    """
+    path = os.environ.get("VSCRIPTS_CACHE_DIR")
+    if path:
+        cache_dir = Path(path)
+    else:
+        cache_dir = Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache") / "vscripts"
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    return cache_dir
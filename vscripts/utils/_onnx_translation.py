@@ -0,0 +1,318 @@
+import json
+import logging
+import shutil
+import tempfile
+import time
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import torch
+from torch import nn
+from transformers import AutoModelForSeq2SeqLM, AutoTokenizer
+
+from ._cache import get_cache_dir
+from ._resources import get_thread_budget
+from ._translation import _add_loaded_translation_model, _get_loaded_translation_model
+
+logger = logging.getLogger("vscripts")
+
+_ONNX_DIR = "onnx"
+_OPSET = 17
+
+
+class OnnxMarianModel:
+    """
+    A MarianMT model exported to ONNX, decoded greedily or with beam search on onnxruntime.
+
+    The decoder is exported without key/value caches, so every step re-runs it over the whole prefix. Subtitle lines
+    are only a few dozen tokens long, which keeps that cheaper than carrying the ~50 cache tensors of a Marian decoder
+    through the session.
+    """
+
+    def __init__(self, directory: Path, encoder: Any, decoder: Any):
+        metadata = json.loads((directory / "metadata.json").read_text(encoding="utf-8"))
+        self.encoder = encoder
+        self.decoder = decoder
+        self.decoder_start_token_id: int = metadata["decoder_start_token_id"]
+        self.eos_token_id: int = metadata["eos_token_id"]
+        self.pad_token_id: int = metadata["pad_token_id"]
+        self.num_beams: int = metadata["num_beams"]
+
+    def generate(
+        self,
+        input_ids: Any,
+        attention_mask: Any,
+        num_beams: int | None = None,
+        max_new_tokens: int | None = None,
+        **_,
+    ) -> np.ndarray:
+        """
+        Translate a padded batch, mirroring `model.generate` of the transformers model.
+
+        Args:
+            input_ids (Any): The token ids of the batch, as a tensor or array of shape (batch, length).
+            attention_mask (Any): The attention mask of the batch.
+            num_beams (int | None): 1 for greedy decoding, more for beam search. Defaults to the model configuration.
+            max_new_tokens (int | None): The maximum length of each translation. Defaults to twice the input length.
+        Returns:
+            np.ndarray: The generated token ids, starting with the decoder start token and padded to the same length.
+        """
+        input_ids = np.asarray(input_ids, dtype=np.int64)
+        attention_mask = np.asarray(attention_mask, dtype=np.int64)
+        num_beams = num_beams or self.num_beams
+        max_new_tokens = max_new_tokens or 2 * input_ids.shape[1] + 10
+
+        hidden_states = self.encoder.run(None, {"input_ids": input_ids, "attention_mask": attention_mask})[0]
+        if num_beams == 1:
+            sequences = self._greedy(hidden_states, attention_mask, max_new_tokens)
+        else:
+            sequences = self._beam_search(hidden_states, attention_mask, num_beams, max_new_tokens)
+
+        output = np.full((len(sequences), max(len(s) for s in sequences) + 1), self.pad_token_id, dtype=np.int64)
+        output[:, 0] = self.decoder_start_token_id
+        for i, sequence in enumerate(sequences):
+            output[i, 1 : len(sequence) + 1] = sequence
+        return output
+
+    def _next_logits(self, tokens: np.ndarray, hidden_states: np.ndarray, attention_mask: np.ndarray) -> np.ndarray:
+        logits = self.decoder.run(
+            None,
+            {"decoder_input_ids": tokens, "encoder_hidden_states": hidden_states, "attention_mask": attention_mask},
+        )[0]
+        # Marian never generates its padding token, transformers bans it the same way
+        logits[:, self.pad_token_id] = -np.inf
+        return logits
+
+    def _greedy(self, hidden_states: np.ndarray, attention_mask: np.ndarray, max_new_tokens: int) -> list[list[int]]:
+        batch = hidden_states.shape[0]
+        tokens = np.full((batch, 1), self.decoder_start_token_id, dtype=np.int64)
+        finished = np.zeros(batch, dtype=bool)
+        for _ in range(max_new_tokens):
+            next_tokens = self._next_logits(tokens, hidden_states, attention_mask).argmax(axis=-1)
+            next_tokens = np.where(finished, self.pad_token_id, next_tokens)
+            tokens = np.concatenate([tokens, next_tokens[:, None]], axis=1)
+            finished |= next_tokens == self.eos_token_id
+            if finished.all():
+                break
+        return [[t for t in row[1:] if t != self.pad_token_id] for row in tokens.tolist()]
+
+    def _beam_search(
+        self,
+        hidden_states: np.ndarray,
+        attention_mask: np.ndarray,
+        num_beams: int,
+        max_new_tokens: int,
+    ) -> list[list[int]]:
+        batch = hidden_states.shape[0]
+        hidden_states = np.repeat(hidden_states, num_beams, axis=0)
+        attention_mask = np.repeat(attention_mask, num_beams, axis=0)
+        tokens = np.full((batch * num_beams, 1), self.decoder_start_token_id, dtype=np.int64)
+
+        # every beam starts from the same token, only the first one is alive until the first step branches out
+        scores = np.full((batch, num_beams), -np.inf)
+        scores[:, 0] = 0.0
+        hypotheses: list[list[tuple[float, list[int]]]] = [[] for _ in range(batch)]
+        done = np.zeros(batch, dtype=bool)
+
+        for step in range(1, max_new_tokens + 1):
+            logits = self._next_logits(tokens, hidden_states, attention_mask)
+            log_probs = logits - _logsumexp(logits)
+            vocab = log_probs.shape[-1]
+            candidates = (log_probs.reshape(batch, num_beams, vocab) + scores[:, :, None]).reshape(batch, -1)
+            top = np.argsort(-candidates, axis=1)[:, : 2 * num_beams]
+
+            rows, next_tokens = [], []
+            for b in range(batch):
+                kept: list[tuple[float, int, int]] = []
+                if not done[b]:
+                    for index in top[b]:
+                        beam, token = divmod(int(index), vocab)
+                        score = float(candidates[b, index])
+                        if token == self.eos_token_id:
+                            sequence = tokens[b * num_beams + beam, 1:].tolist() + [token]
+                            _add_hypothesis(hypotheses[b], (score / step, sequence), num_beams)
+                        else:
+                            kept.append((score, beam, token))
+                        if len(kept) == num_beams:
+                            break
+                    # no running beam can beat the worst finished hypothesis anymore
+                    done[b] = len(hypotheses[b]) == num_beams and kept[0][0] / step <= hypotheses[b][-1][0]
+                if done[b]:
+                    kept = [(-np.inf, 0, self.pad_token_id)] * num_beams
+                for i, (score, beam, token) in enumerate(kept):
+                    scores[b, i] = score
+                    rows.append(b * num_beams + beam)
+                    next_tokens.append(token)
+
+            if done.all():
+                break
+            tokens = np.concatenate([tokens[rows], np.array(next_tokens, dtype=np.int64)[:, None]], axis=1)
+
+        sequences = []
+        for b in range(batch):
+            if not hypotheses[b]:  # ran out of tokens before any beam finished
+                best = int(np.argmax(scores[b]))
+                hypotheses[b].append((0.0, tokens[b * num_beams + best, 1:].tolist()))
+            sequences.append(hypotheses[b][0][1])
+        return sequences
+
+
+def load_onnx_translation_model(
+    from_language: str,
+    to_language: str,
+    quantized: bool = True,
+) -> tuple[Any, OnnxMarianModel]:
+    """
+    Load the Helsinki-NLP MarianMT model of a language pair exported to ONNX, exporting it on first use.
+
+    The export, int8 dynamic quantization included, runs once and is kept in the cache directory, later runs only open
+    the onnxruntime sessions. Loaded models share the LRU registry of `load_translation_model`. Requires the optional
+    `onnx` and `onnxruntime` packages.
+    Args:
+        from_language (str): The source language in ISO 639-1 format.
+        to_language (str): The target language in ISO 639-1 format.
+        quantized (bool): Whether to quantize the weights of the exported model to int8.
+    Returns:
+        tuple[Any, OnnxMarianModel]: The tokenizer and the exported model.
+    """
+    key = (from_language, to_language, "onnx-int8" if quantized else "onnx")
+    if (loaded := _get_loaded_translation_model(key)) is not None:
+        return loaded
+
+    try:
+        import onnxruntime as ort
+    except ImportError as e:
+        raise ImportError("the 'onnx' translation mode requires onnxruntime, install vscripts[onnx]") from e
+
+    model_name = f"Helsinki-NLP/opus-mt-{from_language}-{to_language}"
+    directory = get_cache_dir() / _ONNX_DIR / f"{model_name.split('/')[-1]}{'-int8' if quantized else ''}"
+    if not (directory / "metadata.json").is_file():
+        _export_translation_model(model_name, directory, quantized)
+
+    options = ort.SessionOptions()
+    options.intra_op_num_threads = get_thread_budget().torch_threads
+    options.inter_op_num_threads = 1
+    providers = ["CPUExecutionProvider"]
+    encoder = ort.InferenceSession(str(directory / "encoder.onnx"), options, providers=providers)
+    decoder = ort.InferenceSession(str(directory / "decoder.onnx"), options, providers=providers)
+
+    tokenizer = AutoTokenizer.from_pretrained(str(directory))
+    model = OnnxMarianModel(directory, encoder, decoder)
+    _add_loaded_translation_model(key, tokenizer, model)
+    return tokenizer, model
+
+
+class _Encoder(nn.Module):
+    def __init__(self, model: Any):
+        super().__init__()
+        self.encoder = model.get_encoder()
+
+    def forward(self, input_ids: torch.Tensor, attention_mask: torch.Tensor) -> torch.Tensor:
+        return self.encoder(input_ids=input_ids, attention_mask=attention_mask).last_hidden_state
+
+
+class _Decoder(nn.Module):
+    def __init__(self, model: Any):
+        super().__init__()
+        self.model = model
+
+    def forward(
+        self,
+        decoder_input_ids: torch.Tensor,
+        encoder_hidden_states: torch.Tensor,
+        attention_mask: torch.Tensor,
+    ) -> torch.Tensor:
+        outputs = self.model(
+            encoder_outputs=(encoder_hidden_states,),
+            attention_mask=attention_mask,
+            decoder_input_ids=decoder_input_ids,
+            use_cache=False,
+        )
+        return outputs.logits[:, -1, :]
+
+
+def _export_translation_model(model_name: str, directory: Path, quantized: bool) -> None:
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    logger.info(f"exporting translation model '{model_name}' to ONNX{' (int8)' if quantized else ''}")
+    start = time.perf_counter()
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    model = AutoModelForSeq2SeqLM.from_pretrained(model_name)
+    model.eval()
+
+    directory.parent.mkdir(parents=True, exist_ok=True)
+    # exported aside and renamed, so an interrupted export is never picked up as a complete one
+    temp_path = Path(tempfile.mkdtemp(dir=directory.parent))
+    try:
+        inputs = tokenizer(["Hello world"], return_tensors="pt")
+        decoder_input_ids = torch.full((1, 1), model.config.decoder_start_token_id, dtype=torch.long)
+        with torch.inference_mode():
+            hidden_states = _Encoder(model)(inputs["input_ids"], inputs["attention_mask"])
+
+        exports = [
+            (
+                "encoder",
+                _Encoder(model),
+                (inputs["input_ids"], inputs["attention_mask"]),
+                ["input_ids", "attention_mask"],
+                {"input_ids": {0: "batch", 1: "source"}, "attention_mask": {0: "batch", 1: "source"}},
+            ),
+            (
+                "decoder",
+                _Decoder(model),
+                (decoder_input_ids, hidden_states, inputs["attention_mask"]),
+                ["decoder_input_ids", "encoder_hidden_states", "attention_mask"],
+                {
+                    "decoder_input_ids": {0: "batch", 1: "target"},
+                    "encoder_hidden_states": {0: "batch", 1: "source"},
+                    "attention_mask": {0: "batch", 1: "source"},
+                },
+            ),
+        ]
+        for name, module, args, input_names, dynamic_axes in exports:
+            path = temp_path / f"{name}.onnx"
+            torch.onnx.export(
+                module,
+                args,
+                str(path),
+                input_names=input_names,
+                output_names=["output"],
+                dynamic_axes={**dynamic_axes, "output": {0: "batch"}},
+                opset_version=_OPSET,
+                dynamo=False,
+            )
+            if quantized:
+                quantize_dynamic(path, path.with_suffix(".int8.onnx"), weight_type=QuantType.QInt8)
+                path.with_suffix(".int8.onnx").replace(path)
+
+        tokenizer.save_pretrained(temp_path)
+        metadata = {
+            "model": model_name,
+            "quantized": quantized,
+            "decoder_start_token_id": model.config.decoder_start_token_id,
+            "eos_token_id": model.config.eos_token_id,
+            "pad_token_id": model.config.pad_token_id,
+            "num_beams": model.generation_config.num_beams or 1,
+        }
+        (temp_path / "metadata.json").write_text(json.dumps(metadata), encoding="utf-8")
+
+        shutil.rmtree(directory, ignore_errors=True)
+        temp_path.rename(directory)
+    except BaseException:
+        shutil.rmtree(temp_path, ignore_errors=True)
+        raise
+
+    size = sum(f.stat().st_size for f in directory.glob("*.onnx"))
+    logger.info(f"exported '{model_name}' in {time.perf_counter() - start:.1f}s ({size / 2**20:.0f}MB)")
+
+
+def _add_hypothesis(hypotheses: list[tuple[float, list[int]]], hypothesis: tuple[float, list[int]], size: int) -> None:
+    hypotheses.append(hypothesis)
+    hypotheses.sort(key=lambda h: h[0], reverse=True)
+    del hypotheses[size:]
+
+
+def _logsumexp(logits: np.ndarray) -> np.ndarray:
+    peak = logits.max(axis=-1, keepdims=True)
+    return peak + np.log(np.exp(logits - peak).sum(axis=-1, keepdims=True))
@@ -0,0 +1,42 @@
+from typing import Literal, Protocol, TypedDict
+
+import numpy as np
+
+from ._whisper import WhisperModel
+
+ASRBackendName = Literal["whisper", "whisper-int8"]
+
+
+class ASRSegment(TypedDict):
+    start: float
+    end: float
+    text: str
+
+
+class ASRBackend(Protocol):
+    """
+    Speech recognition engine used for audio language detection and transcription.
+
+    Backends are stateless, loaded models are cached per process so a backend can be rebuilt from its name in worker
+    processes.
+    """
+
+    name: ASRBackendName
+
+    def load(self, model: WhisperModel) -> None:
+        """Load (or reuse) the given model size."""
+        ...
+
+    def detect_language(self, model: WhisperModel, audios: list[np.ndarray]) -> list[dict[str, float]]:
+        """Return the language probabilities (ISO 639-1 codes) of each 16 kHz mono audio window, in one batch."""
+        ...
+
+    def transcribe(
+        self,
+        model: WhisperModel,
+        audio: np.ndarray,
+        language: str,
+        clip_timestamps: list[float],
+    ) -> list[ASRSegment]:
+        """Transcribe the given clips of a 16 kHz mono audio, with timestamps relative to the start of `audio`."""
+        ...
@@ -0,0 +1,84 @@
+import contextlib
+import logging
+import os
+from dataclasses import dataclass
+
+import torch
+
+logger = logging.getLogger("vscripts")
+
+
+@dataclass(frozen=True)
+class ThreadBudget:
+    cores: int
+    torch_threads: int
+    torch_interop_threads: int
+    ffmpeg_threads: int
+    ffmpeg_filter_threads: int
+
+    def __str__(self) -> str:
+        return (
+            f"cores={self.cores} torch_threads={self.torch_threads} torch_interop_threads={self.torch_interop_threads} "
+            f"ffmpeg_threads={self.ffmpeg_threads} ffmpeg_filter_threads={self.ffmpeg_filter_threads}"
+        )
+
+
+_thread_budget: ThreadBudget | None = None
+
+
+def configure_threads(cores: int | None = None) -> ThreadBudget:
+    """
+    Split a per-process core budget between torch and ffmpeg, so several vscripts processes can share a node
+    without oversubscribing it.
+
+    The budget is taken from `cores`, then from the `VSCRIPTS_CORES` environment variable, and defaults to all the
+    cores available to the process. torch intra-op threads and ffmpeg threads use the whole budget, as they never run
+    at the same time, while inter-op and filter threads get a fraction of it.
+    Args:
+        cores (int | None): Number of cores this process may use.
+    Returns:
+        ThreadBudget: The effective thread counts.
+    """
+    global _thread_budget
+
+    if cores is None and (env_cores := os.environ.get("VSCRIPTS_CORES", "").strip()):
+        if not env_cores.isdigit():
+            raise ValueError(f"invalid VSCRIPTS_CORES={env_cores!r}, must be a positive integer")
+        cores = int(env_cores)
+    if cores is None:
+        cores = _available_cores()
+    if cores < 1:
+        raise ValueError(f"invalid {cores=}, must be at least 1")
+
+    torch.set_num_threads(cores)
+    # inter-op threads can only be set before torch runs any parallel work, later calls keep the current value
+    with contextlib.suppress(RuntimeError):
+        torch.set_num_interop_threads(max(1, cores // 4))
+
+    _thread_budget = ThreadBudget(
+        cores=cores,
+        torch_threads=torch.get_num_threads(),
+        torch_interop_threads=torch.get_num_interop_threads(),
+        ffmpeg_threads=cores,
+        ffmpeg_filter_threads=max(1, cores // 2),
+    )
+    logger.info(f"thread budget: {_thread_budget}")
+    return _thread_budget
+
+
+def get_thread_budget() -> ThreadBudget:
+    """
+    Retrieve the thread budget of this process, configuring it from the environment on first use.
+
+    Returns:
+        ThreadBudget: The effective thread counts.
+    """
+    if _thread_budget is None:
+        return configure_threads()
+    return _thread_budget
+
+
+def _available_cores() -> int:
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1  # pragma: no cover
@@ -0,0 +1,55 @@
+import numpy as np
+
+from ._srt import Cue
+
+
+def retime_timestamps(
+    starts: np.ndarray,
+    ends: np.ndarray,
+    offset: int = 0,
+    scale: float = 1.0,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Scale and then shift cue timestamps in bulk.
+
+    Every timestamp becomes `round(t * scale) + offset`, cues pushed before the start of the media are clamped to it.
+    Args:
+        starts (np.ndarray): The start of every cue in milliseconds.
+        ends (np.ndarray): The end of every cue in milliseconds.
+        offset (int): Milliseconds added to every timestamp, negative to hasten.
+        scale (float): Factor applied to every timestamp, e.g. 1 / atempo when the audio tempo changes.
+    Returns:
+        tuple[np.ndarray, np.ndarray]: The new starts and ends, as int64 arrays.
+    """
+    if scale <= 0:
+        raise ValueError(f"invalid {scale=}, must be positive")
+
+    starts = np.asarray(starts, dtype=np.int64)
+    ends = np.asarray(ends, dtype=np.int64)
+    if scale != 1.0:
+        starts = np.rint(starts * scale).astype(np.int64)
+        ends = np.rint(ends * scale).astype(np.int64)
+    return np.maximum(starts + offset, 0), np.maximum(ends + offset, 0)
+
+
+def retime_cues(cues: list[Cue], offset: int = 0, scale: float = 1.0) -> list[Cue]:
+    """
+    Scale and then shift the timestamps of some cues, see `retime_timestamps`.
+
+    Cues that end up entirely before the start of the media are dropped and the rest are numbered again from 1.
+    Args:
+        cues (list[Cue]): The cues to retime.
+        offset (int): Milliseconds added to every timestamp, negative to hasten.
+        scale (float): Factor applied to every timestamp.
+    Returns:
+        list[Cue]: The retimed cues.
+    """
+    starts = np.fromiter((c.start for c in cues), dtype=np.int64, count=len(cues))
+    ends = np.fromiter((c.end for c in cues), dtype=np.int64, count=len(cues))
+    starts, ends = retime_timestamps(starts, ends, offset=offset, scale=scale)
+
+    kept = np.flatnonzero(ends > 0)
+    return [
+        Cue(index, start, end, cues[i].lines)
+        for index, (i, start, end) in enumerate(zip(kept.tolist(), starts[kept].tolist(), ends[kept].tolist()), 1)
+    ]
@@ -1,54 +1,183 @@
-from typing import Any
+import logging
+import re
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass, replace
+from itertools import chain
+from pathlib import Path
+from types import TracebackType
+from typing import Self, TextIO
 
 from pyutils.strings import whitespaces_clean
 
+logger = logging.getLogger("vscripts")
 
-def parse_srt(content: str) -> list[dict[str, Any]]:
-    blocks = []
-    current: dict[str, Any] = {"index": None, "time": None, "lines": []}
-    for line in content.splitlines():
-        if line.strip().isdigit():
-            if current["index"] is not None:
-                blocks.append(current)
-            current = {"index": line.strip(), "time": None, "lines": []}
-        elif "-->" in line:
-            current["time"] = line
-        elif line.strip():
-            current["lines"].append(whitespaces_clean(line))
-    if current["index"] is not None:
-        blocks.append(current)
-    return blocks
 
+# hours are not always zero padded and some tools write a '.' before the milliseconds
+_TIMING_PATTERN = re.compile(
+    r"\s*(\d+):(\d{1,2}):(\d{1,2})[,.](\d{1,3})\s*-->\s*(\d+):(\d{1,2}):(\d{1,2})[,.](\d{1,3})"
+)
 
-def flatten_srt_text(content: str) -> str:
-    lines = []
-    for line in content.splitlines():
-        if line.strip().isdigit() or "-->" in line:
+
+@dataclass(slots=True)
+class Cue:
+    """
+    A subtitle cue.
+
+    Args:
+        index (int): The cue number.
+        start (int): The start of the cue in milliseconds.
+        end (int): The end of the cue in milliseconds.
+        lines (tuple[str, ...]): The text lines of the cue, as they appear in the file.
+    """
+
+    index: int
+    start: int
+    end: int
+    lines: tuple[str, ...]
+
+
+def parse_srt(content: str) -> list[Cue]:
+    """
+    Parse SRT content in a single pass, see `iter_srt`.
+
+    Args:
+        content (str): The SRT content.
+    Returns:
+        list[Cue]: The cues, in file order.
+    """
+    return list(iter_srt(content.splitlines()))
+
+
+def read_srt(file_path: Path) -> Iterator[Cue]:
+    """
+    Stream the cues of an SRT file, holding a single cue in memory at a time.
+
+    The file stays open until the iterator is exhausted or closed, stopping early reads no further than needed.
+    Args:
+        file_path (Path): The SRT file.
+    Returns:
+        Iterator[Cue]: The cues, in file order.
+    """
+    with file_path.open("r", encoding="utf-8", errors="ignore") as f:
+        yield from iter_srt(f)
+
+
+def iter_srt(lines: Iterable[str]) -> Iterator[Cue]:
+    """
+    Parse SRT lines into cues as they are read.
+
+    Byte order marks, CRLF line endings, multiline cues, missing cue numbers and cues without a blank line between
+    them are tolerated, anything that is not part of a cue is skipped.
+    Args:
+        lines (Iterable[str]): The SRT lines, with or without their line endings, e.g. an open file.
+    Returns:
+        Iterator[Cue]: The cues, in file order.
+    """
+    lines = iter(lines)
+    first = next(lines, None)
+    if first is None:
+        return
+
+    count = 0
+    timing: tuple[int, int] | None = None
+    index = 0
+    text: list[str] = []
+    # a number could be the next cue number or a line of text, only the following line tells
+    number: str | None = None
+
+    for line in chain([first.removeprefix("\ufeff")], lines):
+        stripped = line.strip()
+        if "-->" in stripped and (next_timing := _parse_timing(stripped)) is not None:
+            if timing is not None:
+                count += 1
+                yield Cue(index, timing[0], timing[1], tuple(text))
+            index = int(number) if number is not None else count + 1
+            timing, text, number = next_timing, [], None
             continue
-        if line.strip():
+
+        if number is not None:
+            if timing is not None:
+                text.append(number)
+            number = None
+
+        if not stripped:
+            if timing is not None:
+                count += 1
+                yield Cue(index, timing[0], timing[1], tuple(text))
+                timing = None
+        elif stripped.isdigit():
+            number = line.rstrip("\r\n")
+        elif timing is not None:
+            text.append(line.rstrip("\r\n"))
+
+    if timing is not None:
+        if number is not None:
+            text.append(number)
+        yield Cue(index, timing[0], timing[1], tuple(text))
+
+
+def format_srt(cues: list[Cue]) -> str:
+    """
+    Serialize cues back to SRT content, `parse_srt` of the result gives back the same cues.
+
+    Args:
+        cues (list[Cue]): The cues to serialize.
+    Returns:
+        str: The SRT content, one blank line between cues.
+    """
+    return "\n".join(
+        f"{c.index}\n{_format_milliseconds(c.start)} --> {_format_milliseconds(c.end)}\n"
+        + "".join(f"{line}\n" for line in c.lines)
+        for c in cues
+    )
+
+
+def flatten_srt_text(content: str) -> str:
+    return flatten_cues(iter_srt(content.splitlines()))
+
+
+def flatten_cues(cues: Iterable[Cue], max_chars: int | None = None) -> str:
+    """
+    Join the text of some cues, one cleaned line per line.
+
+    Args:
+        cues (Iterable[Cue]): The cues, e.g. streamed by `read_srt`.
+        max_chars (int | None): Stop consuming cues once this much text is collected, everything if None.
+    Returns:
+        str: The text of the cues.
+    """
+    lines, size = [], 0
+    for cue in cues:
+        for line in cue.lines:
             lines.append(whitespaces_clean(line))
+            size += len(lines[-1]) + 1
+        if max_chars is not None and size >= max_chars:
+            break
     return "\n".join(lines)
 
 
 def count_srt_entries(content: str) -> int:
-    count = 0
-    for line in content.splitlines():
-        if line.strip().isdigit():
-            count += 1
-    return count
+    return sum(1 for _ in iter_srt(content.splitlines()))
 
 
-def rebuild_srt(blocks: list[dict[str, Any]], lines: list[str]) -> str:
-    index = 0
-    out = []
-    for block in blocks:
-        out.append(block["index"])
-        out.append(block["time"])
-        for _ in block["lines"]:
-            out.append(lines[index])
-            index += 1
-        out.append("")
-    return "\n".join(out)
+def rebuild_srt(cues: list[Cue], lines: list[str]) -> str:
+    """
+    Serialize cues with their text lines replaced, e.g. by their translations.
+
+    Args:
+        cues (list[Cue]): The original cues.
+        lines (list[str]): The new text of every line of every cue, in order.
+    Returns:
+        str: The SRT content.
+    """
+    if len(lines) != sum(len(c.lines) for c in cues):
+        raise ValueError(f"expected {sum(len(c.lines) for c in cues)} lines, got {len(lines)}")
+
+    rebuilt, position = [], 0
+    for cue in cues:
+        rebuilt.append(replace(cue, lines=tuple(lines[position : position + len(cue.lines)])))
+        position += len(cue.lines)
+    return format_srt(rebuilt)
 
 
 def to_srt_timestamp(seconds: float) -> str:
@@ -57,3 +186,94 @@ def to_srt_timestamp(seconds: float) -> str:
     secs = int(seconds % 60)
     millis = int((seconds - int(seconds)) * 1000)
     return f"{hours:02d}:{minutes:02d}:{secs:02d},{millis:03d}"
+
+
+def _parse_timing(line: str) -> tuple[int, int] | None:
+    # almost every timing line is 'HH:MM:SS,mmm --> HH:MM:SS,mmm', sliced directly instead of matching the pattern
+    if len(line) == 29 and line[13:16] == "-->" and line[2] == line[5] == line[19] == line[22] == ":":
+        try:
+            return (
+                ((int(line[0:2]) * 60 + int(line[3:5])) * 60 + int(line[6:8])) * 1000 + int(line[9:12]),
+                ((int(line[17:19]) * 60 + int(line[20:22])) * 60 + int(line[23:25])) * 1000 + int(line[26:29]),
+            )
+        except ValueError:
+            pass
+    match = _TIMING_PATTERN.match(line)
+    if match is None:
+        return None
+    h1, m1, s1, ms1, h2, m2, s2, ms2 = match.groups()
+    return _to_milliseconds(h1, m1, s1, ms1), _to_milliseconds(h2, m2, s2, ms2)
+
+
+def _to_milliseconds(hours: str, minutes: str, seconds: str, millis: str) -> int:
+    # '5' after the separator means 500ms, not 5ms
+    return ((int(hours) * 60 + int(minutes)) * 60 + int(seconds)) * 1000 + int(millis.ljust(3, "0"))
+
+
+def _format_milliseconds(value: int) -> str:
+    seconds, millis = divmod(value, 1000)
+    minutes, seconds = divmod(seconds, 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d},{millis:03d}"
+
+
+class SrtWriter:
+    """
+    Write SRT cues to a file as they are produced, instead of building the whole content in memory.
+
+    The file is flushed every `flush_every` cues, so an interrupted run keeps everything written up to the last flush,
+    and progress (the end of the last cue against `duration`) is logged on every flush.
+
+    Args:
+        output_path (Path): The SRT file to write, it is truncated if it exists.
+        flush_every (int): Number of cues written between flushes.
+        duration (float | None): Total duration of the media in seconds, used to report progress.
+    """
+
+    def __init__(self, output_path: Path, flush_every: int = 20, duration: float | None = None):
+        if flush_every < 1:
+            raise ValueError(f"invalid {flush_every=}, must be at least 1")
+        self.output_path = output_path
+        self.flush_every = flush_every
+        self.duration = duration
+        self.count = 0
+        self._last_end = 0.0
+        self._file: TextIO | None = None
+
+    def __enter__(self) -> Self:
+        self._file = self.output_path.open("w", encoding="utf-8")
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if exc_type is None:
+            logger.info(f"wrote {self.count} cues to {self.output_path.name}")
+        else:
+            logger.warning(f"interrupted after writing {self.count} cues to {self.output_path.name}")
+
+    def write(self, start: float, end: float, text: str) -> None:
+        if self._file is None:
+            raise ValueError("SrtWriter must be used as a context manager")
+
+        self.count += 1
+        self._last_end = end
+        self._file.write(f"{self.count}\n{to_srt_timestamp(start)} --> {to_srt_timestamp(end)}\n{text.strip()}\n\n")
+        if self.count % self.flush_every == 0:
+            self.flush()
+
+    def flush(self) -> None:
+        if self._file is None:
+            return
+        self._file.flush()
+        if self.duration:
+            progress = min(self._last_end / self.duration, 1.0) * 100
+            logger.info(
+                f"progress {to_srt_timestamp(self._last_end)} / {to_srt_timestamp(self.duration)} ({progress:.1f}%)"
+            )
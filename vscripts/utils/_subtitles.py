@@ -0,0 +1,239 @@
+import html
+import re
+from collections.abc import Iterable, Iterator
+from itertools import chain
+from pathlib import Path
+
+import numpy as np
+
+from ._srt import Cue, _parse_timing, iter_srt
+
+# override blocks like '{\i1}' or '{\pos(10,20)\c&H00FFFF&}', drawings are switched on with '\p1' and off with '\p0'
+_ASS_OVERRIDE_PATTERN = re.compile(r"\{([^}]*)\}")
+_ASS_DRAWING_PATTERN = re.compile(r"\\p(\d+)")
+_ASS_LINE_BREAK_PATTERN = re.compile(r"\\[Nn]")
+_ASS_TIME_PATTERN = re.compile(r"(\d+):(\d{1,2}):(\d{1,2})[.,](\d{1,3})")
+# hours are optional in WebVTT, cue settings may follow the end timestamp
+_VTT_TIMING_PATTERN = re.compile(
+    r"\s*(?:(\d+):)?(\d{1,2}):(\d{1,2})[.,](\d{1,3})\s*-->\s*(?:(\d+):)?(\d{1,2}):(\d{1,2})[.,](\d{1,3})"
+)
+# voice, class, language, ruby and karaoke timestamp tags, the text inside them is kept
+_VTT_TAG_PATTERN = re.compile(r"<[^>]*>")
+_VTT_METADATA_BLOCKS = ("NOTE", "STYLE", "REGION")
+# the columns of the '[Events]' section when a file has no 'Format:' line
+_ASS_DEFAULT_FORMAT = ("layer", "start", "end", "style", "name", "marginl", "marginr", "marginv", "effect", "text")
+
+
+def read_subtitles(file_path: Path) -> Iterator[Cue]:
+    """
+    Stream the cues of a subtitle file, SRT, ASS, SSA or WebVTT, picked by its suffix.
+
+    Cues of ASS, SSA and WebVTT files have their styling stripped, so only the displayed text is left.
+    Args:
+        file_path (Path): The subtitle file.
+    Returns:
+        Iterator[Cue]: The cues, in file order.
+    """
+    suffix = file_path.suffix.lower()
+    if suffix == ".srt":
+        parse = iter_srt
+    elif suffix in (".ass", ".ssa"):
+        parse = iter_ass
+    elif suffix == ".vtt":
+        parse = iter_vtt
+    else:
+        raise ValueError(f"unsupported subtitle format {suffix!r} for {file_path}")
+
+    with file_path.open("r", encoding="utf-8", errors="ignore") as f:
+        yield from parse(f)
+
+
+def read_subtitle_timings(file_path: Path) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Read only the timestamps of the cues of a subtitle file, SRT, ASS, SSA or WebVTT, picked by its suffix.
+
+    SRT and WebVTT text is never looked at, only their timing lines are parsed.
+    Args:
+        file_path (Path): The subtitle file.
+    Returns:
+        tuple[np.ndarray, np.ndarray]: The start and end of every cue in milliseconds, as int64 arrays.
+    """
+    suffix = file_path.suffix.lower()
+    if suffix in (".ass", ".ssa"):
+        timings = ((cue.start, cue.end) for cue in read_subtitles(file_path))
+        return _timings_to_arrays(timings)
+    if suffix == ".srt":
+        parse_timing = _parse_timing
+    elif suffix == ".vtt":
+        parse_timing = _parse_vtt_timing
+    else:
+        raise ValueError(f"unsupported subtitle format {suffix!r} for {file_path}")
+
+    with file_path.open("r", encoding="utf-8", errors="ignore") as f:
+        timings = (parse_timing(line.strip()) for line in f if "-->" in line)
+        return _timings_to_arrays(t for t in timings if t is not None)
+
+
+def subtitle_coverage(timings: list[tuple[np.ndarray, np.ndarray]], duration: float) -> np.ndarray:
+    """
+    Compute the fraction of a media covered by the cues of each of several subtitle tracks, all at once.
+
+    Cues are clipped to the media, overlapping cues are counted twice so the result is capped at 1.
+    Args:
+        timings (list[tuple[np.ndarray, np.ndarray]]): The cue starts and ends of every track in milliseconds, e.g.
+            from `read_subtitle_timings`.
+        duration (float): The duration of the media in seconds.
+    Returns:
+        np.ndarray: The coverage of every track, between 0 and 1.
+    """
+    if duration <= 0:
+        raise ValueError(f"invalid {duration=}, must be positive")
+    if not timings:
+        return np.zeros(0)
+
+    duration_ms = duration * 1000
+    lengths = [len(starts) for starts, _ in timings]
+    starts = np.clip(np.concatenate([s for s, _ in timings]), 0, duration_ms)
+    ends = np.clip(np.concatenate([e for _, e in timings]), 0, duration_ms)
+    tracks = np.repeat(np.arange(len(timings)), lengths)
+    covered = np.bincount(tracks, weights=np.maximum(ends - starts, 0), minlength=len(timings))
+    return np.minimum(covered / duration_ms, 1.0)
+
+
+def iter_ass(lines: Iterable[str]) -> Iterator[Cue]:
+    """
+    Parse ASS or SSA lines into cues as they are read.
+
+    Only 'Dialogue:' events are kept, override blocks are removed, '\\N' line breaks split the cue lines and events
+    that only draw shapes are skipped. Cues are numbered from 1 in file order, which is not always the display order.
+    Args:
+        lines (Iterable[str]): The ASS or SSA lines, with or without their line endings, e.g. an open file.
+    Returns:
+        Iterator[Cue]: The cues, in file order.
+    """
+    in_events = False
+    columns = _ASS_DEFAULT_FORMAT
+    count = 0
+    for line in _without_bom(lines):
+        stripped = line.strip()
+        if stripped.startswith("["):
+            in_events = stripped.lower() == "[events]"
+            continue
+        if not in_events:
+            continue
+
+        key, _, value = stripped.partition(":")
+        key = key.lower()
+        if key == "format":
+            columns = tuple(c.strip().lower() for c in value.split(","))
+            continue
+        if key != "dialogue":
+            continue
+
+        # the text is always the last column and the only one that may contain commas
+        fields = dict(zip(columns, (f.strip() for f in value.split(",", len(columns) - 1))))
+        start, end = _parse_ass_time(fields.get("start", "")), _parse_ass_time(fields.get("end", ""))
+        if start is None or end is None:
+            continue
+        text = _strip_ass_text(fields.get("text", ""))
+        if text is None:
+            continue
+
+        count += 1
+        yield Cue(count, start, end, text)
+
+
+def iter_vtt(lines: Iterable[str]) -> Iterator[Cue]:
+    """
+    Parse WebVTT lines into cues as they are read.
+
+    The header, notes, styles and regions are skipped, cue identifiers and settings are ignored, tags are removed
+    and character references are decoded. Cues are numbered from 1 in file order.
+    Args:
+        lines (Iterable[str]): The WebVTT lines, with or without their line endings, e.g. an open file.
+    Returns:
+        Iterator[Cue]: The cues, in file order.
+    """
+    count = 0
+    timing: tuple[int, int] | None = None
+    text: list[str] = []
+    # the header and metadata blocks last until the next blank line
+    skipping = True
+
+    for line in _without_bom(lines):
+        stripped = line.strip()
+        if not stripped:
+            if timing is not None:
+                count += 1
+                yield Cue(count, timing[0], timing[1], tuple(text))
+            timing, text, skipping = None, [], False
+            continue
+        if skipping:
+            continue
+
+        if timing is None:
+            if stripped.startswith(_VTT_METADATA_BLOCKS):
+                skipping = True
+            elif "-->" in stripped:
+                timing = _parse_vtt_timing(stripped)
+                skipping = timing is None
+            # anything else before the timing line is the cue identifier
+            continue
+
+        if cleaned := html.unescape(_VTT_TAG_PATTERN.sub("", stripped)).strip():
+            text.append(cleaned)
+
+    if timing is not None:
+        yield Cue(count + 1, timing[0], timing[1], tuple(text))
+
+
+def _timings_to_arrays(timings: Iterable[tuple[int, int]]) -> tuple[np.ndarray, np.ndarray]:
+    flat = np.fromiter(chain.from_iterable(timings), dtype=np.int64)
+    return flat[0::2], flat[1::2]
+
+
+def _without_bom(lines: Iterable[str]) -> Iterator[str]:
+    lines = iter(lines)
+    first = next(lines, None)
+    if first is None:
+        return iter(())
+    return chain([first.removeprefix("\ufeff")], lines)
+
+
+def _strip_ass_text(text: str) -> tuple[str, ...] | None:
+    drawing = False
+    parts: list[str] = []
+    position = 0
+    for match in _ASS_OVERRIDE_PATTERN.finditer(text):
+        if not drawing:
+            parts.append(text[position : match.start()])
+        for level in _ASS_DRAWING_PATTERN.findall(match.group(1)):
+            drawing = int(level) > 0
+        position = match.end()
+    if not drawing:
+        parts.append(text[position:])
+
+    plain = "".join(parts).replace("\\h", " ")
+    lines = tuple(line.strip() for line in _ASS_LINE_BREAK_PATTERN.split(plain) if line.strip())
+    # a dialogue made only of drawings or overrides shows no text
+    return lines or None
+
+
+def _parse_ass_time(value: str) -> int | None:
+    match = _ASS_TIME_PATTERN.fullmatch(value)
+    if match is None:
+        return None
+    hours, minutes, seconds, fraction = match.groups()
+    # ASS uses centiseconds, '0:00:01.5' is 1.5 seconds
+    return ((int(hours) * 60 + int(minutes)) * 60 + int(seconds)) * 1000 + int(fraction.ljust(3, "0"))
+
+
+def _parse_vtt_timing(line: str) -> tuple[int, int] | None:
+    match = _VTT_TIMING_PATTERN.match(line)
+    if match is None:
+        return None
+    h1, m1, s1, ms1, h2, m2, s2, ms2 = match.groups()
+    return (
+        ((int(h1 or 0) * 60 + int(m1)) * 60 + int(s1)) * 1000 + int(ms1.ljust(3, "0")),
+        ((int(h2 or 0) * 60 + int(m2)) * 60 + int(s2)) * 1000 + int(ms2.ljust(3, "0")),
+    )
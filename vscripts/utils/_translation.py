@@ -0,0 +1,72 @@
+import logging
+import time
+from collections import OrderedDict
+from typing import Any
+
+from transformers import AutoModelForSeq2SeqLM, AutoTokenizer
+
+logger = logging.getLogger("vscripts")
+
+# translation models are ~300MB each, only the most recently used language pairs are kept in memory
+MAX_LOADED_TRANSLATION_MODELS = 4
+
+# shared by the PyTorch and the ONNX models, keyed by language pair and, for the ONNX ones, their export variant
+_loaded_translation_models: OrderedDict[tuple[str, ...], tuple[Any, Any]] = OrderedDict()
+
+
+def load_translation_model(from_language: str, to_language: str) -> tuple[Any, Any]:
+    """
+    Load the Helsinki-NLP MarianMT tokenizer and model for a language pair, reusing them if they are already loaded.
+
+    Loaded models are kept in a process-wide LRU registry of `MAX_LOADED_TRANSLATION_MODELS` entries, so translating
+    several tracks or files in the same pair loads the model only once.
+    Args:
+        from_language (str): The source language in ISO 639-1 format.
+        to_language (str): The target language in ISO 639-1 format.
+    Returns:
+        tuple[Any, Any]: The tokenizer and the model.
+    """
+    key = (from_language, to_language)
+    if (loaded := _get_loaded_translation_model(key)) is not None:
+        return loaded
+
+    model_name = f"Helsinki-NLP/opus-mt-{from_language}-{to_language}"
+    start = time.perf_counter()
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    model = AutoModelForSeq2SeqLM.from_pretrained(model_name)
+    model.eval()
+    elapsed = time.perf_counter() - start
+
+    memory = sum(p.numel() * p.element_size() for p in model.parameters())
+    logger.info(f"loaded translation model '{model_name}' in {elapsed:.1f}s ({memory / 2**20:.0f}MB)")
+
+    _add_loaded_translation_model(key, tokenizer, model)
+    return tokenizer, model
+
+
+def preload_translation_models(pairs: list[tuple[str, str]]) -> None:
+    """
+    Eagerly load the translation models for the given language pairs, e.g. at the start of a batch run.
+
+    Args:
+        pairs (list[tuple[str, str]]): (source, target) language pairs in ISO 639-1 format.
+    """
+    if len(pairs) > MAX_LOADED_TRANSLATION_MODELS:
+        logger.warning(f"preloading {len(pairs)} translation models, only {MAX_LOADED_TRANSLATION_MODELS} are kept")
+    for from_language, to_language in pairs:
+        load_translation_model(from_language, to_language)
+
+
+def _get_loaded_translation_model(key: tuple[str, ...]) -> tuple[Any, Any] | None:
+    if key not in _loaded_translation_models:
+        return None
+    _loaded_translation_models.move_to_end(key)
+    return _loaded_translation_models[key]
+
+
+def _add_loaded_translation_model(key: tuple[str, ...], tokenizer: Any, model: Any) -> None:
+    _loaded_translation_models[key] = (tokenizer, model)
+    while len(_loaded_translation_models) > MAX_LOADED_TRANSLATION_MODELS:
+        evicted, _ = _loaded_translation_models.popitem(last=False)
+        variant = f" ({evicted[2]})" if len(evicted) > 2 else ""
+        logger.info(f"evicted translation model for {evicted[0]}->{evicted[1]}{variant}")
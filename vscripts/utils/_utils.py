@@ -6,6 +6,8 @@ from typing import Literal
 import vscripts.constants as C
 from vscripts.constants import HDR_COLOR_TRANSFERS
 
+from ._resources import get_thread_budget
+
 logger = logging.getLogger("vscripts")
 
 
@@ -43,8 +45,38 @@ def get_output_file_path(maybe_output: Path, default_name: str) -> Path:
     return maybe_output
 
 
-def run_ffmpeg_command(command: list[str]) -> None:
-    full_command = FFMPEG_BASE_COMMAND + command
+def ffmpeg_command(command: list[str], outputs: list[str] | None = None) -> list[str]:
+    """
+    Build a full ffmpeg command line, limiting decoder, encoder and filter threads to the process thread budget.
+
+    Args:
+        command (list[str]): The ffmpeg arguments, ending with the output.
+        outputs (list[str] | None): The outputs of a command writing several files, as they appear in `command`.
+            Defaults to the last argument.
+    Returns:
+        list[str]: The full command.
+    """
+    outputs = outputs or command[-1:]
+    budget = get_thread_budget()
+    threads = ["-threads", str(budget.ffmpeg_threads)]
+    full_command = FFMPEG_BASE_COMMAND + [
+        "-filter_threads",
+        str(budget.ffmpeg_filter_threads),
+        "-filter_complex_threads",
+        str(budget.ffmpeg_filter_threads),
+    ]
+    # '-threads' applies to the next input when placed before '-i', and to the next output otherwise
+    previous = None
+    for arg in command:
+        if arg == "-i" or (arg in outputs and previous != "-i"):
+            full_command += threads
+        full_command.append(arg)
+        previous = arg
+    return full_command
+
+
+def run_ffmpeg_command(command: list[str], outputs: list[str] | None = None) -> None:
+    full_command = ffmpeg_command(command, outputs)
     logger.debug(full_command)
     capture = C.LOG_LEVEL != logging.DEBUG
     subprocess.run(full_command, capture_output=capture, text=True, check=True)
@@ -71,6 +103,8 @@ def suffix_by_codec(codec: str | None, codec_type: Literal["audio", "subtitle"])
         return "srt"
     if codec.lower() in {"ac3", "vorbis"}:
         return "mka"
+    if codec.lower() == "webvtt":
+        return "vtt"
     return codec.lower()
 
 
@@ -132,8 +166,22 @@ _CONTAINER_AUDIO_SUPPORT = {
     ".mp4": {"aac", "mp3", "alac", "ac3", "eac3"},
     ".mov": {"aac", "mp3", "alac", "ac3", "eac3"},
     ".mkv": {"aac", "mp3", "opus", "flac", "vorbis", "ac3", "eac3", "dts", "truehd"},
+    ".mka": {"aac", "mp3", "opus", "flac", "vorbis", "ac3", "eac3", "dts", "truehd"},
     ".webm": {"opus", "vorbis"},
 }
+# ffmpeg encoders whose name is not the codec name
+_AUDIO_ENCODERS = {"mp3": "libmp3lame", "opus": "libopus", "vorbis": "libvorbis", "dts": "dca", "wav": "pcm_s16le"}
+_LOSSLESS_AUDIO_CODECS = {"flac", "alac", "truehd", "wavpack", "mlp"}
+# audio only files that hold their codec as is
+_AUDIO_FILE_SUPPORT = {
+    ".mp3": {"mp3"},
+    ".aac": {"aac"},
+    ".ac3": {"ac3"},
+    ".eac3": {"eac3"},
+    ".flac": {"flac"},
+    ".m4a": {"aac", "alac"},
+    ".ogg": {"vorbis", "opus", "flac"},
+}
 
 
 def ffmpeg_audio_codec_for_suffix(input: Path, output: Path, codec: str) -> str:
@@ -158,6 +206,35 @@ def ffmpeg_audio_codec_for_suffix(input: Path, output: Path, codec: str) -> str:
     return "aac"
 
 
+def ffmpeg_audio_encoder_args(codec: str | None, bit_rate: int, index: int, output: Path) -> list[str]:
+    """
+    Choose the encoder of an audio stream that has to be re-encoded, e.g. because it is filtered.
+
+    The source codec and bit rate are kept when the output container supports them, otherwise the codec picked by
+    `ffmpeg_audio_codec_for_suffix` is used with the encoder defaults.
+    Args:
+        codec (str | None): The codec of the source stream.
+        bit_rate (int): The bit rate of the source stream, 0 if unknown.
+        index (int): The index of the stream among the audio streams of the output.
+        output (Path): The output file of the ffmpeg command.
+    Returns:
+        list[str]: The ffmpeg arguments setting the encoder, and the bit rate of lossy codecs, of the stream.
+    """
+    codec = codec or ""
+    out_ext = output.suffix.lower()
+    is_pcm = codec.startswith("pcm_")
+    if (is_pcm and out_ext in {".mkv", ".mka", ".mov", ".wav"}) or codec in _AUDIO_FILE_SUPPORT.get(out_ext, set()):
+        target = codec
+    else:
+        target = ffmpeg_audio_codec_for_suffix(output, output, codec)
+        target = codec if target == "copy" else target
+
+    args = [f"-c:a:{index}", _AUDIO_ENCODERS.get(target, target)]
+    if bit_rate > 0 and target == codec and not is_pcm and codec not in _LOSSLESS_AUDIO_CODECS:
+        args += [f"-b:a:{index}", str(bit_rate)]
+    return args
+
+
 def is_hdr(path: Path) -> bool:
     command = [
         "-select_streams",
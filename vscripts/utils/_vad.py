@@ -0,0 +1,127 @@
+import logging
+
+import numpy as np
+
+logger = logging.getLogger("vscripts")
+
+SAMPLE_RATE = 16_000
+FRAME_SECONDS = 0.03
+
+# frames quieter than this are never considered speech, regardless of the track loudness
+_MIN_SPEECH_DB = -55.0
+# voiced speech is harmonic, so its spectrum is far from flat; broadband noise sits close to 1.0
+_MAX_SPEECH_FLATNESS = 0.45
+# number of frames whose spectra are computed at once, bounds the memory used on long tracks
+_FRAMES_PER_BLOCK = 4096
+
+
+def speech_frames(
+    audio: np.ndarray,
+    sample_rate: int = SAMPLE_RATE,
+    frame_seconds: float = FRAME_SECONDS,
+) -> np.ndarray:
+    """
+    Classify fixed-size frames of a mono PCM signal as speech or non-speech.
+
+    A frame is considered speech when its energy is above an adaptive threshold (derived from the noise floor and the
+    loudest frames of the track) and its spectrum is not flat (voiced speech is harmonic, silence and hiss are not).
+
+    Args:
+        audio (np.ndarray): Mono PCM samples in the [-1, 1] range.
+        sample_rate (int): Sample rate of `audio`.
+        frame_seconds (float): Length of each analysis frame in seconds.
+    Returns:
+        np.ndarray: Boolean mask with one entry per frame.
+    """
+    frame_length = int(sample_rate * frame_seconds)
+    n_frames = len(audio) // frame_length
+    if n_frames == 0:
+        return np.zeros(0, dtype=bool)
+
+    frames = audio[: n_frames * frame_length].astype(np.float32, copy=False).reshape(n_frames, frame_length)
+    energy = np.empty(n_frames, dtype=np.float32)
+    flatness = np.empty(n_frames, dtype=np.float32)
+    window = np.hanning(frame_length).astype(np.float32)
+    for start in range(0, n_frames, _FRAMES_PER_BLOCK):
+        block = frames[start : start + _FRAMES_PER_BLOCK]
+        energy[start : start + len(block)] = 10 * np.log10(np.mean(block**2, axis=1) + 1e-10)
+
+        power = np.abs(np.fft.rfft(block * window, axis=1)) ** 2 + 1e-10
+        flatness[start : start + len(block)] = np.exp(np.mean(np.log(power), axis=1)) / np.mean(power, axis=1)
+
+    floor, peak = np.percentile(energy, [10, 95])
+    threshold = max(min(floor + 12.0, peak - 6.0), _MIN_SPEECH_DB)
+    return (energy > threshold) & (flatness < _MAX_SPEECH_FLATNESS)
+
+
+def speech_segments(
+    audio: np.ndarray,
+    sample_rate: int = SAMPLE_RATE,
+    min_silence: float = 1.0,
+    min_speech: float = 0.25,
+    padding: float = 0.2,
+) -> list[tuple[float, float]]:
+    """
+    Find the regions of a mono PCM signal that contain speech.
+
+    Gaps shorter than `min_silence` are bridged, regions shorter than `min_speech` are dropped, and every region is
+    widened by `padding` on both sides so word onsets and endings are not clipped.
+
+    Args:
+        audio (np.ndarray): Mono PCM samples in the [-1, 1] range.
+        sample_rate (int): Sample rate of `audio`.
+        min_silence (float): Minimum length in seconds of a non-speech gap to split regions.
+        min_speech (float): Minimum length in seconds of a speech region to be kept.
+        padding (float): Seconds added before and after each region.
+    Returns:
+        list[tuple[float, float]]: Sorted, non-overlapping (start, end) pairs in seconds.
+    """
+    mask = speech_frames(audio, sample_rate=sample_rate)
+    if not mask.any():
+        return []
+
+    # rising and falling edges of the speech mask give the [start, end) frame indices of each region
+    edges = np.diff(np.concatenate(([0], mask.astype(np.int8), [0])))
+    starts = np.flatnonzero(edges == 1) * FRAME_SECONDS
+    ends = np.flatnonzero(edges == -1) * FRAME_SECONDS
+    total = len(audio) / sample_rate
+
+    segments: list[tuple[float, float]] = []
+    for start, end in zip(starts.tolist(), ends.tolist()):
+        if segments and start - segments[-1][1] < min_silence:
+            segments[-1] = (segments[-1][0], end)
+        else:
+            segments.append((start, end))
+
+    padded: list[tuple[float, float]] = []
+    for start, end in segments:
+        if end - start < min_speech:
+            continue
+        start, end = max(0.0, start - padding), min(total, end + padding)
+        if padded and start <= padded[-1][1]:
+            padded[-1] = (padded[-1][0], end)
+        else:
+            padded.append((start, end))
+    return padded
+
+
+def densest_speech_window(audio: np.ndarray, window_seconds: float = 30.0, sample_rate: int = SAMPLE_RATE) -> int:
+    """
+    Find the window of the given length that contains the most speech.
+
+    Args:
+        audio (np.ndarray): Mono PCM samples in the [-1, 1] range.
+        window_seconds (float): Length of the window in seconds.
+        sample_rate (int): Sample rate of `audio`.
+    Returns:
+        int: Sample offset where the best window starts, 0 if the audio is shorter than the window.
+    """
+    mask = speech_frames(audio, sample_rate=sample_rate)
+    window = int(window_seconds / FRAME_SECONDS)
+    if len(mask) <= window or not mask.any():
+        return 0
+
+    counts = np.convolve(mask.astype(np.int32), np.ones(window, dtype=np.int32), mode="valid")
+    best = int(np.argmax(counts))
+    logger.debug(f"densest speech window starts at {best * FRAME_SECONDS:.2f}s ({counts[best] / window:.0%} speech)")
+    return best * int(sample_rate * FRAME_SECONDS)
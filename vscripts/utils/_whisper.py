@@ -1,17 +1,44 @@
 import logging
 from typing import Literal
 
+import torch
+from torch import nn
 from whisper import Whisper, load_model
+from whisper.model import Linear
 
 logger = logging.getLogger("vscripts")
 
-WhisperModel = Literal["small", "medium", "large", "turbo"]
+WhisperModel = Literal["tiny", "base", "small", "medium", "large", "turbo"]
 
-_loaded_whisper_models: dict[WhisperModel, Whisper] = {}
+# models used for language detection, from smallest to largest, the larger ones only run on low confidence results
+DETECTION_WHISPER_MODELS: tuple[WhisperModel, ...] = ("tiny", "small", "medium")
 
+_loaded_whisper_models: dict[tuple[WhisperModel, bool], Whisper] = {}
 
-def load_whisper(model: WhisperModel) -> Whisper:
-    logger.debug(f"loading whisper model: {model}")
-    if model not in _loaded_whisper_models:
-        _loaded_whisper_models[model] = load_model(model)
-    return _loaded_whisper_models[model]
+
+def load_whisper(model: WhisperModel, quantized: bool = False) -> Whisper:
+    """
+    Load a Whisper model, reusing it if it was already loaded in this process.
+
+    Args:
+        model (WhisperModel): The model size to load.
+        quantized (bool): Whether to load the model on CPU with its linear layers dynamically quantized to int8.
+    Returns:
+        Whisper: The loaded model.
+    """
+    logger.debug(f"loading whisper model: {model} ({quantized=})")
+    if (model, quantized) not in _loaded_whisper_models:
+        if quantized:
+            _loaded_whisper_models[(model, quantized)] = _quantize(load_model(model, device="cpu"))
+        else:
+            _loaded_whisper_models[(model, quantized)] = load_model(model)
+    return _loaded_whisper_models[(model, quantized)]
+
+
+def _quantize(model: Whisper) -> Whisper:
+    # whisper subclasses nn.Linear only to cast weights to the input dtype, but dynamic quantization only swaps exact
+    # nn.Linear modules, on fp32 CPU models both behave the same
+    for module in model.modules():
+        if isinstance(module, Linear):
+            module.__class__ = nn.Linear
+    return torch.ao.quantization.quantize_dynamic(model, {nn.Linear}, dtype=torch.qint8, inplace=True)